@@ -6,25 +6,52 @@ import asyncio
 import contextlib
 import json
 import logging
+import time
 import uuid
-from dataclasses import asdict, dataclass, is_dataclass
-from typing import Any, AsyncIterator, Callable, Optional
+from dataclasses import dataclass, field, fields, is_dataclass
+from typing import Any, AsyncIterator, Callable, Optional, Sequence
 
 from headless_coder_sdk.core import (
     CoderStreamEvent,
+    EventBatchIterator,
+    EventFilter,
     EventIterator,
+    EventPipeline,
+    EventStream,
     HeadlessCoder,
+    LazyOriginal,
+    MiddlewareChain,
+    MiddlewareStack,
     PromptInput,
+    RunMiddleware,
     RunOpts,
+    RunProgress,
+    RunReport,
     RunResult,
+    RunSnapshot,
+    RunTimeoutError,
+    RunTracker,
+    RunWatchdog,
+    SpawnRequest,
     StartOpts,
     ThreadHandle,
+    TurnQueue,
+    check_output_schema,
+    coalesce_run_batches,
+    coalesce_run_events,
+    extract_json_payload,
+    get_schema_registry,
+    iterate_batches,
     link_signal,
     now,
+    validate_run_output,
 )
 
 LOGGER = logging.getLogger(__name__)
 CODER_NAME = "claude"
+INTERRUPT_TIMEOUT = 1.5
+"""Seconds an abort waits for ``ClaudeSDKClient.interrupt()`` to be acknowledged."""
+_CLIENT_METHODS = ("connect", "query", "receive_response", "receive_messages", "interrupt", "disconnect")
 
 
 class ClaudeSdkNotAvailableError(RuntimeError):
@@ -45,6 +72,7 @@ class _ClaudeSdkBindings:
     ThinkingBlock: type
     ToolUseBlock: type
     ToolResultBlock: type
+    ClaudeSDKClient: Optional[type] = None
 
 
 def _import_sdk() -> _ClaudeSdkBindings:
@@ -67,6 +95,10 @@ def _import_sdk() -> _ClaudeSdkBindings:
         raise ClaudeSdkNotAvailableError(
             "claude-agent-sdk is not available. Install it with Python >=3.10 to use this adapter."
         ) from exc
+    try:
+        from claude_agent_sdk import ClaudeSDKClient
+    except ImportError:  # pragma: no cover - depends on the installed SDK version
+        ClaudeSDKClient = None
     return _ClaudeSdkBindings(
         query=sdk_query,
         ClaudeAgentOptions=ClaudeAgentOptions,
@@ -78,6 +110,7 @@ def _import_sdk() -> _ClaudeSdkBindings:
         ThinkingBlock=ThinkingBlock,
         ToolUseBlock=ToolUseBlock,
         ToolResultBlock=ToolResultBlock,
+        ClaudeSDKClient=ClaudeSDKClient,
     )
 
 
@@ -89,16 +122,44 @@ class ClaudeThreadState:
     session_id: str
     resume: bool
     current_run: Optional["ActiveClaudeRun"] = None
+    turn_queue: Optional[TurnQueue] = None
 
 
-@dataclass
+@dataclass(eq=False)
 class ActiveClaudeRun:
     """Captures metadata about an in-flight Claude SDK run."""
 
     generator: AsyncIterator[Any]
     unsubscribe: Callable[[], None]
+    prompt_stream: Optional["_PromptStream"] = None
+    client: Any = None
     aborted: bool = False
     abort_reason: Optional[str] = None
+    abort_started: Optional[float] = None
+    watchdog: Optional[RunWatchdog] = None
+    timed_out: bool = False
+    handle: Optional["ClaudeThreadHandle"] = None
+    middleware: Optional[MiddlewareChain] = None
+    result: Optional[RunResult] = None
+    error: Optional[BaseException] = None
+    progress: RunProgress = field(default_factory=lambda: RunProgress(CODER_NAME))
+
+    def abort_latency_ms(self) -> Optional[float]:
+        """Milliseconds elapsed since the abort was requested, or ``None`` when not aborted."""
+
+        if self.abort_started is None:
+            return None
+        return round((time.monotonic() - self.abort_started) * 1000, 3)
+
+    def snapshot(self) -> RunSnapshot:
+        """Returns the live progress of this run; the SDK does not expose the CLI's pid."""
+
+        queue = self.handle.internal.turn_queue if self.handle is not None else None
+        return self.progress.snapshot(
+            thread_id=self.handle.id if self.handle is not None else None,
+            queued_turns=queue.depth if queue is not None else 0,
+            aborted=self.aborted,
+        )
 
 
 class ClaudeThreadHandle(ThreadHandle):
@@ -115,13 +176,36 @@ class ClaudeThreadHandle(ThreadHandle):
     async def run(self, input: PromptInput, opts: Optional[RunOpts] = None) -> RunResult:
         """Delegates to the adapter's blocking run helper."""
 
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return await queue.run(lambda: self._adapter._run_internal(self, input, opts), opts)
         return await self._adapter._run_internal(self, input, opts)
 
     def run_streamed(self, input: PromptInput, opts: Optional[RunOpts] = None) -> EventIterator:
         """Delegates to the adapter's streaming helper."""
 
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return queue.stream(lambda: self._adapter._run_streamed_internal(self, input, opts), opts)
         return self._adapter._run_streamed_internal(self, input, opts)
 
+    def run_streamed_batches(self, input: PromptInput, opts: Optional[RunOpts] = None) -> EventBatchIterator:
+        """Streams events as lists, one per Claude SDK message."""
+
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return queue.stream(lambda: self._adapter._run_streamed_batches_internal(self, input, opts), opts)
+        return self._adapter._run_streamed_batches_internal(self, input, opts)
+
+    async def send(self, message: PromptInput) -> None:
+        """Pushes a follow-up user message into the in-flight run.
+
+        The run must have been started with ``RunOpts["streamingInput"]``; Claude picks the
+        message up without discarding the work already done in the turn.
+        """
+
+        self._adapter._send_input(self.internal, message)
+
     async def interrupt(self, reason: Optional[str] = None) -> None:
         """Cooperatively interrupts the active run if present."""
 
@@ -140,12 +224,14 @@ class ClaudeAdapter(HeadlessCoder):
         self,
         default_opts: Optional[StartOpts] = None,
         sdk: Optional[_ClaudeSdkBindings] = None,
+        middleware: Optional[Sequence[RunMiddleware]] = None,
     ) -> None:
         """Creates a new adapter instance.
 
         Args:
             default_opts: Default start options injected when callers omit values.
             sdk: Optional SDK bindings used for testing or custom loading.
+            middleware: Middleware applied to this adapter's runs after the global middleware.
         """
 
         self._default_opts = default_opts or {}
@@ -156,20 +242,26 @@ class ClaudeAdapter(HeadlessCoder):
                 self._sdk = _import_sdk()
             except ClaudeSdkNotAvailableError as exc:
                 self._sdk_error = exc
+        self._runs = RunTracker()
+        self._middleware = MiddlewareStack(middleware)
 
     async def start_thread(self, opts: Optional[StartOpts] = None) -> ThreadHandle:
         """Creates a new logical Claude session."""
 
         merged = self._merge_start_opts(opts)
         session_id = merged.get("resume") or str(uuid.uuid4())
-        state = ClaudeThreadState(opts=merged, session_id=session_id, resume=False)
+        state = ClaudeThreadState(
+            opts=merged, session_id=session_id, resume=False, turn_queue=TurnQueue.from_start_opts(merged)
+        )
         return ClaudeThreadHandle(self, state)
 
     async def resume_thread(self, thread_id: str, opts: Optional[StartOpts] = None) -> ThreadHandle:
         """Resumes an existing Claude session via its identifier."""
 
         merged = self._merge_start_opts(opts)
-        state = ClaudeThreadState(opts=merged, session_id=thread_id, resume=True)
+        state = ClaudeThreadState(
+            opts=merged, session_id=thread_id, resume=True, turn_queue=TurnQueue.from_start_opts(merged)
+        )
         return ClaudeThreadHandle(self, state)
 
     def get_thread_id(self, thread: ThreadHandle) -> Optional[str]:
@@ -182,6 +274,31 @@ class ClaudeAdapter(HeadlessCoder):
 
         await thread.close()
 
+    def use(self, middleware: RunMiddleware) -> None:
+        """Adds ``middleware`` to this adapter's runs, after the globally registered middleware."""
+
+        self._middleware.use(middleware)
+
+    def active_runs(self) -> list[ThreadHandle]:
+        """Returns the handles of this adapter whose runs are in flight."""
+
+        return self._runs.active_runs()
+
+    def run_snapshots(self) -> list[RunSnapshot]:
+        """Returns what each in-flight run of this adapter is doing right now, oldest first."""
+
+        return self._runs.snapshots()
+
+    async def interrupt_all(self, reason: Optional[str] = None) -> int:
+        """Interrupts every in-flight run and returns how many were signalled."""
+
+        return await self._runs.interrupt_all(reason)
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Stops accepting runs, waits up to ``timeout`` seconds, then aborts the stragglers."""
+
+        return await self._runs.drain(timeout)
+
     async def _run_internal(
         self,
         thread: ClaudeThreadHandle,
@@ -195,30 +312,53 @@ class ClaudeAdapter(HeadlessCoder):
         self._assert_idle(state)
         prompt = self._apply_output_schema_prompt(input, run_opts)
         options = self._build_options(state, run_opts)
-        generator = sdk.query(prompt=prompt, options=options)
-        active = self._register_run(state, generator, run_opts)
+        check_output_schema(run_opts)
+        prompt_stream = _PromptStream.from_run_opts(prompt, state.session_id, run_opts)
+        generator, client = _start_query(sdk, prompt_stream or prompt, options)
+        active = self._register_run(thread, generator, run_opts, prompt_stream, client)
         last_text = ""
         final_message: Any = None
         try:
-            async for message in generator:
-                self._capture_session_id(state, thread, message)
-                if isinstance(message, sdk.AssistantMessage):
-                    last_text = _render_assistant_text(message, sdk)
-                elif isinstance(message, sdk.ResultMessage):
-                    final_message = message
+            try:
+                async for message in generator:
+                    if active.aborted:
+                        # What the interrupted turn still sends is not part of the run's outcome.
+                        break
+                    _watch_message(active.progress, message, sdk)
+                    self._capture_session_id(state, thread, message)
+                    if isinstance(message, sdk.AssistantMessage):
+                        last_text = _render_assistant_text(message, sdk)
+                    elif isinstance(message, sdk.ResultMessage):
+                        final_message = message
+                        if prompt_stream is not None:
+                            prompt_stream.result_received()
+            except Exception:
+                # Stopping the CLI can surface as an SDK error; an aborted run reports the abort.
+                if not active.aborted:
+                    raise
             if active.aborted:
-                raise _create_abort_error(active.abort_reason)
+                if active.timed_out:
+                    error: RuntimeError = RunTimeoutError(active.abort_reason)
+                else:
+                    error = _create_abort_error(active.abort_reason)
+                error.abort_latency_ms = active.abort_latency_ms()  # type: ignore[attr-defined]
+                raise error
             structured = self._extract_structured_output(last_text, final_message, run_opts)
             usage = getattr(final_message, "usage", None)
             if isinstance(final_message, sdk.ResultMessage) and final_message.is_error:
                 raise RuntimeError(_build_result_error_message(final_message))
-            return RunResult(
+            active.result = RunResult(
                 thread_id=state.session_id,
                 text=last_text or getattr(final_message, "result", None),
                 json=structured,
                 usage=usage,
                 raw=final_message,
+                validation_errors=validate_run_output(run_opts, structured),
             )
+            return active.result
+        except BaseException as exc:
+            active.error = exc
+            raise
         finally:
             await self._cleanup_run(state, active)
 
@@ -230,35 +370,89 @@ class ClaudeAdapter(HeadlessCoder):
     ) -> EventIterator:
         """Streams Claude events and normalises them into shared event objects."""
 
+        batches = self._stream_batches(thread, input, run_opts)
+        return EventStream(coalesce_run_events(iterate_batches(batches), run_opts))
+
+    def _run_streamed_batches_internal(
+        self,
+        thread: ClaudeThreadHandle,
+        input: PromptInput,
+        run_opts: Optional[RunOpts],
+    ) -> EventBatchIterator:
+        """Streams Claude events as one list per SDK message."""
+
+        batches = self._stream_batches(thread, input, run_opts)
+        return EventStream(coalesce_run_batches(batches, run_opts))
+
+    def _stream_batches(
+        self,
+        thread: ClaudeThreadHandle,
+        input: PromptInput,
+        run_opts: Optional[RunOpts],
+    ) -> EventBatchIterator:
+        """Runs a Claude query and yields the normalised events of each SDK message."""
+
         sdk = self._ensure_sdk()
         state = thread.internal
         self._assert_idle(state)
         prompt = self._apply_output_schema_prompt(input, run_opts)
         options = self._build_options(state, run_opts)
 
-        async def _iterator() -> AsyncIterator[CoderStreamEvent]:
-            generator = sdk.query(prompt=prompt, options=options)
-            active = self._register_run(state, generator, run_opts)
+        async def _iterator() -> EventBatchIterator:
+            check_output_schema(run_opts)
+            prompt_stream = _PromptStream.from_run_opts(prompt, state.session_id, run_opts)
+            generator, client = _start_query(sdk, prompt_stream or prompt, options)
+            active = self._register_run(thread, generator, run_opts, prompt_stream, client)
+            assembler = _StreamAssembler()
             saw_done = False
             try:
-                async for message in generator:
-                    self._capture_session_id(state, thread, message)
-                    for event in _normalize_claude_message(message, sdk):
-                        yield event
-                        if event["type"] == "done":
+                pipeline = EventPipeline.from_run_opts(CODER_NAME, run_opts, active.middleware)
+                event_filter = pipeline.event_filter if pipeline is not None else None
+                compact = pipeline is not None and pipeline.compact
+                try:
+                    async for message in generator:
+                        if active.aborted:
+                            # What the interrupted turn still sends is not part of the run's outcome.
+                            break
+                        _watch_message(active.progress, message, sdk)
+                        self._capture_session_id(state, thread, message)
+                        if prompt_stream is not None and isinstance(message, sdk.ResultMessage):
+                            prompt_stream.result_received()
+                        batch = _normalize_claude_message(message, sdk, event_filter, compact, assembler)
+                        if any(event["type"] == "done" for event in batch):
                             saw_done = True
+                        if pipeline is not None:
+                            batch = pipeline.feed_all(batch)
+                        if batch:
+                            yield batch
+                except Exception:
+                    # Stopping the CLI can surface as an SDK error; an aborted run reports the abort.
+                    if not active.aborted:
+                        raise
+                tail: list[CoderStreamEvent] = []
                 if active.aborted:
                     reason = active.abort_reason or "Interrupted"
-                    yield _create_cancelled_event(reason)
-                    yield _create_interrupted_error_event(reason)
-                    return
-                if not saw_done:
-                    yield {
-                        "type": "done",
-                        "provider": CODER_NAME,
-                        "ts": now(),
-                        "originalItem": {"reason": "completed"},
-                    }
+                    code = "timeout" if active.timed_out else "interrupted"
+                    tail = [
+                        _create_cancelled_event(reason, active.abort_latency_ms()),
+                        _create_interrupted_error_event(reason, code),
+                    ]
+                elif not saw_done:
+                    tail = [
+                        {
+                            "type": "done",
+                            "provider": CODER_NAME,
+                            "ts": now(),
+                            "originalItem": {"reason": "completed"},
+                        }
+                    ]
+                if pipeline is not None:
+                    tail = pipeline.feed_all(tail)
+                if tail:
+                    yield tail
+            except BaseException as exc:
+                active.error = exc
+                raise
             finally:
                 await self._cleanup_run(state, active)
 
@@ -273,7 +467,7 @@ class ClaudeAdapter(HeadlessCoder):
         return merged
 
     def _build_options(self, state: ClaudeThreadState, run_opts: Optional[RunOpts]):
-        """Translates StartOpts and RunOpts into ClaudeAgentOptions."""
+        """Translates StartOpts and RunOpts into ClaudeAgentOptions, then applies ``before_spawn``."""
 
         sdk = self._ensure_sdk()
         opts = state.opts
@@ -295,45 +489,108 @@ class ClaudeAdapter(HeadlessCoder):
             permission_prompt_tool_name=opts.get("permissionPromptToolName"),
             add_dirs=add_dirs,
         )
+        middleware = self._middleware.chain()
+        if middleware is not None and middleware.before_spawn is not None:
+            env = dict(getattr(options, "env", None) or {})
+            cwd = opts.get("workingDirectory")
+            request = SpawnRequest(CODER_NAME, None, [], dict(env), cwd, options, run_opts)
+            middleware.prepare_spawn(request)
+            if request.env != env:
+                options.env = request.env
         return options
 
     def _register_run(
         self,
-        state: ClaudeThreadState,
+        thread: ClaudeThreadHandle,
         generator: AsyncIterator[Any],
         run_opts: Optional[RunOpts],
+        prompt_stream: Optional[_PromptStream] = None,
+        client: Any = None,
     ) -> ActiveClaudeRun:
-        """Registers an active run and wires cancellation handlers."""
+        """Registers an active run and wires cancellation handlers.
+
+        The abort listener is bound to the loop driving the run, so signals fired from other
+        threads still reach it. Raises :class:`AdapterShutdownError` while the adapter drains.
+        """
+
+        self._runs.check_accepting()
+        state = thread.internal
+        loop = asyncio.get_running_loop()
 
         def _on_abort(reason: Optional[str]) -> None:
-            loop = _try_get_running_loop()
-            if loop:
-                loop.create_task(self._abort_active_run(state, reason or "Interrupted"))
+            loop.create_task(self._abort_active_run(state, reason or "Interrupted"))
 
         signal = run_opts.get("signal") if run_opts else None
-        unsubscribe = link_signal(signal, _on_abort)
-        active = ActiveClaudeRun(generator=generator, unsubscribe=unsubscribe)
+        unsubscribe = link_signal(signal, _on_abort, loop)
+        active = ActiveClaudeRun(
+            generator=generator,
+            unsubscribe=unsubscribe,
+            prompt_stream=prompt_stream,
+            client=client,
+            handle=thread,
+            middleware=self._middleware.chain(),
+        )
+        active.watchdog = RunWatchdog.from_run_opts(
+            run_opts, lambda reason: self._expire_run(state, active, reason)
+        )
+        active.progress.watchdog = active.watchdog
         state.current_run = active
+        self._runs.add(active)
         return active
 
     async def _cleanup_run(self, state: ClaudeThreadState, active: ActiveClaudeRun) -> None:
         """Cleans up run bookkeeping once execution finishes."""
 
         active.unsubscribe()
+        if active.watchdog is not None:
+            active.watchdog.cancel()
+        if active.prompt_stream is not None:
+            active.prompt_stream.close()
         if state.current_run is active:
             state.current_run = None
+        self._runs.discard(active)
+        if active.middleware is not None and active.middleware.after_run is not None:
+            active.middleware.after_run(RunReport.capture(active.snapshot(), active.result, active.error))
         with contextlib.suppress(Exception):
             await active.generator.aclose()
 
+    def _send_input(self, state: ClaudeThreadState, message: PromptInput) -> None:
+        """Queues ``message`` on the active run's streaming prompt."""
+
+        active = state.current_run
+        if active is None or active.prompt_stream is None or active.aborted:
+            raise RuntimeError("send() requires an in-flight Claude run started with streamingInput.")
+        active.prompt_stream.send(_normalize_prompt(message))
+
+    def _expire_run(self, state: ClaudeThreadState, active: ActiveClaudeRun, reason: str) -> None:
+        """Aborts ``active`` like a fired signal once its watchdog expires."""
+
+        if state.current_run is not active or active.aborted:
+            return
+        active.timed_out = True
+        loop = _try_get_running_loop()
+        if loop:
+            loop.create_task(self._abort_active_run(state, reason))
+
     async def _abort_active_run(self, state: ClaudeThreadState, reason: Optional[str]) -> None:
-        """Signals the currently active generator to stop."""
+        """Stops the active run through the SDK's own controls.
+
+        Runs on a ``ClaudeSDKClient`` are interrupted with ``interrupt()``, waiting at most
+        ``INTERRUPT_TIMEOUT`` for the CLI to acknowledge; the CLI then ends the turn and the run
+        finishes. Closing the query generator is attempted as well, which ends runs on plain
+        ``query()``; it fails harmlessly while a consumer is iterating.
+        """
 
         active = state.current_run
         if not active or active.aborted:
             return
         active.aborted = True
         active.abort_reason = reason or "Interrupted"
+        active.abort_started = time.monotonic()
         active.unsubscribe()
+        if active.client is not None:
+            with contextlib.suppress(Exception):
+                await asyncio.wait_for(active.client.interrupt(), INTERRUPT_TIMEOUT)
         with contextlib.suppress(Exception):
             await active.generator.aclose()
 
@@ -350,7 +607,10 @@ class ClaudeAdapter(HeadlessCoder):
         """Ensures only one run executes at a time per thread."""
 
         if state.current_run is not None:
-            raise RuntimeError("Claude adapter only supports one in-flight run per thread.")
+            raise RuntimeError(
+                "Claude adapter only supports one in-flight run per thread; "
+                "start it with queueTurns to queue runs."
+            )
 
     def _apply_output_schema_prompt(self, input: PromptInput, run_opts: Optional[RunOpts]) -> str:
         """Appends structured output instructions to the prompt when needed."""
@@ -358,7 +618,7 @@ class ClaudeAdapter(HeadlessCoder):
         schema = run_opts.get("outputSchema") if run_opts else None
         if not schema:
             return _normalize_prompt(input)
-        schema_snippet = json.dumps(schema, indent=2)
+        schema_snippet = get_schema_registry().prompt_snippet(schema)
         instruction = (
             "You must respond with valid JSON that satisfies the provided schema. "
             "Do not include prose before or after the JSON.\n"
@@ -384,11 +644,11 @@ class ClaudeAdapter(HeadlessCoder):
         payload = getattr(result_message, "result", None)
         if payload:
             if isinstance(payload, str):
-                parsed = _extract_json_payload(payload)
+                parsed = extract_json_payload(payload, run_opts["outputSchema"])
                 if parsed is not None:
                     return parsed
             return payload
-        return _extract_json_payload(assistant_text)
+        return extract_json_payload(assistant_text, run_opts["outputSchema"])
 
     def _ensure_sdk(self) -> _ClaudeSdkBindings:
         """Returns the SDK bindings or raises if unavailable."""
@@ -409,6 +669,71 @@ def create_adapter(defaults: Optional[StartOpts] = None) -> HeadlessCoder:
 create_adapter.coder_name = CODER_NAME  # type: ignore[attr-defined]
 
 
+class _PromptStream:
+    """Async-iterable prompt handed to the SDK in streaming input mode.
+
+    Yields the initial prompt, then every message queued with :meth:`send`. The SDK keeps the
+    CLI's stdin open while the iterable is pending, so the stream ends on the first result that
+    arrives once every queued message has been handed to the SDK (or when the run is cleaned up),
+    letting the CLI answer what it already received and exit normally. Results are not counted
+    per message because the CLI may fold a message sent mid-turn into the running turn.
+    """
+
+    def __init__(self, prompt: str, session_id: str) -> None:
+        self._session_id = session_id
+        self._queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        self._queue.put_nowait(prompt)
+        self._closed = False
+
+    @classmethod
+    def from_run_opts(
+        cls,
+        prompt: str,
+        session_id: str,
+        run_opts: Optional[RunOpts],
+    ) -> Optional["_PromptStream"]:
+        """Returns a prompt stream when ``RunOpts["streamingInput"]`` is set."""
+
+        if not run_opts or not run_opts.get("streamingInput"):
+            return None
+        return cls(prompt, session_id)
+
+    def send(self, text: str) -> None:
+        """Queues a follow-up user message."""
+
+        if self._closed:
+            raise RuntimeError("The Claude run no longer accepts input.")
+        self._queue.put_nowait(text)
+
+    def result_received(self) -> None:
+        """Records a finished turn and ends the input when no message is waiting to be sent."""
+
+        if self._queue.empty():
+            self.close()
+
+    def close(self) -> None:
+        """Ends the input stream; queued but unsent messages are still delivered first."""
+
+        if not self._closed:
+            self._closed = True
+            self._queue.put_nowait(None)
+
+    def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        return self._messages()
+
+    async def _messages(self) -> AsyncIterator[dict[str, Any]]:
+        while True:
+            text = await self._queue.get()
+            if text is None:
+                return
+            yield {
+                "type": "user",
+                "message": {"role": "user", "content": text},
+                "parent_tool_use_id": None,
+                "session_id": self._session_id,
+            }
+
+
 def _normalize_prompt(input: PromptInput) -> str:
     """Normalises chat-style prompts into the Claude CLI string format."""
 
@@ -436,13 +761,40 @@ def _render_assistant_text(message: Any, sdk: _ClaudeSdkBindings) -> str:
     return "\n".join(text_blocks).strip()
 
 
-def _normalize_claude_message(message: Any, sdk: _ClaudeSdkBindings) -> list[CoderStreamEvent]:
-    """Maps Claude message dataclasses into shared stream events."""
-
+def _normalize_claude_message(
+    message: Any,
+    sdk: _ClaudeSdkBindings,
+    event_filter: Optional[EventFilter] = None,
+    compact: bool = False,
+    assembler: Optional[_StreamAssembler] = None,
+) -> list[CoderStreamEvent]:
+    """Maps Claude message dataclasses into shared stream events.
+
+    The message is serialised at most once for all derived events (see :class:`_Originals`).
+    With an event filter, messages that can only produce unwanted events are skipped and
+    ``originalItem`` is not serialised when the filter drops it; with ``compact`` events the
+    serialisation is deferred until ``originalItem`` is read. ``assembler`` carries partial
+    message state across the messages of one run so text and tool calls already streamed are
+    not emitted again by the final ``AssistantMessage``.
+    """
+
+    if assembler is None:
+        assembler = _StreamAssembler()
+    mode = "lazy" if compact else "eager"
+    if event_filter is not None:
+        possible = _possible_event_types(message, sdk)
+        if possible is not None and not event_filter.needs_any(possible):
+            return []
+        if not event_filter.original_item:
+            mode = "omit"
+    if isinstance(message, sdk.StreamEvent):
+        return _normalize_stream_event_dict(message.event, _Originals(message.event, mode), assembler)
+    originals = _Originals(message, mode)
     ts = now()
     events: list[CoderStreamEvent] = []
     if isinstance(message, sdk.AssistantMessage):
-        text = _render_assistant_text(message, sdk)
+        streamed_text, streamed_tool_ids = assembler.take_streamed()
+        text = "" if streamed_text else _render_assistant_text(message, sdk)
         if text:
             events.append(
                 {
@@ -451,11 +803,13 @@ def _normalize_claude_message(message: Any, sdk: _ClaudeSdkBindings) -> list[Cod
                     "role": "assistant",
                     "text": text,
                     "ts": ts,
-                    "originalItem": _serialize_original(message),
+                    "originalItem": originals.whole(),
                 }
             )
-        for block in getattr(message, "content", []):
+        for index, block in enumerate(getattr(message, "content", [])):
             if isinstance(block, sdk.ToolUseBlock):
+                if block.id in streamed_tool_ids:
+                    continue
                 events.append(
                     {
                         "type": "tool_use",
@@ -464,7 +818,7 @@ def _normalize_claude_message(message: Any, sdk: _ClaudeSdkBindings) -> list[Cod
                         "callId": block.id,
                         "args": block.input,
                         "ts": ts,
-                        "originalItem": _serialize_original(block),
+                        "originalItem": originals.part("content", index),
                     }
                 )
             elif isinstance(block, sdk.ToolResultBlock):
@@ -476,7 +830,7 @@ def _normalize_claude_message(message: Any, sdk: _ClaudeSdkBindings) -> list[Cod
                         "callId": block.tool_use_id,
                         "result": block.content,
                         "ts": ts,
-                        "originalItem": _serialize_original(block),
+                        "originalItem": originals.part("content", index),
                     }
                 )
         return events
@@ -488,7 +842,7 @@ def _normalize_claude_message(message: Any, sdk: _ClaudeSdkBindings) -> list[Cod
                     "provider": CODER_NAME,
                     "message": _build_result_error_message(message),
                     "ts": ts,
-                    "originalItem": _serialize_original(message),
+                    "originalItem": originals.whole(),
                 }
             )
             return events
@@ -499,11 +853,11 @@ def _normalize_claude_message(message: Any, sdk: _ClaudeSdkBindings) -> list[Cod
                     "provider": CODER_NAME,
                     "stats": message.usage,
                     "ts": ts,
-                    "originalItem": _serialize_original(message),
+                    "originalItem": originals.whole(),
                 }
             )
         events.append(
-            {"type": "done", "provider": CODER_NAME, "ts": ts, "originalItem": _serialize_original(message)}
+            {"type": "done", "provider": CODER_NAME, "ts": ts, "originalItem": originals.whole()}
         )
         return events
     if isinstance(message, sdk.SystemMessage):
@@ -516,30 +870,90 @@ def _normalize_claude_message(message: Any, sdk: _ClaudeSdkBindings) -> list[Cod
                 "threadId": session_id,
                 "label": label,
                 "ts": ts,
-                "originalItem": _serialize_original(message),
+                "originalItem": originals.whole(),
             }
         )
         return events
-    if isinstance(message, sdk.StreamEvent):
-        return _normalize_stream_event_dict(message.event)
     return [
         {
             "type": "progress",
             "provider": CODER_NAME,
             "label": getattr(message, "__class__", type("", (), {})).__name__,
             "ts": ts,
-            "originalItem": _serialize_original(message),
+            "originalItem": originals.whole(),
         }
     ]
 
 
-def _serialize_original(item: Any) -> Any:
-    """Converts Claude SDK dataclasses into JSON-serialisable payloads."""
+def _possible_event_types(message: Any, sdk: _ClaudeSdkBindings) -> Optional[frozenset[str]]:
+    """Returns the event types ``message`` can normalise into, or ``None`` when unknown."""
 
-    if item is None:
+    if isinstance(message, sdk.AssistantMessage):
+        return frozenset({"message", "tool_use", "tool_result"})
+    if isinstance(message, sdk.ResultMessage):
+        return frozenset({"error", "usage", "done"})
+    if isinstance(message, sdk.SystemMessage):
+        return frozenset({"init", "progress"})
+    if isinstance(message, sdk.StreamEvent):
         return None
-    if is_dataclass(item):
-        return asdict(item)
+    return frozenset({"progress"})
+
+
+class _Originals:
+    """Builds the ``originalItem`` payloads of the events derived from one Claude SDK message.
+
+    The message is serialised at most once and events for individual content blocks share the
+    matching sub-tree of that payload. ``mode`` is ``"eager"`` for dict events, ``"lazy"`` for
+    compact events (payloads are wrapped in :class:`LazyOriginal` and serialised from the SDK
+    object each time they are read, so nothing converted is retained) and ``"omit"`` when the
+    event filter drops ``originalItem``.
+    """
+
+    __slots__ = ("_item", "_mode", "_payload", "_serialized")
+
+    def __init__(self, item: Any, mode: str = "eager") -> None:
+        self._item = item
+        self._mode = mode
+        self._payload: Any = None
+        self._serialized = False
+
+    def whole(self) -> Any:
+        """Returns the payload for the message itself."""
+
+        if self._mode == "omit":
+            return None
+        if self._mode == "lazy":
+            return LazyOriginal(lambda: _serialize_original(self._item))
+        if not self._serialized:
+            self._payload = _serialize_original(self._item)
+            self._serialized = True
+        return self._payload
+
+    def part(self, key: str, index: int) -> Any:
+        """Returns the payload for ``message.<key>[index]``, shared with :meth:`whole`."""
+
+        if self._mode == "omit":
+            return None
+        if self._mode == "lazy":
+            return LazyOriginal(lambda: _serialize_original(getattr(self._item, key)[index]))
+        payload = self.whole()
+        try:
+            return payload[key][index]
+        except (KeyError, IndexError, TypeError):
+            return _serialize_original(getattr(self._item, key)[index])
+
+
+def _serialize_original(item: Any) -> Any:
+    """Converts Claude SDK dataclasses into JSON-serialisable payloads.
+
+    Unlike :func:`dataclasses.asdict` this never deep-copies leaf values: strings, numbers and
+    other scalars (tool results can be megabytes) are shared with the SDK object.
+    """
+
+    if item is None or isinstance(item, (str, int, float, bool)):
+        return item
+    if is_dataclass(item) and not isinstance(item, type):
+        return {field.name: _serialize_original(getattr(item, field.name)) for field in fields(item)}
     if isinstance(item, dict):
         return {key: _serialize_original(value) for key, value in item.items()}
     if isinstance(item, (list, tuple)):
@@ -547,10 +961,117 @@ def _serialize_original(item: Any) -> Any:
     return item
 
 
-def _normalize_stream_event_dict(event: dict[str, Any]) -> list[CoderStreamEvent]:
-    """Normalises raw stream events into the shared representation."""
+class _StreamAssembler:
+    """Maps Anthropic content-block stream events to incremental events for one run.
+
+    ``text_delta`` fragments become ``message`` events with ``delta: True``. Tool input arrives
+    as ``input_json_delta`` fragments that are joined and emitted as a single ``tool_use`` event
+    when the block stops. The assembler remembers what was streamed so the final
+    ``AssistantMessage`` can skip it (see :meth:`take_streamed`). Thinking deltas are omitted,
+    like thinking blocks in complete messages.
+    """
+
+    def __init__(self) -> None:
+        self._tool_blocks: dict[Any, dict[str, Any]] = {}
+        self._streamed_text = False
+        self._streamed_tool_ids: set[str] = set()
+
+    def handle(self, event: dict[str, Any], originals: _Originals) -> Optional[list[CoderStreamEvent]]:
+        """Returns the events for a content-block event, or ``None`` for other event types."""
+
+        event_type = event.get("type")
+        index = event.get("index")
+        if event_type == "content_block_start":
+            block = event.get("content_block") or {}
+            if block.get("type") in ("tool_use", "server_tool_use"):
+                self._tool_blocks[index] = {
+                    "id": block.get("id"),
+                    "name": block.get("name", "tool"),
+                    "input": block.get("input"),
+                    "parts": [],
+                }
+                return []
+            if block.get("type") == "text" and block.get("text"):
+                return [self._text_delta(block["text"], originals)]
+            return []
+        if event_type == "content_block_delta":
+            delta = event.get("delta") or {}
+            kind = delta.get("type")
+            if kind == "text_delta" and delta.get("text"):
+                return [self._text_delta(delta["text"], originals)]
+            if kind == "input_json_delta" and index in self._tool_blocks:
+                self._tool_blocks[index]["parts"].append(delta.get("partial_json") or "")
+            return []
+        if event_type == "content_block_stop":
+            tool = self._tool_blocks.pop(index, None)
+            if tool is None:
+                return []
+            if tool["id"]:
+                self._streamed_tool_ids.add(tool["id"])
+            return [
+                {
+                    "type": "tool_use",
+                    "provider": CODER_NAME,
+                    "name": tool["name"],
+                    "callId": tool["id"],
+                    "args": _assemble_tool_input(tool["parts"], tool["input"]),
+                    "ts": now(),
+                    "originalItem": originals.whole(),
+                }
+            ]
+        return None
+
+    def take_streamed(self) -> tuple[bool, set[str]]:
+        """Returns whether text was streamed and the streamed tool ids, then starts afresh."""
+
+        streamed = (self._streamed_text, self._streamed_tool_ids)
+        self._streamed_text = False
+        self._streamed_tool_ids = set()
+        self._tool_blocks.clear()
+        return streamed
+
+    def _text_delta(self, text: str, originals: _Originals) -> CoderStreamEvent:
+        self._streamed_text = True
+        return {
+            "type": "message",
+            "provider": CODER_NAME,
+            "role": "assistant",
+            "text": text,
+            "delta": True,
+            "ts": now(),
+            "originalItem": originals.whole(),
+        }
+
+
+def _assemble_tool_input(parts: list[str], initial: Any) -> Any:
+    """Joins streamed ``input_json_delta`` fragments into the tool input."""
+
+    raw = "".join(parts)
+    if not raw:
+        return initial if initial is not None else {}
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        return raw
+
+
+def _normalize_stream_event_dict(
+    event: dict[str, Any],
+    originals: Optional[_Originals] = None,
+    assembler: Optional[_StreamAssembler] = None,
+) -> list[CoderStreamEvent]:
+    """Normalises raw stream events into the shared representation.
+
+    Anthropic content-block events go through ``assembler``; other shapes are mapped by their
+    type name.
+    """
 
     event = event or {}
+    if originals is None:
+        originals = _Originals(event)
+    handled = (assembler or _StreamAssembler()).handle(event, originals)
+    if handled is not None:
+        return handled
     event_type = str(event.get("type") or event.get("label") or "claude.event").lower()
     ts = now()
     if "partial" in event_type:
@@ -562,7 +1083,7 @@ def _normalize_stream_event_dict(event: dict[str, Any]) -> list[CoderStreamEvent
                 "text": event.get("text") or event.get("content"),
                 "delta": True,
                 "ts": ts,
-                "originalItem": _serialize_original(event),
+                "originalItem": originals.whole(),
             }
         ]
     if "assistant" in event_type:
@@ -573,7 +1094,7 @@ def _normalize_stream_event_dict(event: dict[str, Any]) -> list[CoderStreamEvent
                 "role": "assistant",
                 "text": event.get("text") or event.get("content"),
                 "ts": ts,
-                "originalItem": _serialize_original(event),
+                "originalItem": originals.whole(),
             }
         ]
     if "tool_use" in event_type:
@@ -585,7 +1106,7 @@ def _normalize_stream_event_dict(event: dict[str, Any]) -> list[CoderStreamEvent
                 "callId": event.get("id"),
                 "args": event.get("input"),
                 "ts": ts,
-                "originalItem": _serialize_original(event),
+                "originalItem": originals.whole(),
             }
         ]
     if "tool_result" in event_type:
@@ -597,7 +1118,7 @@ def _normalize_stream_event_dict(event: dict[str, Any]) -> list[CoderStreamEvent
                 "callId": event.get("tool_use_id") or event.get("id"),
                 "result": event.get("output"),
                 "ts": ts,
-                "originalItem": _serialize_original(event),
+                "originalItem": originals.whole(),
             }
         ]
     if "error" in event_type:
@@ -607,7 +1128,7 @@ def _normalize_stream_event_dict(event: dict[str, Any]) -> list[CoderStreamEvent
                 "provider": CODER_NAME,
                 "message": event.get("message", "Claude run failed"),
                 "ts": ts,
-                "originalItem": _serialize_original(event),
+                "originalItem": originals.whole(),
             }
         ]
     if event_type in ("result", "completed", "final"):
@@ -616,7 +1137,7 @@ def _normalize_stream_event_dict(event: dict[str, Any]) -> list[CoderStreamEvent
                 "type": "done",
                 "provider": CODER_NAME,
                 "ts": ts,
-                "originalItem": _serialize_original(event),
+                "originalItem": originals.whole(),
             }
         ]
     return [
@@ -625,25 +1146,65 @@ def _normalize_stream_event_dict(event: dict[str, Any]) -> list[CoderStreamEvent
             "provider": CODER_NAME,
             "label": event.get("type") or event.get("label") or "claude.event",
             "ts": ts,
-            "originalItem": _serialize_original(event),
+            "originalItem": originals.whole(),
         }
     ]
 
 
-def _extract_json_payload(text: Optional[str]) -> Any:
-    """Parses JSON fenced code blocks from the assistant response when possible."""
+def _start_query(sdk: _ClaudeSdkBindings, prompt: Any, options: Any) -> tuple[AsyncIterator[Any], Any]:
+    """Starts a run and returns its message iterator with the client controlling it.
+
+    ``ClaudeSDKClient`` is preferred: it configures its own transport (permission prompts, hooks,
+    MCP servers) and offers ``interrupt()``. SDK versions without a usable client run on plain
+    ``query()`` and return ``None`` as the client.
+    """
+
+    if not _supports_client(sdk.ClaudeSDKClient):
+        return sdk.query(prompt=prompt, options=options), None
+    client = sdk.ClaudeSDKClient(options=options)  # type: ignore[misc]
+    return _client_messages(client, prompt), client
+
+
+def _supports_client(client_cls: Optional[type]) -> bool:
+    """Returns whether ``client_cls`` offers every method the adapter drives a run with."""
+
+    if client_cls is None:
+        return False
+    return all(callable(getattr(client_cls, name, None)) for name in _CLIENT_METHODS)
+
+
+async def _client_messages(client: Any, prompt: Any) -> AsyncIterator[Any]:
+    """Yields the messages of one run on ``client``, disconnecting it when the run ends.
+
+    A string prompt is sent as one query and the run ends with its result; a streaming prompt
+    feeds the client's input and the run ends once the CLI exits after the input closes.
+    """
 
-    if not text:
-        return None
-    candidate = text.strip()
-    start = candidate.find("{")
-    end = candidate.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        return None
     try:
-        return json.loads(candidate[start : end + 1])
-    except json.JSONDecodeError:
-        return None
+        if isinstance(prompt, str):
+            await client.connect()
+            await client.query(prompt)
+            messages = client.receive_response()
+        else:
+            await client.connect(prompt)
+            messages = client.receive_messages()
+        async for message in messages:
+            yield message
+    finally:
+        await client.disconnect()
+
+
+def _watch_message(progress: RunProgress, message: Any, sdk: _ClaudeSdkBindings) -> None:
+    """Reports an SDK message to ``progress``, tracking tool calls from its content blocks."""
+
+    content = getattr(message, "content", None)
+    if isinstance(content, list):
+        for block in content:
+            if isinstance(block, sdk.ToolUseBlock):
+                progress.tool_started(getattr(block, "name", None))
+            elif isinstance(block, sdk.ToolResultBlock):
+                progress.tool_finished()
+    progress.observe(type(message).__name__)
 
 
 def _create_abort_error(reason: Optional[str]) -> RuntimeError:
@@ -654,24 +1215,27 @@ def _create_abort_error(reason: Optional[str]) -> RuntimeError:
     return error
 
 
-def _create_cancelled_event(reason: str) -> CoderStreamEvent:
-    """Builds a cancelled stream event."""
+def _create_cancelled_event(reason: str, abort_latency_ms: Optional[float] = None) -> CoderStreamEvent:
+    """Builds a cancelled stream event, carrying the measured abort latency when known."""
 
-    return {
+    event: CoderStreamEvent = {
         "type": "cancelled",
         "provider": CODER_NAME,
         "ts": now(),
         "originalItem": {"reason": reason},
     }
+    if abort_latency_ms is not None:
+        event["abortLatencyMs"] = abort_latency_ms
+    return event
 
 
-def _create_interrupted_error_event(reason: str) -> CoderStreamEvent:
-    """Builds the error payload associated with cancellations."""
+def _create_interrupted_error_event(reason: str, code: str = "interrupted") -> CoderStreamEvent:
+    """Builds the error payload associated with cancellations (``code`` is ``timeout`` on expiry)."""
 
     return {
         "type": "error",
         "provider": CODER_NAME,
-        "code": "interrupted",
+        "code": code,
         "message": reason,
         "ts": now(),
         "originalItem": {"reason": reason},
@@ -18,6 +18,7 @@ for path in (CORE_SRC, ADAPTER_SRC):
         sys.path.insert(0, str(path))
 
 from headless_coder_sdk.core import AbortController, RunResult  # noqa: E402
+from headless_coder_sdk.claude_agent_sdk import adapter as adapter_module  # noqa: E402
 from headless_coder_sdk.claude_agent_sdk.adapter import (  # noqa: E402
     ClaudeAdapter,
     _ClaudeSdkBindings,
@@ -233,6 +234,109 @@ async def test_stream_emits_events_and_done() -> None:
     assert types[-1] == "done"
 
 
+@pytest.mark.asyncio
+async def test_stream_batches_yield_one_list_per_message() -> None:
+    """Ensures batched streaming groups the events produced by each SDK message."""
+
+    sdk = _StubSdk()
+    assistant = _StubAssistantMessage(content=[_StubTextBlock("Hello")])
+    result = _StubResultMessage(
+        subtype="result",
+        duration_ms=1,
+        duration_api_ms=1,
+        is_error=False,
+        num_turns=1,
+        session_id="s",
+    )
+    sdk.queue([assistant, result])
+    adapter = ClaudeAdapter(sdk=sdk.bindings())
+    thread = await adapter.start_thread()
+
+    batches = [batch async for batch in thread.run_streamed_batches("hello")]
+
+    assert len(batches) == 2
+    assert "message" in [event["type"] for event in batches[0]]
+    assert batches[-1][-1]["type"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_stream_serialises_each_message_once() -> None:
+    """Ensures block events share the message payload and compact events defer serialisation."""
+
+    sdk = _StubSdk()
+    log = "line\n" * 1000
+    assistant = _StubAssistantMessage(
+        content=[
+            _StubTextBlock("Running"),
+            _StubToolUseBlock(id="t1", name="bash", input={"cmd": "make"}),
+            _StubToolResultBlock(tool_use_id="t1", content=log),
+        ]
+    )
+    sdk.queue([assistant])
+    sdk.queue([assistant])
+    adapter = ClaudeAdapter(sdk=sdk.bindings())
+    thread = await adapter.start_thread()
+
+    message, tool_use, tool_result, _ = [event async for event in thread.run_streamed("hi")]
+    assert tool_use["originalItem"] is message["originalItem"]["content"][1]
+    assert tool_result["originalItem"] is message["originalItem"]["content"][2]
+    assert tool_result["originalItem"]["content"] is log
+
+    compact = [event async for event in thread.run_streamed("hi", {"compactEvents": True})]
+    assert compact[2]["originalItem"] == {"tool_use_id": "t1", "content": log, "is_error": None}
+
+
+@pytest.mark.asyncio
+async def test_stream_maps_partial_messages_to_deltas() -> None:
+    """Ensures raw stream events become text deltas and assembled tool calls without duplicates."""
+
+    def _stream(event_type: str, index: int = 0, **fields: Any) -> _StubStreamEvent:
+        event = {"type": event_type, "index": index, **fields}
+        return _StubStreamEvent(uuid="u", session_id="s", event=event)
+
+    text_delta = {"type": "text_delta"}
+    json_delta = {"type": "input_json_delta"}
+    tool_block = {"type": "tool_use", "id": "t1", "name": "bash", "input": {}}
+    sdk = _StubSdk()
+    sdk.queue(
+        [
+            _stream("message_start", message={"id": "m1"}),
+            _stream("content_block_start", content_block={"type": "text", "text": ""}),
+            _stream("content_block_delta", delta={**text_delta, "text": "Hel"}),
+            _stream("content_block_delta", delta={**text_delta, "text": "lo"}),
+            _stream("content_block_stop"),
+            _stream("content_block_start", 1, content_block=tool_block),
+            _stream("content_block_delta", 1, delta={**json_delta, "partial_json": '{"cmd": '}),
+            _stream("content_block_delta", 1, delta={**json_delta, "partial_json": '"ls"}'}),
+            _stream("content_block_stop", 1),
+            _StubAssistantMessage(
+                content=[
+                    _StubTextBlock("Hello"),
+                    _StubToolUseBlock(id="t1", name="bash", input={"cmd": "ls"}),
+                ]
+            ),
+            _StubResultMessage(
+                subtype="result",
+                duration_ms=1,
+                duration_api_ms=1,
+                is_error=False,
+                num_turns=1,
+                session_id="s",
+                usage=None,
+            ),
+        ]
+    )
+    adapter = ClaudeAdapter(sdk=sdk.bindings())
+    thread = await adapter.start_thread()
+
+    events = [event async for event in thread.run_streamed("hi", {"streamPartialMessages": True})]
+
+    assert [event["type"] for event in events] == ["progress", "message", "message", "tool_use", "done"]
+    assert [event["text"] for event in events if event["type"] == "message"] == ["Hel", "lo"]
+    assert all(event["delta"] for event in events if event["type"] == "message")
+    assert events[3]["args"] == {"cmd": "ls"} and events[3]["callId"] == "t1"
+
+
 @pytest.mark.asyncio
 async def test_stream_handles_cancellation() -> None:
     """Ensures streamed runs emit cancelled + error when aborted via signal."""
@@ -262,3 +366,193 @@ async def test_stream_handles_cancellation() -> None:
     events = await _consume()
     assert "cancelled" in events
     assert "error" in events
+
+
+class _EchoSdk(_StubSdk):
+    """Consumes streaming prompts and answers every user message with its own turn."""
+
+    def query(self, *, prompt: Any, options: _StubClaudeAgentOptions) -> AsyncIterator[Any]:
+        async def _generator() -> AsyncIterator[Any]:
+            async for message in prompt:
+                await asyncio.sleep(0)
+                yield _StubAssistantMessage(content=[_StubTextBlock(message["message"]["content"])])
+                yield _StubResultMessage(
+                    subtype="result",
+                    duration_ms=1,
+                    duration_api_ms=1,
+                    is_error=False,
+                    num_turns=1,
+                    session_id="steer",
+                )
+
+        _ = options
+        return _generator()
+
+
+@pytest.mark.asyncio
+async def test_send_steers_in_flight_run() -> None:
+    """Ensures send() feeds follow-up messages into a streaming-input run before it ends."""
+
+    adapter = ClaudeAdapter(sdk=_EchoSdk().bindings())
+    thread = await adapter.start_thread()
+
+    texts: list[str] = []
+    async for event in thread.run_streamed("first", {"streamingInput": True}):
+        if event["type"] == "message":
+            texts.append(event["text"])
+            if event["text"] == "first":
+                await thread.send("change of plan")
+
+    assert texts == ["first", "change of plan"]
+    with pytest.raises(RuntimeError):
+        await thread.send("too late")
+
+
+class _FoldingSdk(_StubSdk):
+    """Reads streaming input concurrently, like the CLI, and folds mid-turn messages into the turn."""
+
+    def query(self, *, prompt: Any, options: _StubClaudeAgentOptions) -> AsyncIterator[Any]:
+        async def _generator() -> AsyncIterator[Any]:
+            received: list[str] = []
+            input_closed = asyncio.Event()
+
+            async def _read_input() -> None:
+                async for message in prompt:
+                    received.append(message["message"]["content"])
+                input_closed.set()
+
+            reader = asyncio.ensure_future(_read_input())
+            try:
+                while not received:
+                    await asyncio.sleep(0)
+                yield _StubAssistantMessage(content=[_StubTextBlock(received[0])])
+                await asyncio.sleep(0.01)
+                yield _StubAssistantMessage(content=[_StubTextBlock(" + ".join(received[1:]))])
+                yield _StubResultMessage(
+                    subtype="result",
+                    duration_ms=1,
+                    duration_api_ms=1,
+                    is_error=False,
+                    num_turns=1,
+                    session_id="fold",
+                )
+                # The CLI only exits once its stdin reaches end of input.
+                await asyncio.wait_for(input_closed.wait(), timeout=1)
+            finally:
+                reader.cancel()
+
+        _ = options
+        return _generator()
+
+
+@pytest.mark.asyncio
+async def test_send_folded_into_the_running_turn_still_ends_the_run() -> None:
+    """Ensures the input ends when two sends are answered by a single result."""
+
+    adapter = ClaudeAdapter(sdk=_FoldingSdk().bindings())
+    thread = await adapter.start_thread()
+
+    events = []
+    async for event in thread.run_streamed("first", {"streamingInput": True}):
+        events.append(event)
+        if event["type"] == "message" and event["text"] == "first":
+            await thread.send("a")
+            await thread.send("b")
+
+    assert [event["text"] for event in events if event["type"] == "message"] == ["first", "a + b"]
+    assert events[-1]["type"] == "done"
+
+
+def _result(session_id: str, subtype: str = "result") -> _StubResultMessage:
+    return _StubResultMessage(
+        subtype=subtype,
+        duration_ms=1,
+        duration_api_ms=1,
+        is_error=False,
+        num_turns=1,
+        session_id=session_id,
+    )
+
+
+class _StubClient:
+    """ClaudeSDKClient double that answers one query and ends the turn when interrupted."""
+
+    instances: list["_StubClient"] = []
+
+    def __init__(self, *, options: Any) -> None:
+        self.options = options
+        self.calls: list[str] = []
+        self._interrupted = asyncio.Event()
+        _StubClient.instances.append(self)
+
+    async def connect(self, prompt: Any = None) -> None:
+        self.calls.append("connect")
+
+    async def query(self, prompt: str) -> None:
+        self.calls.append(f"query:{prompt}")
+
+    async def receive_response(self) -> AsyncIterator[Any]:
+        yield _StubAssistantMessage(content=[_StubTextBlock("working")])
+        await self._interrupted.wait()
+        yield _result("client", subtype="error_during_execution")
+
+    async def receive_messages(self) -> AsyncIterator[Any]:  # pragma: no cover - streaming input only
+        yield _result("client")
+
+    async def interrupt(self) -> None:
+        self.calls.append("interrupt")
+        self._interrupted.set()
+
+    async def disconnect(self) -> None:
+        self.calls.append("disconnect")
+
+
+class _LegacyClient:
+    """Client from an SDK version without ``interrupt()``; the adapter must not use it."""
+
+    def __init__(self, *, options: Any) -> None:  # pragma: no cover - never instantiated
+        raise AssertionError("clients without interrupt() must not be used")
+
+    async def connect(self, prompt: Any = None) -> None:  # pragma: no cover
+        return None
+
+
+@pytest.mark.asyncio
+async def test_abort_interrupts_the_sdk_client() -> None:
+    """Ensures runs go through ClaudeSDKClient and an abort uses its interrupt() control."""
+
+    _StubClient.instances.clear()
+    bindings = _StubSdk().bindings()
+    bindings.ClaudeSDKClient = _StubClient
+    adapter = ClaudeAdapter(sdk=bindings)
+    controller = AbortController()
+    thread = await adapter.start_thread()
+
+    events: list[dict[str, Any]] = []
+    async for event in thread.run_streamed("hi", {"signal": controller.signal}):
+        events.append(event)
+        if event["type"] == "message":
+            controller.abort("stop")
+
+    assert [event["type"] for event in events] == ["message", "cancelled", "error"]
+    assert events[1]["abortLatencyMs"] >= 0
+    (client,) = _StubClient.instances
+    assert client.calls[0] == "connect" and client.calls[1].startswith("query:hi")
+    assert client.calls[2:] == ["interrupt", "disconnect"]
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_query_without_a_usable_client() -> None:
+    """Ensures SDKs whose client lacks interrupt() run on plain query() without a transport."""
+
+    sdk = _StubSdk()
+    sdk.queue([_StubAssistantMessage(content=[_StubTextBlock("Hi")]), _result("legacy")])
+    bindings = sdk.bindings()
+    bindings.ClaudeSDKClient = _LegacyClient
+    adapter = ClaudeAdapter(sdk=bindings)
+    thread = await adapter.start_thread()
+
+    result = await thread.run("hi")
+
+    assert result.text == "Hi"
+    assert thread.id == "legacy"
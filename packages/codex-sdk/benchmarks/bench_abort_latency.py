@@ -0,0 +1,80 @@
+"""Measures abort-to-exit latency for Codex runs aborted on the loop and from worker threads.
+
+Run with ``python packages/codex-sdk/benchmarks/bench_abort_latency.py``. Each run spawns a real
+Python child that prints ``thread.started`` and then sleeps; once that event arrives the run is
+aborted either directly on the event loop or by ``AbortController.abort()`` on a separate thread.
+The script reports the median and p95 time from the abort call until the stream has ended and
+the child has exited.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Sequence
+
+ROOT = pathlib.Path(__file__).resolve().parents[3]
+for path in (ROOT / "packages" / "core" / "src", ROOT / "packages" / "codex-sdk" / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from headless_coder_sdk.codex_sdk import CodexAdapter  # noqa: E402
+from headless_coder_sdk.core import AbortController  # noqa: E402
+
+RUNS = 20
+CHILD = (
+    "import sys, time\n"
+    "sys.stdin.read()\n"
+    "print('{\"type\": \"thread.started\", \"thread_id\": \"bench\"}', flush=True)\n"
+    "time.sleep(60)\n"
+)
+
+
+async def _spawn_child(_binary: str, _args: Sequence[str], *_: Any, **__: Any) -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-c",
+        CHILD,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+
+async def _abort_once(adapter: CodexAdapter, from_thread: bool) -> float:
+    controller = AbortController()
+    thread = await adapter.start_thread()
+    started = 0.0
+    async for event in thread.run_streamed("bench", {"signal": controller.signal}):
+        if event["type"] != "init":
+            continue
+        started = time.perf_counter()
+        if from_thread:
+            worker = threading.Thread(target=controller.abort, args=("bench",))
+            worker.start()
+            worker.join()
+        else:
+            controller.abort("bench")
+    return time.perf_counter() - started
+
+
+async def _measure(from_thread: bool) -> list[float]:
+    adapter = CodexAdapter(process_runner=_spawn_child)
+    return [await asyncio.wait_for(_abort_once(adapter, from_thread), 10) for _ in range(RUNS)]
+
+
+def main() -> None:
+    print(f"{'abort from':>12} {'runs':>5} {'median ms':>10} {'p95 ms':>8}")
+    for from_thread in (False, True):
+        samples = sorted(asyncio.run(_measure(from_thread)))
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        origin = "worker" if from_thread else "loop"
+        print(f"{origin:>12} {len(samples):>5} {statistics.median(samples) * 1000:>10.2f} {p95 * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmarks per-event streaming against batched streaming on a high-volume Codex run.
+
+Run with ``python packages/codex-sdk/benchmarks/bench_stream_batches.py``. A stub process serves
+100k JSONL events in 64 KiB chunks; the script reports wall time and events per second for
+``run_streamed`` (one async hop per event) and ``run_streamed_batches`` (one hop per read).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import pathlib
+import sys
+import time
+from typing import Any
+
+ROOT = pathlib.Path(__file__).resolve().parents[3]
+for path in (ROOT / "packages" / "core" / "src", ROOT / "packages" / "codex-sdk" / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from headless_coder_sdk.codex_sdk import CodexAdapter  # noqa: E402
+
+EVENT_COUNT = 100_000
+CHUNK_SIZE = 64 * 1024
+
+
+def build_payload(count: int) -> bytes:
+    """Builds a JSONL transcript with ``count`` progress items between init and completion."""
+
+    lines = [{"type": "thread.started", "thread_id": "bench"}]
+    lines.extend(
+        {"type": "item.updated", "item": {"type": "reasoning", "text": f"step {index}"}}
+        for index in range(count)
+    )
+    lines.append({"type": "turn.completed", "usage": {"tokens": count}})
+    return b"".join(json.dumps(line).encode("utf-8") + b"\n" for line in lines)
+
+
+class _Stdin:
+    def write(self, _: bytes) -> None:
+        pass
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _Stream:
+    """Serves a fixed payload in chunks, like a pipe filled faster than it is drained."""
+
+    def __init__(self, payload: bytes) -> None:
+        self._payload = payload
+        self._offset = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        await asyncio.sleep(0)
+        size = CHUNK_SIZE if size < 0 else min(size, CHUNK_SIZE)
+        chunk = self._payload[self._offset : self._offset + size]
+        self._offset += len(chunk)
+        return chunk
+
+
+class _Process:
+    def __init__(self, payload: bytes) -> None:
+        self.stdin = _Stdin()
+        self.stdout = _Stream(payload)
+        self.stderr = _Stream(b"")
+        self.returncode = 0
+
+    async def wait(self) -> int:
+        return 0
+
+    def terminate(self) -> None:
+        pass
+
+    def kill(self) -> None:
+        pass
+
+
+async def _run(payload: bytes, batched: bool) -> tuple[int, float]:
+    async def runner(*_: Any, **__: Any) -> _Process:
+        return _Process(payload)
+
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+    count = 0
+    started = time.perf_counter()
+    if batched:
+        async for batch in thread.run_streamed_batches("bench"):
+            count += len(batch)
+    else:
+        async for _event in thread.run_streamed("bench"):
+            count += 1
+    return count, time.perf_counter() - started
+
+
+def main() -> None:
+    payload = build_payload(EVENT_COUNT)
+    print(f"{'mode':>10} {'events':>8} {'seconds':>8} {'events/s':>10}")
+    for batched in (False, True):
+        count, elapsed = asyncio.run(_run(payload, batched))
+        mode = "batches" if batched else "events"
+        print(f"{mode:>10} {count:>8} {elapsed:>8.3f} {count / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
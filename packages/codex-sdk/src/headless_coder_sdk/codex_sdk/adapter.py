@@ -7,21 +7,47 @@ import contextlib
 import json
 import logging
 import os
-import tempfile
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Sequence
 
 from headless_coder_sdk.core import (
+    CancellationError,
     CoderStreamEvent,
+    EventBatchIterator,
+    EventFilter,
     EventIterator,
+    EventPipeline,
+    EventStream,
     HeadlessCoder,
+    MiddlewareChain,
+    MiddlewareStack,
     PromptInput,
+    RawEvent,
+    RawEventIterator,
+    RunMiddleware,
     RunOpts,
+    RunProgress,
+    RunReport,
     RunResult,
+    RunSnapshot,
+    RunTimeoutError,
+    RunTracker,
+    RunWatchdog,
+    SpawnRequest,
     StartOpts,
     ThreadHandle,
+    TurnQueue,
+    check_output_schema,
+    coalesce_run_batches,
+    coalesce_run_events,
+    extract_event_type,
+    extract_json_payload,
+    get_schema_registry,
+    iterate_batches,
     link_signal,
     now,
+    read_line_batches,
+    validate_run_output,
 )
 
 LOGGER = logging.getLogger(__name__)
@@ -30,6 +56,19 @@ SOFT_KILL_DELAY = 0.25
 HARD_KILL_DELAY = 1.5
 STDERR_BUFFER_LIMIT = 64 * 1024
 
+# Normalised event types each raw Codex event type can produce, used to skip filtered-out lines
+# before JSON parsing them. Unknown types fall back to progress (or permission) events.
+_CODEX_EVENT_TYPES: dict[str, frozenset[str]] = {
+    "thread.started": frozenset({"init"}),
+    "turn.completed": frozenset({"usage", "done"}),
+    "turn.failed": frozenset({"error"}),
+    "item.delta": frozenset({"message", "progress"}),
+    "item.completed": frozenset({"message", "progress"}),
+    "tool_use": frozenset({"tool_use"}),
+    "tool_result": frozenset({"tool_result"}),
+}
+_CODEX_DEFAULT_EVENT_TYPES = frozenset({"progress", "permission"})
+
 ProcessRunner = Callable[
     [str, Sequence[str], dict[str, str], Optional[str]],
     Awaitable[asyncio.subprocess.Process],
@@ -44,9 +83,10 @@ class CodexThreadState:
     codex_executable_path: Optional[str] = None
     id: Optional[str] = None
     current_run: Optional["ActiveRun"] = None
+    turn_queue: Optional[TurnQueue] = None
 
 
-@dataclass
+@dataclass(eq=False)
 class ActiveRun:
     """Tracks in-flight process metadata for cooperative cancellation."""
 
@@ -57,6 +97,25 @@ class ActiveRun:
     abort_reason: Optional[str] = None
     soft_kill_handle: Optional[asyncio.TimerHandle] = None
     hard_kill_handle: Optional[asyncio.TimerHandle] = None
+    watchdog: Optional[RunWatchdog] = None
+    timed_out: bool = False
+    handle: Optional["CodexThreadHandle"] = None
+    middleware: Optional[MiddlewareChain] = None
+    result: Optional[RunResult] = None
+    error: Optional[BaseException] = None
+    progress: RunProgress = field(default_factory=lambda: RunProgress(CODER_NAME))
+
+    def snapshot(self) -> RunSnapshot:
+        """Returns the live progress of this run."""
+
+        queue = self.handle.internal.turn_queue if self.handle is not None else None
+        return self.progress.snapshot(
+            thread_id=self.handle.id if self.handle is not None else None,
+            pid=getattr(self.process, "pid", None),
+            stderr_bytes=self.stderr.total,
+            queued_turns=queue.depth if queue is not None else 0,
+            aborted=self.aborted,
+        )
 
 
 class CodexThreadHandle(ThreadHandle):
@@ -72,13 +131,35 @@ class CodexThreadHandle(ThreadHandle):
     async def run(self, input: PromptInput, opts: Optional[RunOpts] = None) -> RunResult:
         """Executes a blocking Codex run."""
 
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return await queue.run(lambda: self._adapter._run_internal(self, input, opts), opts)
         return await self._adapter._run_internal(self, input, opts)
 
     def run_streamed(self, input: PromptInput, opts: Optional[RunOpts] = None) -> EventIterator:
         """Streams Codex events as they are emitted by the CLI."""
 
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return queue.stream(lambda: self._adapter._run_streamed_internal(self, input, opts), opts)
         return self._adapter._run_streamed_internal(self, input, opts)
 
+    def run_streamed_batches(self, input: PromptInput, opts: Optional[RunOpts] = None) -> EventBatchIterator:
+        """Streams Codex events as lists, one per stdout read, amortising iteration overhead."""
+
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return queue.stream(lambda: self._adapter._run_streamed_batches_internal(self, input, opts), opts)
+        return self._adapter._run_streamed_batches_internal(self, input, opts)
+
+    def run_raw(self, input: PromptInput, opts: Optional[RunOpts] = None) -> RawEventIterator:
+        """Streams the CLI's JSONL lines untouched, tagged with their top-level ``type``."""
+
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return queue.stream(lambda: self._adapter._run_raw_internal(self, input, opts), opts)
+        return self._adapter._run_raw_internal(self, input, opts)
+
     async def interrupt(self, reason: Optional[str] = None) -> None:
         """Attempts to abort the current process when supported."""
 
@@ -97,10 +178,13 @@ class CodexAdapter(HeadlessCoder):
         self,
         default_opts: Optional[StartOpts] = None,
         process_runner: Optional[ProcessRunner] = None,
+        middleware: Optional[Sequence[RunMiddleware]] = None,
     ) -> None:
-        """Creates a Codex adapter with optional defaults and runner injection."""
+        """Creates a Codex adapter with optional defaults, runner injection and middleware."""
         self._default_opts = default_opts or {}
         self._process_runner = process_runner or _spawn_process
+        self._runs = RunTracker()
+        self._middleware = MiddlewareStack(middleware)
 
     async def start_thread(self, opts: Optional[StartOpts] = None) -> ThreadHandle:
         """Creates a new logical Codex thread."""
@@ -109,6 +193,7 @@ class CodexAdapter(HeadlessCoder):
         state = CodexThreadState(
             options=self._extract_thread_options(merged),
             codex_executable_path=merged.get("codexExecutablePath"),
+            turn_queue=TurnQueue.from_start_opts(merged),
         )
         return CodexThreadHandle(self, state)
 
@@ -120,6 +205,7 @@ class CodexAdapter(HeadlessCoder):
             options=self._extract_thread_options(merged),
             codex_executable_path=merged.get("codexExecutablePath"),
             id=thread_id,
+            turn_queue=TurnQueue.from_start_opts(merged),
         )
         return CodexThreadHandle(self, state)
 
@@ -133,6 +219,31 @@ class CodexAdapter(HeadlessCoder):
 
         await thread.close()
 
+    def use(self, middleware: RunMiddleware) -> None:
+        """Adds ``middleware`` to this adapter's runs, after the globally registered middleware."""
+
+        self._middleware.use(middleware)
+
+    def active_runs(self) -> list[ThreadHandle]:
+        """Returns the handles of this adapter whose runs are in flight."""
+
+        return self._runs.active_runs()
+
+    def run_snapshots(self) -> list[RunSnapshot]:
+        """Returns what each in-flight run of this adapter is doing right now, oldest first."""
+
+        return self._runs.snapshots()
+
+    async def interrupt_all(self, reason: Optional[str] = None) -> int:
+        """Interrupts every in-flight run and returns how many were signalled."""
+
+        return await self._runs.interrupt_all(reason)
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Stops accepting runs, waits up to ``timeout`` seconds, then aborts the stragglers."""
+
+        return await self._runs.drain(timeout)
+
     async def _run_internal(
         self,
         thread: CodexThreadHandle,
@@ -144,33 +255,42 @@ class CodexAdapter(HeadlessCoder):
         state = thread.internal
         self._assert_idle(state)
         prompt = _normalize_prompt(input)
-        async with _schema_file(run_opts) as schema_path:
-            process, active = await self._spawn_process(state, prompt, schema_path, run_opts)
-            stderr_closed = False
-            try:
-                summary = await _consume_codex_events(
-                    _iterate_process_lines(process),
-                    run_opts,
-                )
-                exit_code = await process.wait()
-                if summary.thread_id:
-                    state.id = summary.thread_id
-                    thread.id = summary.thread_id
-                if not active.aborted and exit_code not in (0, None):
-                    await active.stderr.close()
-                    stderr_closed = True
-                    raise RuntimeError(_format_process_error(exit_code, active.stderr.read()))
-                return RunResult(
-                    thread_id=state.id,
-                    text=summary.final_response or None,
-                    json=summary.structured_output,
-                    usage=summary.usage,
-                    raw=summary.raw,
-                )
-            finally:
-                if not stderr_closed:
-                    await active.stderr.close()
-                await self._cleanup_run(state, active)
+        check_output_schema(run_opts)
+        schema_path = await _schema_path(run_opts)
+        process, active = await self._spawn_process(thread, prompt, schema_path, run_opts)
+        stderr_closed = False
+        try:
+            summary = await _consume_codex_events(
+                _iterate_process_lines(process, active.progress),
+                run_opts,
+            )
+            exit_code = await process.wait()
+            if active.timed_out:
+                raise RunTimeoutError(active.abort_reason)
+            if summary.thread_id:
+                state.id = summary.thread_id
+                thread.id = summary.thread_id
+            if not active.aborted and exit_code not in (0, None):
+                await active.stderr.close()
+                stderr_closed = True
+                raise RuntimeError(_format_process_error(exit_code, active.stderr.read()))
+            active.result = RunResult(
+                thread_id=state.id,
+                text=summary.final_response or None,
+                json=summary.structured_output,
+                usage=summary.usage,
+                raw=summary.raw,
+                validation_errors=validate_run_output(run_opts, summary.structured_output),
+            )
+            return active.result
+        except BaseException as exc:
+            active.error = exc
+            raise
+        finally:
+            await _terminate_process(process)
+            if not stderr_closed:
+                await active.stderr.close()
+            await self._cleanup_run(state, active)
 
     def _run_streamed_internal(
         self,
@@ -180,67 +300,175 @@ class CodexAdapter(HeadlessCoder):
     ) -> EventIterator:
         """Streams Codex CLI events mapped into the shared schema."""
 
+        batches = self._stream_batches(thread, input, run_opts)
+        return EventStream(coalesce_run_events(iterate_batches(batches), run_opts, task_bound=False))
+
+    def _run_streamed_batches_internal(
+        self,
+        thread: CodexThreadHandle,
+        input: PromptInput,
+        run_opts: Optional[RunOpts],
+    ) -> EventBatchIterator:
+        """Streams Codex CLI events as one list per stdout read."""
+
+        batches = self._stream_batches(thread, input, run_opts)
+        return EventStream(coalesce_run_batches(batches, run_opts))
+
+    def _stream_batches(
+        self,
+        thread: CodexThreadHandle,
+        input: PromptInput,
+        run_opts: Optional[RunOpts],
+    ) -> EventBatchIterator:
+        """Runs Codex and yields the normalised events decoded from each stdout read."""
+
         state = thread.internal
         self._assert_idle(state)
         prompt = _normalize_prompt(input)
 
-        async def _iterator() -> AsyncIterator[CoderStreamEvent]:
-            async with _schema_file(run_opts) as schema_path:
-                process, active = await self._spawn_process(state, prompt, schema_path, run_opts)
-                saw_done = False
-                stderr_closed = False
-                try:
-                    async for raw_event in _iterate_process_lines(process):
-                        for event in _normalize_codex_event(raw_event):
+        async def _iterator() -> EventBatchIterator:
+            check_output_schema(run_opts)
+            schema_path = await _schema_path(run_opts)
+            process, active = await self._spawn_process(thread, prompt, schema_path, run_opts)
+            saw_done = False
+            stderr_closed = False
+            try:
+                pipeline = EventPipeline.from_run_opts(CODER_NAME, run_opts, active.middleware)
+                event_filter = pipeline.event_filter if pipeline is not None else None
+                async for raw_events in _iterate_process_batches(process, event_filter, active.progress):
+                    batch: list[CoderStreamEvent] = []
+                    for raw_event in raw_events:
+                        for event in _normalize_codex_event(raw_event, event_filter):
                             if event["type"] == "init" and event.get("threadId"):
                                 state.id = event["threadId"]
                                 thread.id = state.id
                             if event["type"] == "done":
                                 saw_done = True
-                            yield event
-                    exit_code = await process.wait()
-                    if active.aborted:
-                        await active.stderr.close()
-                        stderr_closed = True
-                        reason = active.abort_reason or "Interrupted"
-                        yield _create_cancelled_event(reason)
-                        yield _create_interrupted_error_event(reason)
-                        return
-                    if exit_code not in (0, None):
-                        await active.stderr.close()
-                        stderr_closed = True
-                        message = _format_process_error(exit_code, active.stderr.read())
-                        yield _create_worker_exit_error_event(message)
-                        return
-                    if not saw_done:
-                        yield {
+                            if pipeline is None:
+                                batch.append(event)
+                            else:
+                                batch.extend(pipeline.feed(event))
+                    if batch:
+                        yield batch
+                exit_code = await process.wait()
+                tail: list[CoderStreamEvent] = []
+                if active.aborted:
+                    await active.stderr.close()
+                    stderr_closed = True
+                    reason = active.abort_reason or "Interrupted"
+                    code = "timeout" if active.timed_out else "interrupted"
+                    tail = [_create_cancelled_event(reason), _create_interrupted_error_event(reason, code)]
+                elif exit_code not in (0, None):
+                    await active.stderr.close()
+                    stderr_closed = True
+                    message = _format_process_error(exit_code, active.stderr.read())
+                    tail = [_create_worker_exit_error_event(message)]
+                elif not saw_done:
+                    tail = [
+                        {
                             "type": "done",
                             "provider": CODER_NAME,
                             "ts": now(),
                             "originalItem": {"reason": "completed"},
                         }
-                finally:
-                    if not stderr_closed:
-                        await active.stderr.close()
-                    await self._cleanup_run(state, active)
+                    ]
+                if pipeline is not None:
+                    tail = pipeline.feed_all(tail)
+                if tail:
+                    yield tail
+            except BaseException as exc:
+                active.error = exc
+                raise
+            finally:
+                await _terminate_process(process)
+                if not stderr_closed:
+                    await active.stderr.close()
+                await self._cleanup_run(state, active)
 
         return _iterator()
 
+    def _run_raw_internal(
+        self,
+        thread: CodexThreadHandle,
+        input: PromptInput,
+        run_opts: Optional[RunOpts],
+    ) -> RawEventIterator:
+        """Streams raw Codex JSONL lines without decoding or normalising them.
+
+        Only ``thread.started`` lines are parsed, to capture the thread id. Streaming options that
+        act on normalised events (filters, coalescing, structured deltas) do not apply. A non-zero
+        exit raises ``RuntimeError`` and an aborted run raises ``CancellationError`` once stdout
+        is drained.
+        """
+
+        state = thread.internal
+        self._assert_idle(state)
+        prompt = _normalize_prompt(input)
+
+        async def _iterator() -> RawEventIterator:
+            schema_path = await _schema_path(run_opts)
+            process, active = await self._spawn_process(thread, prompt, schema_path, run_opts)
+            stderr_closed = False
+            progress = active.progress
+            try:
+                if not process.stdout:
+                    raise RuntimeError("Codex process lacks stdout")
+                async for lines in read_line_batches(process.stdout):
+                    progress.read_lines(lines)
+                    for line in lines:
+                        if not line or line.isspace():
+                            continue
+                        event_type = extract_event_type(line)
+                        progress.observe(event_type)
+                        if event_type == "thread.started":
+                            thread_id = _raw_thread_id(line)
+                            if thread_id:
+                                state.id = thread_id
+                                thread.id = thread_id
+                        yield RawEvent(CODER_NAME, event_type, line)
+                exit_code = await process.wait()
+                if active.timed_out:
+                    raise RunTimeoutError(active.abort_reason)
+                if active.aborted:
+                    raise CancellationError(active.abort_reason or "Interrupted")
+                if exit_code not in (0, None):
+                    await active.stderr.close()
+                    stderr_closed = True
+                    raise RuntimeError(_format_process_error(exit_code, active.stderr.read()))
+            except BaseException as exc:
+                active.error = exc
+                raise
+            finally:
+                await _terminate_process(process)
+                if not stderr_closed:
+                    await active.stderr.close()
+                await self._cleanup_run(state, active)
+
+        return EventStream(_iterator())
+
     async def _spawn_process(
         self,
-        state: CodexThreadState,
+        thread: CodexThreadHandle,
         prompt: str,
         schema_path: Optional[str],
         run_opts: Optional[RunOpts],
     ) -> tuple[asyncio.subprocess.Process, ActiveRun]:
         """Spawns the Codex CLI process and wires cancellation handlers."""
 
+        self._runs.check_accepting()
+        state = thread.internal
         binary = state.codex_executable_path or "codex"
         args = _build_codex_args(state, schema_path)
         env = os.environ.copy()
         if run_opts and run_opts.get("extraEnv"):
             env.update(run_opts["extraEnv"])
+        middleware = self._middleware.chain()
+        if middleware is not None:
+            request = middleware.prepare_spawn(SpawnRequest(CODER_NAME, binary, args, env, run_opts=run_opts))
+            binary, args, env = request.binary or binary, request.args, request.env
         process = await self._process_runner(binary, args, env, None)
+        if middleware is not None:
+            process.stdout = middleware.tap_stdout(process.stdout)
         if not process.stdin:
             raise RuntimeError("Codex process lacks stdin support")
         process.stdin.write(prompt.encode("utf-8"))
@@ -248,9 +476,18 @@ class CodexAdapter(HeadlessCoder):
         process.stdin.close()
         signal = run_opts.get("signal") if run_opts else None
         stderr = StderrCollector(process.stderr)
-        unsubscribe = link_signal(signal, lambda reason: self._schedule_abort(state, reason))
-        active = ActiveRun(process=process, unsubscribe=unsubscribe, stderr=stderr)
+        # Bind the listener to this loop so aborts fired from worker threads are not dropped.
+        loop = asyncio.get_running_loop()
+        unsubscribe = link_signal(signal, lambda reason: self._schedule_abort(state, reason), loop)
+        active = ActiveRun(
+            process=process, unsubscribe=unsubscribe, stderr=stderr, handle=thread, middleware=middleware
+        )
+        active.watchdog = RunWatchdog.from_run_opts(
+            run_opts, lambda reason: self._expire_run(state, active, reason)
+        )
+        active.progress.watchdog = active.watchdog
         state.current_run = active
+        self._runs.add(active)
         return process, active
 
     async def _cleanup_run(self, state: CodexThreadState, active: ActiveRun) -> None:
@@ -258,8 +495,13 @@ class CodexAdapter(HeadlessCoder):
 
         active.unsubscribe()
         self._cancel_kill_timers(active)
+        if active.watchdog is not None:
+            active.watchdog.cancel()
         if state.current_run is active:
             state.current_run = None
+        self._runs.discard(active)
+        if active.middleware is not None and active.middleware.after_run is not None:
+            active.middleware.after_run(RunReport.capture(active.snapshot(), active.result, active.error))
 
     def _schedule_abort(self, state: CodexThreadState, reason: Optional[str]) -> None:
         """Schedules an asynchronous abort when a cancellation signal fires."""
@@ -268,6 +510,14 @@ class CodexAdapter(HeadlessCoder):
         if loop:
             loop.create_task(self._abort_active_run(state, reason or "Interrupted"))
 
+    def _expire_run(self, state: CodexThreadState, active: ActiveRun, reason: str) -> None:
+        """Aborts ``active`` through the regular kill path once its watchdog fires."""
+
+        if state.current_run is not active or active.aborted:
+            return
+        active.timed_out = True
+        self._schedule_abort(state, reason)
+
     async def _abort_active_run(self, state: CodexThreadState, reason: Optional[str]) -> None:
         """Terminates the running CLI process."""
 
@@ -302,7 +552,10 @@ class CodexAdapter(HeadlessCoder):
         """Ensures only one Codex run executes per thread handle."""
 
         if state.current_run is not None:
-            raise RuntimeError("Codex adapter only supports one in-flight run per thread.")
+            raise RuntimeError(
+                "Codex adapter only supports one in-flight run per thread; "
+                "start it with queueTurns to queue runs."
+            )
 
     def _merge_start_opts(self, overrides: Optional[StartOpts]) -> StartOpts:
         """Merges adapter defaults with per-call start options."""
@@ -360,6 +613,7 @@ class StderrCollector:
         self._stream = stream
         self._limit = limit
         self._buffer = bytearray()
+        self.total = 0
         self._task: Optional[asyncio.Task[None]] = None
         if stream is not None:
             self._task = asyncio.create_task(self._drain(stream))
@@ -369,6 +623,7 @@ class StderrCollector:
             chunk = await stream.read(1024)
             if not chunk:
                 break
+            self.total += len(chunk)
             if len(self._buffer) >= self._limit:
                 continue
             slice_ = chunk[: self._limit - len(self._buffer)]
@@ -388,19 +643,12 @@ class StderrCollector:
         return self._buffer.decode("utf-8", errors="ignore").strip()
 
 
-@contextlib.asynccontextmanager
-async def _schema_file(run_opts: Optional[RunOpts]) -> AsyncIterator[Optional[str]]:
-    """Materialises the JSON schema into a temporary file when requested."""
+async def _schema_path(run_opts: Optional[RunOpts]) -> Optional[str]:
+    """Returns the content-addressed schema file when structured output is requested."""
 
     if not run_opts or not run_opts.get("outputSchema"):
-        yield None
-        return
-    payload = json.dumps(run_opts["outputSchema"], indent=2)
-    with tempfile.TemporaryDirectory() as tmpdir:
-        path = os.path.join(tmpdir, "schema.json")
-        with open(path, "w", encoding="utf-8") as handle:
-            handle.write(payload)
-        yield path
+        return None
+    return await get_schema_registry().schema_path(run_opts["outputSchema"])
 
 
 def _build_codex_args(state: CodexThreadState, schema_path: Optional[str]) -> list[str]:
@@ -423,25 +671,68 @@ def _build_codex_args(state: CodexThreadState, schema_path: Optional[str]) -> li
     return args
 
 
-async def _iterate_process_lines(process: asyncio.subprocess.Process) -> AsyncIterator[dict[str, Any]]:
-    """Yields parsed JSON lines from the Codex CLI."""
+async def _iterate_process_batches(
+    process: asyncio.subprocess.Process,
+    event_filter: Optional[EventFilter] = None,
+    progress: Optional[RunProgress] = None,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Yields the JSON events parsed from each stdout read, skipping lines the filter rules out.
+
+    Each read and parsed event is reported to ``progress``, which also feeds the run's watchdog.
+    """
 
     if not process.stdout:
         raise RuntimeError("Codex process lacks stdout")
 
-    reader = process.stdout
-    while True:
-        line = await reader.readline()
-        if not line:
-            break
-        decoded = line.decode("utf-8", errors="ignore").strip()
-        if not decoded:
-            continue
-        try:
-            yield json.loads(decoded)
-        except json.JSONDecodeError:
-            LOGGER.debug("Skipping malformed Codex line", extra={"line": decoded})
-            continue
+    async for lines in read_line_batches(process.stdout):
+        if progress is not None:
+            progress.read_lines(lines)
+        events: list[dict[str, Any]] = []
+        for line in lines:
+            if event_filter is not None and not event_filter.screen(
+                line, _CODEX_EVENT_TYPES, _CODEX_DEFAULT_EVENT_TYPES
+            ):
+                # Screened-out lines still drive the watchdog, so filtered tool calls keep their budget.
+                if progress is not None:
+                    progress.observe(extract_event_type(line))
+                continue
+            decoded = line.decode("utf-8", errors="ignore").strip()
+            if not decoded:
+                continue
+            try:
+                event = json.loads(decoded)
+            except json.JSONDecodeError:
+                LOGGER.debug("Skipping malformed Codex line", extra={"line": decoded})
+                continue
+            if progress is not None:
+                event_type = event.get("type")
+                tool = (event.get("item") or {}).get("name") if event_type == "tool_use" else None
+                progress.observe(event_type, tool)
+            events.append(event)
+        if events:
+            yield events
+
+
+def _raw_thread_id(line: bytes) -> Optional[str]:
+    """Returns the ``thread_id`` carried by a raw ``thread.started`` line."""
+
+    try:
+        event = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    thread_id = event.get("thread_id") if isinstance(event, dict) else None
+    return thread_id if isinstance(thread_id, str) else None
+
+
+async def _iterate_process_lines(
+    process: asyncio.subprocess.Process,
+    progress: Optional[RunProgress] = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Yields parsed JSON lines from the Codex CLI."""
+
+    async for events in _iterate_process_batches(process, progress=progress):
+        for event in events:
+            yield event
 
 
 @dataclass
@@ -487,7 +778,7 @@ async def _consume_codex_events(
             summary.raw = event
             continue
     if run_opts and run_opts.get("outputSchema") and structured is None:
-        structured = _extract_json_payload(summary.final_response)
+        structured = extract_json_payload(summary.final_response, run_opts["outputSchema"])
     summary.structured_output = structured
     return summary
 
@@ -538,8 +829,11 @@ def _normalize_prompt(input: PromptInput) -> str:
     return "\n".join(parts)
 
 
-def _normalize_codex_event(event: dict[str, Any]) -> list[CoderStreamEvent]:
-    """Maps raw Codex events into the shared stream schema."""
+def _normalize_codex_event(
+    event: dict[str, Any],
+    event_filter: Optional[EventFilter] = None,
+) -> list[CoderStreamEvent]:
+    """Maps raw Codex events into the shared stream schema, skipping types the filter rules out."""
 
     ev_type = str(event.get("type") or "codex.event")
     provider_event = ev_type.lower()
@@ -579,6 +873,8 @@ def _normalize_codex_event(event: dict[str, Any]) -> list[CoderStreamEvent]:
         ]
     if ev_type == "item.delta":
         item = event.get("item") or {}
+        if event_filter is not None and not event_filter.needs(_item_event_type(item)):
+            return []
         if item.get("type") == "agent_message":
             return [
                 {
@@ -603,6 +899,8 @@ def _normalize_codex_event(event: dict[str, Any]) -> list[CoderStreamEvent]:
         ]
     if ev_type == "item.completed":
         item = event.get("item") or {}
+        if event_filter is not None and not event_filter.needs(_item_event_type(item)):
+            return []
         if item.get("type") == "agent_message":
             return [
                 {
@@ -662,6 +960,8 @@ def _normalize_codex_event(event: dict[str, Any]) -> list[CoderStreamEvent]:
                 "originalItem": event,
             }
         ]
+    if event_filter is not None and not event_filter.needs("progress"):
+        return []
     return [
         {
             "type": "progress",
@@ -673,20 +973,10 @@ def _normalize_codex_event(event: dict[str, Any]) -> list[CoderStreamEvent]:
     ]
 
 
-def _extract_json_payload(text: Optional[str]) -> Any:
-    """Attempts to parse JSON embedded inside assistant responses."""
+def _item_event_type(item: dict[str, Any]) -> str:
+    """Returns the normalised event type produced by an ``item.*`` event."""
 
-    if not text:
-        return None
-    candidate = text.strip()
-    start = candidate.find("{")
-    end = candidate.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        return None
-    try:
-        return json.loads(candidate[start : end + 1])
-    except json.JSONDecodeError:
-        return None
+    return "message" if item.get("type") == "agent_message" else "progress"
 
 
 def _create_cancelled_event(reason: str) -> CoderStreamEvent:
@@ -700,13 +990,13 @@ def _create_cancelled_event(reason: str) -> CoderStreamEvent:
     }
 
 
-def _create_interrupted_error_event(reason: str) -> CoderStreamEvent:
-    """Builds the companion error event for cancellations."""
+def _create_interrupted_error_event(reason: str, code: str = "interrupted") -> CoderStreamEvent:
+    """Builds the companion error event for cancellations (``code`` is ``timeout`` for expiries)."""
 
     return {
         "type": "error",
         "provider": CODER_NAME,
-        "code": "interrupted",
+        "code": code,
         "message": reason,
         "ts": now(),
         "originalItem": {"reason": reason},
@@ -727,6 +1017,24 @@ def _safe_kill(process: asyncio.subprocess.Process) -> None:
         process.kill()
 
 
+async def _terminate_process(process: asyncio.subprocess.Process) -> None:
+    """Stops a CLI process that is still running once its run ends early.
+
+    Sends SIGTERM, escalates to SIGKILL after ``SOFT_KILL_DELAY`` and reaps the process, so a
+    consumer that stops iterating (or a run that raises) never leaves the CLI behind.
+    """
+
+    if process.returncode is not None:
+        return
+    _safe_terminate(process)
+    try:
+        await asyncio.wait_for(process.wait(), SOFT_KILL_DELAY)
+    except asyncio.TimeoutError:
+        _safe_kill(process)
+        with contextlib.suppress(Exception):
+            await process.wait()
+
+
 def _try_get_running_loop() -> Optional[asyncio.AbstractEventLoop]:
     """Returns the running loop when available."""
 
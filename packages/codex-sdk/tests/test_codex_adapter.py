@@ -6,6 +6,7 @@ import asyncio
 import json
 import pathlib
 import sys
+import threading
 from typing import Any
 
 import pytest
@@ -17,10 +18,30 @@ for path in (CORE_SRC, ADAPTER_SRC):
     if str(path) not in sys.path:
         sys.path.insert(0, str(path))
 
-from headless_coder_sdk.core import AbortController, RunResult  # noqa: E402
+from headless_coder_sdk.core import (  # noqa: E402
+    AbortController,
+    AdapterShutdownError,
+    InvalidSchemaError,
+    RunMiddleware,
+    RunReport,
+    RunResult,
+    RunTimeoutError,
+    SchemaRegistry,
+    SpawnRequest,
+    set_schema_registry,
+)
 from headless_coder_sdk.codex_sdk import CodexAdapter  # noqa: E402
 
 
+@pytest.fixture(autouse=True)
+def _schema_cache(tmp_path: pathlib.Path):
+    """Keeps schema files written by the adapter inside the test's temp directory."""
+
+    set_schema_registry(SchemaRegistry(cache_dir=str(tmp_path)))
+    yield
+    set_schema_registry(None)
+
+
 class _StubStdin:
     """Captures data written to stdin by the adapter."""
 
@@ -39,7 +60,7 @@ class _StubStdin:
 
 
 class _StubStdout:
-    """Provides readline() over a fixed set of JSON lines."""
+    """Provides readline() and read() over a fixed set of JSON lines (one line per read)."""
 
     def __init__(self, lines: list[dict[str, Any]]) -> None:
         self._lines = [json.dumps(line).encode("utf-8") + b"\n" for line in lines]
@@ -50,6 +71,9 @@ class _StubStdout:
             return b""
         return self._lines.pop(0)
 
+    async def read(self, _: int = -1) -> bytes:
+        return await self.readline()
+
 
 class _StubStderr:
     """Feeds stderr data to the collector."""
@@ -93,12 +117,14 @@ class _ProcessRunner:
 
     def __init__(self) -> None:
         self._queue: list[_StubProcess] = []
+        self.calls: list[list[str]] = []
 
     def enqueue(self, process: _StubProcess) -> None:
         self._queue.append(process)
 
-    async def __call__(self, *_: Any, **__: Any) -> _StubProcess:
+    async def __call__(self, _binary: str, args: list[str], *_: Any, **__: Any) -> _StubProcess:
         assert self._queue, "No stub processes queued"
+        self.calls.append(list(args))
         return self._queue.pop(0)
 
 
@@ -193,3 +219,469 @@ async def test_stream_handles_cancellation() -> None:
     events = await _consume()
     assert "cancelled" in events
     assert "error" in events
+
+
+@pytest.mark.asyncio
+async def test_schema_file_is_reused_across_runs(tmp_path: pathlib.Path) -> None:
+    """Ensures structured runs share one content-addressed schema file."""
+
+    runner = _ProcessRunner()
+    for _ in range(2):
+        runner.enqueue(
+            _StubProcess(lines=[{"type": "item.completed", "item": {"type": "agent_message", "text": "{}"}}])
+        )
+    adapter = CodexAdapter(process_runner=runner)
+    schema = {"type": "object"}
+
+    for _ in range(2):
+        thread = await adapter.start_thread()
+        await thread.run("Summarise", {"outputSchema": schema})
+
+    paths = [args[args.index("--output-schema") + 1] for args in runner.calls]
+    assert paths[0] == paths[1]
+    assert pathlib.Path(paths[0]).parent == tmp_path / "schemas"
+    assert json.loads(pathlib.Path(paths[0]).read_text(encoding="utf-8")) == schema
+
+
+@pytest.mark.asyncio
+async def test_run_attaches_validation_errors() -> None:
+    """Ensures structured output is validated against the schema when requested."""
+
+    runner = _ProcessRunner()
+    runner.enqueue(
+        _StubProcess(
+            lines=[
+                {"type": "item.completed", "item": {"type": "agent_message", "text": '{"summary": 3}'}},
+                {"type": "turn.completed", "usage": {}},
+            ]
+        )
+    )
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+    schema = {"type": "object", "properties": {"summary": {"type": "string"}}, "required": ["summary"]}
+
+    result = await thread.run("Summarise", {"outputSchema": schema, "validateOutput": True})
+
+    assert result.json == {"summary": 3}
+    assert result.validation_errors and result.validation_errors[0].startswith("$.summary")
+
+
+@pytest.mark.asyncio
+async def test_stream_honours_event_filter() -> None:
+    """Ensures filtered streams only deliver requested types and still track the thread id."""
+
+    runner = _ProcessRunner()
+    runner.enqueue(
+        _StubProcess(
+            lines=[
+                {"type": "thread.started", "thread_id": "filtered"},
+                {"type": "item.completed", "item": {"type": "command_execution", "command": "ls"}},
+                {"type": "item.delta", "item": {"type": "reasoning"}, "delta": "thinking"},
+                {"type": "item.completed", "item": {"type": "agent_message", "text": "hello"}},
+                {"type": "turn.completed", "usage": {"tokens": 4}},
+            ]
+        )
+    )
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+
+    events = [
+        event
+        async for event in thread.run_streamed(
+            "hi", {"eventFilter": {"types": ["message", "done"], "originalItem": False}}
+        )
+    ]
+
+    assert [event["type"] for event in events] == ["message", "done"]
+    assert all("originalItem" not in event for event in events)
+    assert thread.id == "filtered"
+
+
+@pytest.mark.asyncio
+async def test_stream_coalesces_deltas_when_requested() -> None:
+    """Ensures runs of agent message deltas are merged into one event."""
+
+    runner = _ProcessRunner()
+    runner.enqueue(
+        _StubProcess(
+            lines=[
+                *[
+                    {"type": "item.delta", "item": {"type": "agent_message"}, "delta": chunk}
+                    for chunk in ("Hel", "lo ", "there")
+                ],
+                {"type": "item.completed", "item": {"type": "agent_message", "text": "Hello there"}},
+                {"type": "turn.completed", "usage": {}},
+            ]
+        )
+    )
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+
+    events = [event async for event in thread.run_streamed("hi", {"coalesce": {"maxLatencyMs": 1000}})]
+
+    deltas = [event for event in events if event["type"] == "message" and event.get("delta")]
+    assert [event["text"] for event in deltas] == ["Hello there"]
+    assert len(deltas[0]["originalItem"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_batches_group_events_per_read() -> None:
+    """Ensures batched streaming yields lists in the same order as per-event streaming."""
+
+    runner = _ProcessRunner()
+    runner.enqueue(
+        _StubProcess(
+            lines=[
+                {"type": "thread.started", "thread_id": "batched"},
+                {"type": "item.completed", "item": {"type": "agent_message", "text": "hello"}},
+                {"type": "turn.completed", "usage": {"tokens": 4}},
+            ]
+        )
+    )
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+
+    batches = [batch async for batch in thread.run_streamed_batches("hi")]
+
+    grouped = [[event["type"] for event in batch] for batch in batches]
+    assert grouped == [["init"], ["message"], ["usage", "done"]]
+    assert thread.id == "batched"
+
+
+@pytest.mark.asyncio
+async def test_run_raw_yields_lines_and_raises_on_failure() -> None:
+    """Ensures raw mode forwards JSONL bytes, captures the thread id, and surfaces exit codes."""
+
+    lines = [
+        {"type": "thread.started", "thread_id": "raw"},
+        {"type": "item.completed", "item": {"type": "agent_message", "text": "hello"}},
+    ]
+    runner = _ProcessRunner()
+    runner.enqueue(_StubProcess(lines=lines, returncode=2, stderr=b"boom"))
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+
+    seen = []
+    with pytest.raises(RuntimeError, match="boom"):
+        async for event in thread.run_raw("hi"):
+            seen.append(event)
+
+    assert [event.type for event in seen] == ["thread.started", "item.completed"]
+    assert [json.loads(event.data) for event in seen] == lines
+    assert thread.id == "raw"
+
+
+class _HangingProcess(_StubProcess):
+    """Process that keeps printing agent messages and only exits once terminated."""
+
+    def __init__(self) -> None:
+        super().__init__(lines=[])
+        self.returncode = None
+        self._exited = asyncio.Event()
+        message = {"type": "item.completed", "item": {"type": "agent_message", "text": "tick"}}
+        self.stdout = self
+        self.stderr = self
+        self._line = json.dumps(message).encode("utf-8") + b"\n"
+
+    async def read(self, _: int = -1) -> bytes:
+        if self._exited.is_set():
+            return b""
+        await asyncio.sleep(0)
+        return self._line
+
+    async def wait(self) -> int:
+        await self._exited.wait()
+        return self.returncode
+
+    def terminate(self) -> None:
+        self._terminated = True
+        self.returncode = -15
+        self._exited.set()
+
+
+@pytest.mark.asyncio
+async def test_breaking_out_of_stream_terminates_process() -> None:
+    """Ensures leaving ``async with`` early stops the CLI and frees the thread for the next run."""
+
+    runner = _ProcessRunner()
+    hanging = _HangingProcess()
+    runner.enqueue(hanging)
+    runner.enqueue(_StubProcess(lines=[{"type": "turn.completed", "usage": {}}]))
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+
+    async with thread.run_streamed("hi") as events:
+        async for event in events:
+            if event["type"] == "message":
+                break
+
+    assert hanging._terminated
+    assert hanging.returncode is not None
+    result = await thread.run("again")
+    assert isinstance(result, RunResult)
+
+
+@pytest.mark.asyncio
+async def test_queued_thread_serialises_concurrent_runs() -> None:
+    """Ensures queueTurns runs overlapping calls one after another instead of rejecting them."""
+
+    runner = _ProcessRunner()
+    for text in ("first", "second"):
+        runner.enqueue(
+            _StubProcess(lines=[{"type": "item.completed", "item": {"type": "agent_message", "text": text}}])
+        )
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread({"queueTurns": {"maxPending": 4}})
+
+    results = await asyncio.gather(thread.run("one"), thread.run("two"))
+
+    assert [result.text for result in results] == ["first", "second"]
+    stats = thread.internal.turn_queue.stats()
+    assert (stats.turns, stats.max_depth, stats.busy) == (2, 1, False)
+
+
+class _SilentProcess(_HangingProcess):
+    """Process that never writes anything until it is terminated."""
+
+    async def read(self, _: int = -1) -> bytes:
+        await self._exited.wait()
+        return b""
+
+
+@pytest.mark.asyncio
+async def test_idle_timeout_stops_stalled_runs() -> None:
+    """Ensures a silent CLI is killed and reported with the ``timeout`` code."""
+
+    runner = _ProcessRunner()
+    runner.enqueue(_SilentProcess())
+    runner.enqueue(_SilentProcess())
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+
+    events = [event async for event in thread.run_streamed("hi", {"idleTimeoutMs": 20})]
+    assert [event["type"] for event in events] == ["cancelled", "error"]
+    assert events[-1]["code"] == "timeout"
+
+    with pytest.raises(RunTimeoutError):
+        await thread.run("hi", {"timeoutMs": 20})
+
+
+@pytest.mark.asyncio
+async def test_abort_from_worker_thread_reaches_the_run() -> None:
+    """Ensures ``abort()`` called off the event loop still terminates the CLI."""
+
+    runner = _ProcessRunner()
+    hanging = _HangingProcess()
+    runner.enqueue(hanging)
+    adapter = CodexAdapter(process_runner=runner)
+    controller = AbortController()
+    thread = await adapter.start_thread()
+
+    async def _consume() -> list[str]:
+        seen: list[str] = []
+        async for event in thread.run_streamed("hi", {"signal": controller.signal}):
+            seen.append(event["type"])
+            if len(seen) == 1:
+                worker = threading.Thread(target=controller.abort, args=("from worker",))
+                worker.start()
+                worker.join()
+        return seen
+
+    seen = await asyncio.wait_for(_consume(), 2)
+    assert seen[-2:] == ["cancelled", "error"]
+    assert hanging._terminated
+
+
+@pytest.mark.asyncio
+async def test_drain_aborts_stragglers_and_rejects_new_runs() -> None:
+    """Ensures ``drain`` waits for the deadline, aborts live runs and refuses later ones."""
+
+    runner = _ProcessRunner()
+    hanging = _HangingProcess()
+    runner.enqueue(hanging)
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+    task = asyncio.create_task(thread.run("hi"))
+    await asyncio.sleep(0.01)
+    assert adapter.active_runs() == [thread]
+
+    assert await asyncio.wait_for(adapter.drain(0.05), 2) is False
+
+    assert hanging._terminated
+    await task
+    assert adapter.active_runs() == []
+    with pytest.raises(AdapterShutdownError):
+        await thread.run("again")
+
+
+@pytest.mark.asyncio
+async def test_run_snapshots_report_live_progress() -> None:
+    """Ensures snapshots expose the running thread's event and byte counters."""
+
+    runner = _ProcessRunner()
+    hanging = _HangingProcess()
+    runner.enqueue(hanging)
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+
+    async with thread.run_streamed("hi") as events:
+        seen = 0
+        async for _event in events:
+            seen += 1
+            if seen == 3:
+                break
+        (snapshot,) = adapter.run_snapshots()
+
+    assert snapshot.provider == "codex"
+    assert snapshot.events >= 3
+    assert snapshot.stdout_bytes == snapshot.events * len(hanging._line)
+    assert snapshot.last_event_type == "item.completed"
+    assert snapshot.last_event_at >= snapshot.started_at
+    assert (snapshot.current_tool, snapshot.queued_turns, snapshot.aborted) == (None, 0, False)
+    assert adapter.run_snapshots() == []
+
+
+class _RecordingMiddleware(RunMiddleware):
+    """Middleware exercising every hook."""
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.reports: list[RunReport] = []
+
+    def before_spawn(self, request: SpawnRequest) -> None:
+        request.args.append("--from-middleware")
+
+    def on_event(self, event: Any) -> Any:
+        if event["type"] == "message":
+            return {**event, "text": "[redacted]"}
+        return None if event["type"] == "init" else event
+
+    def on_stdout_chunk(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+
+    def after_run(self, report: RunReport) -> None:
+        self.reports.append(report)
+
+
+@pytest.mark.asyncio
+async def test_middleware_hooks_wrap_spawn_events_and_completion() -> None:
+    """Ensures per-coder middleware sees the spawn, raw chunks, events and finished runs."""
+
+    lines = [
+        {"type": "thread.started", "thread_id": "mw"},
+        {"type": "item.completed", "item": {"type": "agent_message", "text": "secret"}},
+        {"type": "turn.completed", "usage": {}},
+    ]
+    runner = _ProcessRunner()
+    runner.enqueue(_StubProcess(lines=lines))
+    runner.enqueue(_StubProcess(lines=lines))
+    middleware = _RecordingMiddleware()
+    adapter = CodexAdapter(process_runner=runner)
+    adapter.use(middleware)
+    thread = await adapter.start_thread()
+
+    events = [event async for event in thread.run_streamed("hi")]
+    assert [event["type"] for event in events] == ["message", "usage", "done"]
+    assert events[0]["text"] == "[redacted]"
+    assert len(middleware.chunks) == 3
+
+    result = await thread.run("again")
+    assert runner.calls[-1][-1] == "--from-middleware"
+    stream_report, run_report = middleware.reports
+    assert stream_report.result is None and stream_report.error is None
+    assert run_report.result is result
+    assert run_report.snapshot.thread_id == "mw"
+    assert run_report.snapshot.events == 3
+
+
+@pytest.mark.asyncio
+async def test_after_run_reports_only_the_runs_own_error() -> None:
+    """Ensures a run started while the caller handles an exception is not reported as failed."""
+
+    lines = [
+        {"type": "thread.started", "thread_id": "mw"},
+        {"type": "item.completed", "item": {"type": "agent_message", "text": "ok"}},
+        {"type": "turn.completed", "usage": {}},
+    ]
+    runner = _ProcessRunner()
+    runner.enqueue(_StubProcess(lines=lines))
+    runner.enqueue(_StubProcess(lines=[], returncode=1, stderr=b"boom"))
+    middleware = _RecordingMiddleware()
+    adapter = CodexAdapter(process_runner=runner)
+    adapter.use(middleware)
+    thread = await adapter.start_thread()
+
+    try:
+        raise ValueError("caller's own error")
+    except ValueError:
+        result = await thread.run("retry")
+    with pytest.raises(RuntimeError):
+        await thread.run("fails")
+
+    success, failure = middleware.reports
+    assert success.result is result and success.error is None
+    assert isinstance(failure.error, RuntimeError) and "boom" in str(failure.error)
+
+
+class _ScriptedProcess(_StubProcess):
+    """Process writing each line after its delay, then exiting cleanly."""
+
+    def __init__(self, script: list[tuple[float, dict[str, Any]]]) -> None:
+        super().__init__(lines=[])
+        self._script = [(delay, json.dumps(line).encode("utf-8") + b"\n") for delay, line in script]
+        self.stdout = self
+
+    async def read(self, _: int = -1) -> bytes:
+        if not self._script:
+            return b""
+        delay, line = self._script.pop(0)
+        await asyncio.sleep(delay)
+        return line
+
+
+@pytest.mark.asyncio
+async def test_filtered_out_tool_calls_still_use_the_tool_idle_budget() -> None:
+    """Ensures an eventFilter excluding tool events does not shrink a tool's idle budget."""
+
+    script = [
+        (0, {"type": "tool_use", "item": {"id": "t1", "name": "bash", "input": {}}}),
+        (0.15, {"type": "tool_result", "item": {"id": "t1", "output": "ok"}}),
+        (0, {"type": "item.completed", "item": {"type": "agent_message", "text": "done"}}),
+        (0, {"type": "turn.completed", "usage": {}}),
+    ]
+    runner = _ProcessRunner()
+    runner.enqueue(_ScriptedProcess(script))
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+
+    opts = {
+        "idleTimeoutMs": 50,
+        "toolIdleTimeoutMs": 5000,
+        "eventFilter": {"types": ["message", "done", "error", "cancelled"]},
+    }
+    events = [event async for event in thread.run_streamed("hi", opts)]
+
+    assert [event["type"] for event in events] == ["message", "done"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_schema_fails_before_spawning() -> None:
+    """Ensures a schema that fails to compile stops the run before Codex starts."""
+
+    runner = _ProcessRunner()
+    adapter = CodexAdapter(process_runner=runner)
+    thread = await adapter.start_thread()
+    run_opts = {
+        "outputSchema": {"type": "object", "properties": {"id": {"type": "string", "pattern": "("}}},
+        "validateOutput": True,
+    }
+
+    with pytest.raises(InvalidSchemaError):
+        await thread.run("hi", run_opts)
+    with pytest.raises(InvalidSchemaError):
+        async for _ in thread.run_streamed("hi", run_opts):
+            pass
+
+    assert runner.calls == []
+    assert adapter.active_runs() == []
+    assert thread.internal.current_run is None
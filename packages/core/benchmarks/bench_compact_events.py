@@ -0,0 +1,85 @@
+"""Measures the memory held by 100k stream events as dicts versus compact events.
+
+Run with ``python packages/core/benchmarks/bench_compact_events.py``. Each event mimics a Codex
+delta message carrying its raw ``item.delta`` payload as ``originalItem``; the script reports the
+bytes retained per event (via ``tracemalloc``) and the construction time for both forms.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import pathlib
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+SRC_DIR = pathlib.Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import CompactEvent  # noqa: E402
+
+EVENT_COUNT = 100_000
+
+
+def raw_lines(count: int) -> list[bytes]:
+    """Builds ``count`` JSONL lines shaped like Codex ``item.delta`` events."""
+
+    return [
+        json.dumps(
+            {
+                "type": "item.delta",
+                "item": {"id": f"item_{index}", "type": "agent_message", "text": f"token {index} "},
+            }
+        ).encode("utf-8")
+        for index in range(count)
+    ]
+
+
+def as_dict(line: bytes) -> dict[str, Any]:
+    """Normalises a line the way the Codex adapter does."""
+
+    raw = json.loads(line)
+    return {
+        "type": "message",
+        "provider": "codex",
+        "role": "assistant",
+        "text": raw["item"]["text"],
+        "delta": True,
+        "ts": 1_760_000_000_000,
+        "originalItem": raw,
+    }
+
+
+def measure(build: Callable[[bytes], Any], lines: list[bytes]) -> tuple[float, float]:
+    """Returns retained bytes per event and total construction seconds (timed untraced)."""
+
+    started = time.perf_counter()
+    events = [build(line) for line in lines]
+    elapsed = time.perf_counter() - started
+    del events
+    gc.collect()
+    tracemalloc.start()
+    events = [build(line) for line in lines]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return current / len(lines), elapsed
+
+
+def main() -> None:
+    lines = raw_lines(EVENT_COUNT)
+    print(f"{'form':>8} {'bytes/event':>12} {'MiB/100k':>9} {'build s':>8}")
+    for name, build in (
+        ("dict", as_dict),
+        ("compact", lambda line: CompactEvent.from_event(as_dict(line))),
+    ):
+        per_event, elapsed = measure(build, lines)
+        print(f"{name:>8} {per_event:>12.0f} {per_event * EVENT_COUNT / 2**20:>9.1f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
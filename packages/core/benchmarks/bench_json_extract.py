@@ -0,0 +1,92 @@
+"""Benchmarks structured output extraction on large assistant responses.
+
+Run with ``python packages/core/benchmarks/bench_json_extract.py``. Compares the core extractor
+with the previous ``find('{')``/``rfind('}')`` slice on responses of growing size made of prose,
+code snippets containing braces, and a fenced JSON payload near the end.
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib
+import sys
+import time
+from typing import Any, Callable, Optional
+
+SRC_DIR = pathlib.Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import extract_json_payload  # noqa: E402
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "issues": {
+            "type": "array",
+            "items": {"type": "object", "required": ["file", "line", "message"]},
+        }
+    },
+    "required": ["issues"],
+}
+
+
+def legacy_extract(text: Optional[str]) -> Any:
+    """The slice-and-parse approach the adapters used before the core extractor."""
+
+    if not text:
+        return None
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end == -1 or end <= start:
+        return None
+    try:
+        return json.loads(text[start : end + 1])
+    except json.JSONDecodeError:
+        return None
+
+
+def build_response(paragraphs: int, fenced: bool = True) -> str:
+    """Builds a response with ``paragraphs`` chunks of prose and code before the payload."""
+
+    chunk = (
+        "I inspected `config[key]` and the handler `def f(x): return {x: [1, 2]}` which looks fine.\n"
+        "```python\nmapping = {'a': [1, 2, 3], 'b': {'c': None}}\n```\n"
+    )
+    issues = [
+        {"file": f"src/mod_{index}.py", "line": index, "message": "unused import"} for index in range(50)
+    ]
+    payload = json.dumps({"issues": issues}, indent=2)
+    if fenced:
+        payload = "```json\n" + payload + "\n```"
+    return chunk * paragraphs + "Final answer:\n" + payload + "\nThanks!"
+
+
+def measure(func: Callable[[], Any], repeat: int = 5) -> float:
+    """Returns the best wall time of ``repeat`` calls in milliseconds."""
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    print(f"{'size':>10} {'fenced':>7} {'legacy ms':>10} {'legacy ok':>10} {'core ms':>10} {'core ok':>8}")
+    for fenced in (True, False):
+        for paragraphs in (10, 100, 1_000, 10_000):
+            text = build_response(paragraphs, fenced)
+            legacy_ok = legacy_extract(text) is not None
+            core_ok = isinstance(extract_json_payload(text, SCHEMA), dict)
+            legacy_ms = measure(lambda: legacy_extract(text))
+            core_ms = measure(lambda: extract_json_payload(text, SCHEMA))
+            print(
+                f"{len(text):>10} {fenced!s:>7} {legacy_ms:>10.2f} {legacy_ok!s:>10} "
+                f"{core_ms:>10.2f} {core_ok!s:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,31 @@
 """Entry point for the headless coder Python core package."""
 
+from .batches import iterate_batches, read_line_batches
+from .cache import CacheEntry, CachedThreadHandle, DiskCacheTier, MemoryCacheTier, ResultCache
 from .cancellation import AbortController, CancellationError, CancellationSignal, link_signal
+from .coalesce import DeltaCoalescer, coalesce_events, coalesce_run_batches, coalesce_run_events
+from .compact import CompactEvent, LazyOriginal
+from .event_filter import EventFilter, extract_event_type
+from .fingerprint import (
+    canonical_json,
+    compute_run_key,
+    workspace_fingerprint,
+    workspace_fingerprint_async,
+)
+from .incremental_json import IncrementalJsonParser
+from .json_extract import extract_json_payload, repair_json
+from .middleware import (
+    MiddlewareChain,
+    MiddlewareStack,
+    RunMiddleware,
+    RunReport,
+    SpawnRequest,
+    clear_middleware,
+    register_middleware,
+    unregister_middleware,
+)
+from .pipeline import EventPipeline, OutputValidationStage, StructuredDeltaStage
+from .queue import TurnQueue, TurnQueueFullError, TurnQueueStats
 from .registry import (
     clear_registered_adapters,
     create_coder,
@@ -8,47 +33,155 @@ from .registry import (
     register_adapter,
     unregister_adapter,
 )
+from .schema import (
+    RegisteredSchema,
+    SchemaRegistry,
+    default_cache_dir,
+    get_schema_registry,
+    set_schema_registry,
+)
+from .singleflight import SingleFlight
+from .spill import SpillFile, SpillStage, SpilledPayload, spill_value
+from .stream import EventStream
+from .tracking import (
+    AdapterShutdownError,
+    RunProgress,
+    RunSnapshot,
+    RunTracker,
+    active_runs,
+    drain_all,
+    drain_on_sigterm,
+    interrupt_all,
+    run_snapshots,
+)
 from .types import (
     AdapterFactory,
     AdapterName,
+    CoalesceOpts,
     CoderStreamEvent,
     CoderType,
+    EventBatchIterator,
+    EventFilterOpts,
     EventIterator,
     HeadlessCoder,
     Provider,
     PromptInput,
     PromptMessage,
+    RawEvent,
+    RawEventIterator,
     RunOpts,
     RunResult,
     SandboxMode,
     StartOpts,
     ThreadHandle,
+    TurnQueueOpts,
     now,
 )
+from .validation import (
+    InvalidSchemaError,
+    SchemaValidatorCache,
+    check_output_schema,
+    compile_validator,
+    get_validator,
+    validate_run_output,
+    validate_structured_output,
+)
+from .watchdog import RunTimeoutError, RunWatchdog
 
 __all__ = [
     "AbortController",
+    "AdapterShutdownError",
     "AdapterFactory",
     "AdapterName",
+    "CacheEntry",
+    "CachedThreadHandle",
     "CancellationError",
     "CancellationSignal",
+    "CoalesceOpts",
     "CoderStreamEvent",
     "CoderType",
+    "CompactEvent",
+    "DeltaCoalescer",
+    "DiskCacheTier",
+    "EventBatchIterator",
+    "EventFilter",
+    "EventFilterOpts",
     "EventIterator",
+    "EventPipeline",
+    "EventStream",
     "HeadlessCoder",
-    "Provider",
+    "IncrementalJsonParser",
+    "InvalidSchemaError",
+    "LazyOriginal",
+    "MemoryCacheTier",
+    "MiddlewareChain",
+    "MiddlewareStack",
+    "OutputValidationStage",
     "PromptInput",
     "PromptMessage",
+    "Provider",
+    "RawEvent",
+    "RawEventIterator",
+    "RunMiddleware",
+    "ResultCache",
+    "RegisteredSchema",
     "RunOpts",
+    "RunProgress",
+    "RunReport",
     "RunResult",
+    "RunSnapshot",
+    "RunTimeoutError",
+    "RunTracker",
+    "RunWatchdog",
     "SandboxMode",
+    "SchemaRegistry",
+    "SchemaValidatorCache",
+    "SingleFlight",
+    "SpawnRequest",
+    "SpillFile",
+    "SpillStage",
+    "SpilledPayload",
     "StartOpts",
+    "StructuredDeltaStage",
     "ThreadHandle",
+    "TurnQueue",
+    "TurnQueueFullError",
+    "TurnQueueOpts",
+    "TurnQueueStats",
+    "active_runs",
+    "canonical_json",
+    "check_output_schema",
+    "clear_middleware",
     "clear_registered_adapters",
+    "coalesce_events",
+    "coalesce_run_batches",
+    "coalesce_run_events",
+    "compile_validator",
+    "compute_run_key",
     "create_coder",
+    "default_cache_dir",
+    "drain_all",
+    "drain_on_sigterm",
+    "extract_event_type",
+    "extract_json_payload",
     "get_adapter_factory",
+    "get_schema_registry",
+    "get_validator",
+    "interrupt_all",
+    "iterate_batches",
     "link_signal",
     "now",
+    "read_line_batches",
     "register_adapter",
+    "register_middleware",
+    "repair_json",
+    "run_snapshots",
+    "set_schema_registry",
+    "spill_value",
     "unregister_adapter",
+    "unregister_middleware",
+    "validate_run_output",
+    "validate_structured_output",
+    "workspace_fingerprint",
+    "workspace_fingerprint_async",
 ]
@@ -0,0 +1,52 @@
+"""Helpers for batched streaming: chunked line reads and batch/event iterator adapters."""
+
+from __future__ import annotations
+
+from typing import Any, AsyncIterator
+
+from .types import CoderStreamEvent, EventBatchIterator
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+"""Bytes requested per ``read()`` from a provider's stdout."""
+
+
+async def read_line_batches(reader: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[list[bytes]]:
+    """Yields the complete lines available after each ``reader.read()``.
+
+    Lines keep no trailing newline and may be blank. A partial line is carried over to the next
+    read, and a final unterminated line is yielded once the stream ends. Long lines spanning many
+    reads are joined once, not re-concatenated on every read.
+    """
+
+    partial: list[bytes] = []
+    while True:
+        chunk = await reader.read(chunk_size)
+        if not chunk:
+            break
+        if b"\n" not in chunk:
+            partial.append(chunk)
+            continue
+        if partial:
+            partial.append(chunk)
+            chunk = b"".join(partial)
+            partial = []
+        lines = chunk.split(b"\n")
+        tail = lines.pop()
+        if tail:
+            partial.append(tail)
+        yield lines
+    if partial:
+        yield [b"".join(partial)]
+
+
+async def iterate_batches(batches: EventBatchIterator) -> AsyncIterator[CoderStreamEvent]:
+    """Flattens a batch iterator into single events, closing the source when closed early."""
+
+    try:
+        async for batch in batches:
+            for event in batch:
+                yield event
+    finally:
+        aclose = getattr(batches, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -0,0 +1,424 @@
+"""Content-addressed result cache for deterministic, read-only runs."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import copy
+import dataclasses
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Mapping, Optional, Sequence
+
+from .fingerprint import compute_run_key, workspace_fingerprint_async
+from .spill import SpilledPayload
+from .stream import EventStream
+from .types import (
+    CoderStreamEvent,
+    EventIterator,
+    PromptInput,
+    RunOpts,
+    RunResult,
+    SandboxMode,
+    StartOpts,
+    ThreadHandle,
+)
+
+LOGGER = logging.getLogger(__name__)
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_CACHEABLE_MODES: tuple[SandboxMode, ...] = ("read-only",)
+CACHE_FORMAT_VERSION = 1
+
+
+@dataclass
+class CacheEntry:
+    """Stored outcome of a run: the final result and/or the recorded stream."""
+
+    result: Optional[RunResult] = None
+    events: Optional[list[CoderStreamEvent]] = None
+    created_at: float = dataclasses.field(default_factory=time.time)
+
+    def merged_with(self, other: "CacheEntry") -> "CacheEntry":
+        """Returns a new entry that keeps any half ``other`` lacks from ``self``."""
+
+        return CacheEntry(
+            result=other.result if other.result is not None else self.result,
+            events=other.events if other.events is not None else self.events,
+            created_at=other.created_at,
+        )
+
+
+class MemoryCacheTier:
+    """In-memory LRU tier bounded by entry count, approximate bytes, and TTL."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Creates the tier.
+
+        Args:
+            max_entries: Maximum number of entries kept before evicting the least recently used.
+            max_bytes: Optional budget for the approximate serialised size of all entries.
+            ttl: Optional time-to-live in seconds.
+        """
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[CacheEntry, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Returns the entry for ``key`` and marks it as recently used."""
+
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None:
+                return None
+            entry, _ = stored
+            if _expired(entry, self._ttl):
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        """Stores ``entry`` and evicts older entries beyond the configured budgets."""
+
+        size = _estimate_size(entry) if self._max_bytes is not None else 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (entry, size)
+            self._bytes += size
+            while len(self._entries) > self._max_entries or (
+                self._max_bytes is not None and self._bytes > self._max_bytes and len(self._entries) > 1
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def clear(self) -> None:
+        """Drops every entry."""
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+class DiskCacheTier:
+    """On-disk tier storing one JSON document per key under ``directory``."""
+
+    def __init__(self, directory: str, ttl: Optional[float] = None) -> None:
+        """Creates the tier, lazily creating ``directory`` on first write."""
+        self._directory = directory
+        self._ttl = ttl
+
+    @property
+    def directory(self) -> str:
+        """Returns the root directory holding cache documents."""
+
+        return self._directory
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Loads the entry for ``key`` from disk without blocking the event loop."""
+
+        return await asyncio.to_thread(self.get_sync, key)
+
+    async def put(self, key: str, entry: CacheEntry) -> None:
+        """Persists ``entry`` to disk without blocking the event loop."""
+
+        await asyncio.to_thread(self.put_sync, key, entry)
+
+    def get_sync(self, key: str) -> Optional[CacheEntry]:
+        """Synchronous variant of :meth:`get`."""
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as handle:
+                document = json.load(handle)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            LOGGER.debug("Discarding unreadable cache entry", extra={"path": path, "error": str(exc)})
+            return None
+        if document.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        entry = _entry_from_document(document)
+        if _expired(entry, self._ttl):
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+            return None
+        return entry
+
+    def put_sync(self, key: str, entry: CacheEntry) -> None:
+        """Synchronous variant of :meth:`put`; writes atomically via rename."""
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = json.dumps(_entry_to_document(entry), default=_json_fallback)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], f"{key}.json")
+
+
+class ResultCache:
+    """Two-tier cache (memory, then optional disk) of run outcomes keyed by content hash."""
+
+    def __init__(
+        self,
+        memory: Optional[MemoryCacheTier] = None,
+        disk: Optional[DiskCacheTier] = None,
+    ) -> None:
+        """Creates the cache.
+
+        Args:
+            memory: In-memory tier; a default LRU is created when omitted.
+            disk: Optional persistent tier consulted on memory misses.
+        """
+        self.memory = memory if memory is not None else MemoryCacheTier()
+        self.disk = disk
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Returns the cached entry for ``key``, promoting disk hits into memory."""
+
+        entry = self.memory.get(key)
+        if entry is not None or self.disk is None:
+            return entry
+        entry = await self.disk.get(key)
+        if entry is not None:
+            self.memory.put(key, entry)
+        return entry
+
+    async def put(self, key: str, entry: CacheEntry) -> None:
+        """Stores ``entry``, merging it with any existing result/events for ``key``."""
+
+        existing = self.memory.get(key)
+        if existing is None and self.disk is not None:
+            existing = await self.disk.get(key)
+        merged = existing.merged_with(entry) if existing is not None else entry
+        self.memory.put(key, merged)
+        if self.disk is not None:
+            try:
+                await self.disk.put(key, merged)
+            except OSError as exc:
+                LOGGER.warning("Failed to persist cache entry", extra={"key": key, "error": str(exc)})
+
+
+class CachedThreadHandle(ThreadHandle):
+    """Thread handle wrapper that serves repeat runs from a :class:`ResultCache`.
+
+    Only runs whose sandbox mode is listed in ``cacheable_modes`` and whose working directory can
+    be fingerprinted are cached. The cache is meant for single-turn, read-only jobs: once the
+    wrapped handle has executed a turn, later runs pass straight through because the key cannot
+    capture the provider-side conversation history.
+    """
+
+    def __init__(
+        self,
+        thread: ThreadHandle,
+        cache: ResultCache,
+        start_opts: Optional[StartOpts] = None,
+        cacheable_modes: Sequence[SandboxMode] = DEFAULT_CACHEABLE_MODES,
+        replay_events: bool = True,
+    ) -> None:
+        """Wraps ``thread``.
+
+        Args:
+            thread: Handle returned by ``start_thread``.
+            cache: Cache storing results and recorded streams.
+            start_opts: Start options used to create ``thread``; supplies model, sandbox mode and
+                working directory for the cache key.
+            cacheable_modes: Sandbox modes eligible for caching.
+            replay_events: Whether streamed hits replay the recorded events when available.
+        """
+        self._thread = thread
+        self._cache = cache
+        self._start_opts: StartOpts = start_opts or {}
+        self._cacheable_modes = tuple(cacheable_modes)
+        self._replay_events = replay_events
+        self._has_history = False
+        self.last_hit = False
+        self.provider = thread.provider
+        self.internal = thread.internal
+
+    @property
+    def id(self) -> Optional[str]:  # type: ignore[override]
+        """Returns the wrapped handle's identifier."""
+
+        return self._thread.id
+
+    @property
+    def thread(self) -> ThreadHandle:
+        """Returns the wrapped handle."""
+
+        return self._thread
+
+    async def run(self, input: PromptInput, opts: Optional[RunOpts] = None) -> RunResult:
+        """Returns a cached result when available, otherwise runs and stores the outcome."""
+
+        key = await self._key_for(input, opts)
+        self.last_hit = False
+        if key is not None:
+            entry = await self._cache.get(key)
+            if entry is not None and entry.result is not None:
+                self.last_hit = True
+                return dataclasses.replace(entry.result)
+        result = await self._thread.run(input, opts)
+        self._has_history = True
+        if key is not None:
+            await self._cache.put(key, CacheEntry(result=result))
+        return result
+
+    def run_streamed(self, input: PromptInput, opts: Optional[RunOpts] = None) -> EventIterator:
+        """Replays a cached stream when available, otherwise records the live stream."""
+
+        async def _iterator() -> AsyncIterator[CoderStreamEvent]:
+            key = await self._key_for(input, opts)
+            self.last_hit = False
+            if key is not None:
+                entry = await self._cache.get(key)
+                if entry is not None and (entry.events is not None or entry.result is not None):
+                    self.last_hit = True
+                    for event in self._replay(entry):
+                        yield event
+                    return
+            recorded: list[CoderStreamEvent] = []
+            completed = False
+            failed = False
+            self._has_history = True
+            async with EventStream(self._thread.run_streamed(input, opts)) as events:
+                async for event in events:
+                    if key is not None:
+                        recorded.append(event)
+                        if event.get("type") == "done":
+                            completed = True
+                        elif event.get("type") in ("error", "cancelled"):
+                            failed = True
+                    yield event
+            if key is not None and completed and not failed:
+                await self._cache.put(key, CacheEntry(events=recorded))
+
+        return EventStream(_iterator())
+
+    async def interrupt(self, reason: Optional[str] = None) -> None:
+        """Forwards interrupts to the wrapped handle."""
+
+        await self._thread.interrupt(reason)
+
+    async def close(self) -> None:
+        """Forwards close to the wrapped handle."""
+
+        await self._thread.close()
+
+    async def _key_for(self, input: PromptInput, opts: Optional[RunOpts]) -> Optional[str]:
+        """Computes the cache key, or ``None`` when the run must bypass the cache."""
+
+        if self._has_history:
+            return None
+        sandbox_mode = self._start_opts.get("sandboxMode")
+        if sandbox_mode not in self._cacheable_modes:
+            return None
+        workspace = await workspace_fingerprint_async(self._start_opts.get("workingDirectory"))
+        if workspace is None:
+            return None
+        return compute_run_key(
+            self.provider,
+            input,
+            model=self._start_opts.get("model"),
+            output_schema=opts.get("outputSchema") if opts else None,
+            sandbox_mode=sandbox_mode,
+            workspace=workspace,
+        )
+
+    def _replay(self, entry: CacheEntry) -> list[CoderStreamEvent]:
+        """Builds the event sequence returned for a streamed cache hit."""
+
+        if self._replay_events and entry.events is not None:
+            return copy.deepcopy(entry.events)
+        result = entry.result
+        assert result is not None
+        events: list[CoderStreamEvent] = []
+        ts = int(entry.created_at * 1000)
+        if result.thread_id:
+            events.append({"type": "init", "provider": self.provider, "threadId": result.thread_id, "ts": ts})
+        if result.text:
+            events.append(
+                {
+                    "type": "message",
+                    "provider": self.provider,
+                    "role": "assistant",
+                    "text": result.text,
+                    "ts": ts,
+                }
+            )
+        if result.usage:
+            events.append({"type": "usage", "provider": self.provider, "stats": result.usage, "ts": ts})
+        events.append(
+            {"type": "done", "provider": self.provider, "ts": ts, "originalItem": {"reason": "cached"}}
+        )
+        return events
+
+
+def _expired(entry: CacheEntry, ttl: Optional[float]) -> bool:
+    return ttl is not None and time.time() - entry.created_at > ttl
+
+
+def _estimate_size(entry: CacheEntry) -> int:
+    return len(json.dumps(_entry_to_document(entry), default=_json_fallback))
+
+
+def _entry_to_document(entry: CacheEntry) -> dict[str, Any]:
+    result = entry.result
+    return {
+        "version": CACHE_FORMAT_VERSION,
+        "created_at": entry.created_at,
+        "result": None if result is None else dataclasses.asdict(result),
+        "events": entry.events,
+    }
+
+
+def _entry_from_document(document: dict[str, Any]) -> CacheEntry:
+    result = document.get("result")
+    return CacheEntry(
+        result=None if result is None else RunResult(**result),
+        events=document.get("events"),
+        created_at=float(document.get("created_at") or 0.0),
+    )
+
+
+def _json_fallback(value: Any) -> Any:
+    """Converts values the JSON encoder cannot handle (e.g. SDK objects)."""
+
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, SpilledPayload):
+        return value.read()
+    return repr(value)
+
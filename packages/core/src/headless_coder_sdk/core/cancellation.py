@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
 import threading
-from typing import Callable, Optional
+from typing import Callable, Iterable, Optional
 
 from .types import CancellationSignalProtocol
 
@@ -12,6 +13,8 @@ from .types import CancellationSignalProtocol
 class CancellationError(RuntimeError):
     """Exception raised when an operation is aborted cooperatively."""
 
+    code = "interrupted"
+
     def __init__(self, reason: Optional[str] = None) -> None:
         message = reason or "Operation was interrupted"
         super().__init__(message)
@@ -19,13 +22,69 @@ class CancellationError(RuntimeError):
 
 
 class CancellationSignal(CancellationSignalProtocol):
-    """Concrete implementation of the cancellation protocol used by the adapters."""
+    """Concrete implementation of the cancellation protocol used by the adapters.
+
+    Listeners live in an insertion-ordered dict keyed by a per-signal token, so registering and
+    unsubscribing are O(1) even when thousands of runs share one signal, and callbacks still
+    fire in registration order. ``aborted`` and ``reason`` are plain attribute reads.
+    """
 
     def __init__(self) -> None:
         self._aborted = False
         self._reason: Optional[str] = None
-        self._callbacks: list[Callable[[Optional[str]], None]] = []
-        self._lock = threading.RLock()
+        self._callbacks: dict[int, Callable[[Optional[str]], None]] = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+        # Parent subscriptions and timers released once the signal fires or is detached.
+        self._links: list[Callable[[], None]] = []
+
+    @classmethod
+    def any(cls, signals: Iterable[Optional[CancellationSignalProtocol]]) -> "CancellationSignal":
+        """Returns a signal that aborts with the reason of the first of ``signals`` to abort.
+
+        Mirrors ``AbortSignal.any``. ``None`` entries are ignored. The returned signal forwards
+        through one listener per parent and removes those listeners as soon as it fires (or
+        :meth:`detach` is called), so long-lived parents do not accumulate them.
+        """
+
+        signal = cls()
+        parents = [parent for parent in signals if parent is not None]
+        for parent in parents:
+            if parent.aborted:
+                signal._trigger(parent.reason)
+                return signal
+        for parent in parents:
+            signal._links.append(parent.add_listener(signal._trigger))
+            if signal._aborted:
+                # A parent fired while we were still subscribing; drop what is linked so far.
+                signal._release_links()
+                break
+        return signal
+
+    @classmethod
+    def timeout(cls, seconds: float, reason: Optional[str] = None) -> "CancellationSignal":
+        """Returns a signal that aborts after ``seconds`` on the running loop.
+
+        Mirrors ``AbortSignal.timeout`` using a single ``loop.call_later`` handle, which is
+        cancelled if the signal is detached first.
+        """
+
+        loop = asyncio.get_running_loop()
+        signal = cls()
+        message = reason or f"Timed out after {seconds:g}s"
+        handle = loop.call_later(seconds, signal._trigger, message)
+        # Detaching or aborting may happen on another thread; cancel the timer on its own loop.
+        signal._links.append(lambda: _call_soon_threadsafe(loop, handle.cancel))
+        return signal
+
+    def child(self) -> "CancellationSignal":
+        """Returns a signal that aborts when this one does.
+
+        The child holds one listener on this signal, released when the child fires or is
+        detached, so per-run children of a long-lived signal can be discarded cheaply.
+        """
+
+        return CancellationSignal.any([self])
 
     @property
     def aborted(self) -> bool:
@@ -43,30 +102,47 @@ class CancellationSignal(CancellationSignalProtocol):
         """Registers a callback that fires exactly once when the signal aborts."""
 
         with self._lock:
-            if self._aborted:
-                callback(self._reason)
-                return lambda: None
-            self._callbacks.append(callback)
+            aborted = self._aborted
+            if not aborted:
+                token = next(self._tokens)
+                self._callbacks[token] = callback
+        if aborted:
+            callback(self._reason)
+            return _noop
 
         def unsubscribe() -> None:
             with self._lock:
-                try:
-                    self._callbacks.remove(callback)
-                except ValueError:
-                    pass
+                self._callbacks.pop(token, None)
 
         return unsubscribe
 
+    def detach(self) -> None:
+        """Stops following the parents and timer of an :meth:`any` or :meth:`timeout` signal.
+
+        Call it once the operation the signal guarded has completed; the signal then never fires
+        on its own. A no-op for plain signals.
+        """
+
+        self._release_links()
+
+    def _release_links(self) -> None:
+        with self._lock:
+            links = self._links
+            self._links = []
+        for release in links:
+            release()
+
     def _trigger(self, reason: Optional[str]) -> None:
         with self._lock:
             if self._aborted:
                 return
-            self._aborted = True
             self._reason = reason
-            callbacks = list(self._callbacks)
-            self._callbacks.clear()
+            self._aborted = True
+            callbacks = self._callbacks
+            self._callbacks = {}
+        self._release_links()
 
-        for callback in callbacks:
+        for callback in callbacks.values():
             try:
                 callback(reason)
             except Exception:
@@ -85,7 +161,7 @@ class CancellationSignal(CancellationSignalProtocol):
             if not future.done():
                 future.set_result(None)
 
-        unsubscribe = self.add_listener(_on_abort)
+        unsubscribe = link_signal(self, _on_abort, loop)
         try:
             await future
         finally:
@@ -101,8 +177,13 @@ class CancellationSignal(CancellationSignalProtocol):
 class AbortController:
     """Small helper mirroring the web AbortController API."""
 
-    def __init__(self) -> None:
-        self._signal = CancellationSignal()
+    def __init__(self, parent: Optional[CancellationSignalProtocol] = None) -> None:
+        """Creates a controller whose signal also aborts when ``parent`` does.
+
+        A child controller can be aborted on its own without affecting ``parent``; its link to
+        the parent is released once its signal fires.
+        """
+        self._signal = CancellationSignal.any([parent]) if parent is not None else CancellationSignal()
 
     @property
     def signal(self) -> CancellationSignal:
@@ -116,11 +197,49 @@ class AbortController:
         self._signal._trigger(reason)
 
 
+def _noop() -> None:
+    return None
+
+
 def link_signal(
-    signal: Optional[CancellationSignalProtocol], callback: Callable[[Optional[str]], None]
+    signal: Optional[CancellationSignalProtocol],
+    callback: Callable[[Optional[str]], None],
+    loop: Optional[asyncio.AbstractEventLoop] = None,
 ) -> Callable[[], None]:
-    """Links a signal to a callback, returning an unsubscribe no-op when no signal is provided."""
+    """Links a signal to a callback, returning an unsubscribe no-op when no signal is provided.
+
+    With ``loop``, the callback always runs on that loop: directly when the signal fires on the
+    loop's thread, through ``call_soon_threadsafe`` when it fires on any other thread (for
+    example ``AbortController.abort()`` called from a synchronous worker). Adapters pass the loop
+    that owns the run so aborts are never dropped for lack of a running loop.
+    """
 
     if signal is None:
         return lambda: None
-    return signal.add_listener(callback)
+    if loop is None:
+        return signal.add_listener(callback)
+
+    def _dispatch(reason: Optional[str]) -> None:
+        if _running_loop() is loop:
+            callback(reason)
+        else:
+            _call_soon_threadsafe(loop, callback, reason)
+
+    return signal.add_listener(_dispatch)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _call_soon_threadsafe(
+    loop: asyncio.AbstractEventLoop, callback: Callable[..., None], *args: object
+) -> None:
+    try:
+        loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+        # The owning loop is closed, so there is nothing left to notify.
+        pass
@@ -0,0 +1,238 @@
+"""Coalescing of high-frequency delta and progress events in streamed runs."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import Any, AsyncIterator, Optional
+
+from .compact import CompactEvent, LazyOriginal
+from .types import CoderStreamEvent, EventBatchIterator, EventIterator, RunOpts
+
+DEFAULT_MAX_LATENCY_MS = 30.0
+DEFAULT_MAX_BYTES = 4096
+
+
+class DeltaCoalescer:
+    """Merges runs of mergeable events into single events.
+
+    Consecutive ``message`` events with ``delta: True`` from the same provider and role have
+    their text concatenated, and consecutive ``progress`` events with the same label have their
+    string ``detail`` concatenated. The merged event keeps the first event's timestamp and carries
+    the list of merged ``originalItem`` payloads. Any other event flushes the pending merge first,
+    so ordering is preserved. This class is synchronous; :func:`coalesce_events` adds the latency
+    bound on top of it.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """Creates a coalescer flushing once merged text reaches ``max_bytes`` UTF-8 bytes."""
+        self._max_bytes = max_bytes
+        self._key: Optional[tuple[Any, ...]] = None
+        self._events: list[CoderStreamEvent] = []
+        self._size = 0
+
+    @property
+    def pending(self) -> bool:
+        """Whether events are buffered waiting to be merged."""
+
+        return bool(self._events)
+
+    def feed(self, event: CoderStreamEvent) -> list[CoderStreamEvent]:
+        """Buffers ``event`` when mergeable and returns the events ready for delivery."""
+
+        key = _merge_key(event)
+        if key is None:
+            return [*self.flush(), event]
+        ready = self.flush() if key != self._key else []
+        self._key = key
+        self._events.append(event)
+        self._size += len(_merge_text(event).encode("utf-8"))
+        if self._size >= self._max_bytes:
+            ready.extend(self.flush())
+        return ready
+
+    def flush(self) -> list[CoderStreamEvent]:
+        """Returns the pending merged event (if any) and resets the buffer."""
+
+        events, self._events = self._events, []
+        self._key = None
+        self._size = 0
+        if not events:
+            return []
+        if len(events) == 1:
+            return events
+        return [_merge(events)]
+
+
+async def coalesce_events(
+    events: EventIterator,
+    max_latency_ms: float = DEFAULT_MAX_LATENCY_MS,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    *,
+    task_bound: bool = True,
+) -> AsyncIterator[CoderStreamEvent]:
+    """Yields ``events`` with delta and progress runs merged.
+
+    A merged event is delivered once it reaches ``max_bytes`` or as soon as a non-mergeable event
+    arrives, and whatever is pending is delivered when ``events`` ends. Closing this iterator
+    closes ``events``.
+
+    How ``max_latency_ms`` applies depends on ``task_bound``. A task-bound source (the default,
+    needed for SDK streams tied to the task that started them) is only ever iterated in the
+    caller's task, so the bound is checked when the next event arrives: a merge pending while the
+    source is silent waits for that event, which makes it a rate limit rather than a latency cap.
+    With ``task_bound=False`` the next event is awaited in a separate task while a merge is
+    pending, and the merge is delivered ``max_latency_ms`` after its first part even if the source
+    stalls.
+    """
+
+    coalescer = DeltaCoalescer(max_bytes)
+    iterator = events.__aiter__()
+    loop = asyncio.get_running_loop()
+    latency = max(0.0, max_latency_ms) / 1000
+    deadline = 0.0
+    next_event: Optional[asyncio.Future[CoderStreamEvent]] = None
+    try:
+        while True:
+            if task_bound or not coalescer.pending:
+                if next_event is None:
+                    try:
+                        event = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        break
+                else:
+                    # A read started while a merge was pending outlived the flush.
+                    try:
+                        event = await next_event
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        next_event = None
+                if task_bound and coalescer.pending and loop.time() >= deadline:
+                    for merged in coalescer.flush():
+                        yield merged
+            else:
+                if next_event is None:
+                    next_event = asyncio.ensure_future(iterator.__anext__())
+                done, _ = await asyncio.wait({next_event}, timeout=max(0.0, deadline - loop.time()))
+                if not done:
+                    for merged in coalescer.flush():
+                        yield merged
+                    continue
+                try:
+                    event = next_event.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    next_event = None
+            had_pending = coalescer.pending
+            for ready in coalescer.feed(event):
+                yield ready
+            if coalescer.pending and not had_pending:
+                deadline = loop.time() + latency
+        for merged in coalescer.flush():
+            yield merged
+    finally:
+        if next_event is not None:
+            next_event.cancel()
+            with contextlib.suppress(BaseException):
+                await next_event
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def coalesce_run_events(
+    events: EventIterator,
+    run_opts: Optional[RunOpts],
+    *,
+    task_bound: bool = True,
+) -> EventIterator:
+    """Wraps ``events`` with :func:`coalesce_events` when ``RunOpts["coalesce"]`` is set.
+
+    ``task_bound`` is passed through to :func:`coalesce_events`.
+    """
+
+    options = run_opts.get("coalesce") if run_opts else None
+    if not options:
+        return events
+    if options is True:
+        return coalesce_events(events, task_bound=task_bound)
+    return coalesce_events(
+        events,
+        max_latency_ms=options.get("maxLatencyMs", DEFAULT_MAX_LATENCY_MS),
+        max_bytes=options.get("maxBytes", DEFAULT_MAX_BYTES),
+        task_bound=task_bound,
+    )
+
+
+async def _coalesce_batches(batches: EventBatchIterator, max_bytes: int) -> EventBatchIterator:
+    try:
+        async for batch in batches:
+            coalescer = DeltaCoalescer(max_bytes)
+            merged: list[CoderStreamEvent] = []
+            for event in batch:
+                merged.extend(coalescer.feed(event))
+            merged.extend(coalescer.flush())
+            yield merged
+    finally:
+        aclose = getattr(batches, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def coalesce_run_batches(batches: EventBatchIterator, run_opts: Optional[RunOpts]) -> EventBatchIterator:
+    """Batch counterpart of :func:`coalesce_run_events`.
+
+    Batches are delivered as soon as they are read, so only merges within a batch apply and
+    ``maxLatencyMs`` is irrelevant.
+    """
+
+    options = run_opts.get("coalesce") if run_opts else None
+    if not options:
+        return batches
+    max_bytes = DEFAULT_MAX_BYTES if options is True else options.get("maxBytes", DEFAULT_MAX_BYTES)
+    return _coalesce_batches(batches, max_bytes)
+
+
+def _merge_key(event: CoderStreamEvent) -> Optional[tuple[Any, ...]]:
+    event_type = event.get("type")
+    if event_type == "message" and event.get("delta") and isinstance(event.get("text"), str):
+        return ("message", event.get("provider"), event.get("role", "assistant"))
+    if event_type == "progress":
+        return ("progress", event.get("provider"), event.get("label"))
+    return None
+
+
+def _merge_text(event: CoderStreamEvent) -> str:
+    value = event.get("text") if event.get("type") == "message" else event.get("detail")
+    return value if isinstance(value, str) else ""
+
+
+def _merge(events: list[CoderStreamEvent]) -> CoderStreamEvent:
+    first = events[0]
+    merged: CoderStreamEvent = {  # type: ignore[assignment]
+        key: first[key] for key in first if key != "originalItem"
+    }
+    if merged.get("type") == "message":
+        merged["text"] = "".join(event.get("text") or "" for event in events)
+    else:
+        details = [event.get("detail") for event in events if event.get("detail") is not None]
+        if details and all(isinstance(detail, str) for detail in details):
+            merged["detail"] = "".join(details)
+        elif details:
+            merged["detail"] = details[-1]
+    if any("originalItem" in event for event in events):
+
+        def _originals() -> list[Any]:
+            return [_resolve_original(event.get("originalItem")) for event in events]
+
+        # Compact events keep payloads lazy, so the merged list is only built when it is read.
+        merged["originalItem"] = LazyOriginal(_originals) if isinstance(first, CompactEvent) else _originals()
+    if isinstance(first, CompactEvent):
+        return CompactEvent.from_event(merged)  # type: ignore[return-value]
+    return merged
+
+
+def _resolve_original(value: Any) -> Any:
+    return value.resolve() if isinstance(value, LazyOriginal) else value
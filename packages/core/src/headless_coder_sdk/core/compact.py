@@ -0,0 +1,172 @@
+"""Compact, read-only representation of stream events for runs that keep long transcripts."""
+
+from __future__ import annotations
+
+import json
+import sys
+from typing import Any, Callable, Iterator, Mapping
+
+from .types import CoderStreamEvent
+
+_MISSING = object()
+_INTERNED_FIELDS = frozenset({"type", "provider", "role", "label", "name", "code", "model"})
+
+
+class LazyOriginal:
+    """Deferred ``originalItem`` payload built only when a compact event's field is read.
+
+    Adapters whose raw payloads are costly to convert (for example SDK objects) hand this to
+    :class:`CompactEvent` instead of a converted payload. Dict events never carry it.
+    """
+
+    __slots__ = ("_factory",)
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        """Wraps ``factory``, called on every :meth:`resolve`."""
+        self._factory = factory
+
+    def resolve(self) -> Any:
+        """Builds and returns the payload."""
+
+        return self._factory()
+
+
+class CompactEvent(Mapping[str, Any]):
+    """Slotted stand-in for a :class:`CoderStreamEvent` dict.
+
+    ``type``, ``provider`` and ``ts`` live in slots (and are readable as attributes); the other
+    fields are kept in one flat tuple of alternating keys and values. Short enum-like strings are
+    interned so transcripts share a single copy. ``originalItem`` is stored as compact JSON bytes
+    and parsed on every access, so holding the event never pins the provider payload tree; keep
+    the returned object if you need it repeatedly.
+
+    The class implements the read-only mapping protocol, so ``event["type"]``, ``event.get(...)``,
+    ``in``, iteration and ``dict(event)`` behave as they do for the dict events. Use
+    :meth:`to_dict` to obtain a mutable copy.
+    """
+
+    __slots__ = ("type", "provider", "ts", "_fields", "_original")
+
+    def __init__(
+        self,
+        event_type: str,
+        provider: str,
+        ts: int,
+        fields: tuple[Any, ...] = (),
+        original: Any = _MISSING,
+    ) -> None:
+        """Creates an event; prefer :meth:`from_event` which handles interning and encoding.
+
+        Args:
+            event_type: Event type.
+            provider: Provider that produced the event.
+            ts: Millisecond timestamp.
+            fields: Remaining fields as a flat ``(key, value, key, value, ...)`` tuple.
+            original: ``originalItem`` as produced by the encoder, or absent.
+        """
+        self.type = event_type
+        self.provider = provider
+        self.ts = ts
+        self._fields = fields
+        self._original = original
+
+    @classmethod
+    def from_event(cls, event: Mapping[str, Any]) -> "CompactEvent":
+        """Builds a compact copy of ``event``."""
+
+        if isinstance(event, CompactEvent):
+            return event
+        fields: list[Any] = []
+        original: Any = _MISSING
+        for key, value in event.items():
+            if key in ("type", "provider", "ts"):
+                continue
+            if key == "originalItem":
+                original = _encode_original(value)
+                continue
+            if key in _INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            fields.append(sys.intern(key))
+            fields.append(value)
+        event_type = event.get("type")
+        provider = event.get("provider")
+        return cls(
+            sys.intern(event_type) if type(event_type) is str else event_type,
+            sys.intern(provider) if type(provider) is str else provider,
+            event.get("ts"),
+            tuple(fields),
+            original,
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        if key == "originalItem":
+            # Checked without decoding so membership tests never build a lazy payload.
+            return self._original is not _MISSING
+        return isinstance(key, str) and self._lookup(key) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        yield "type"
+        yield "provider"
+        yield "ts"
+        yield from self._fields[::2]
+        if self._original is not _MISSING:
+            yield "originalItem"
+
+    def __len__(self) -> int:
+        return 3 + len(self._fields) // 2 + (self._original is not _MISSING)
+
+    def __repr__(self) -> str:
+        return f"CompactEvent({self.to_dict()!r})"
+
+    def to_dict(self) -> CoderStreamEvent:
+        """Returns a regular mutable event dict, materialising ``originalItem``."""
+
+        return dict(self.items())  # type: ignore[return-value]
+
+    def _lookup(self, key: str) -> Any:
+        if key == "type":
+            return self.type
+        if key == "provider":
+            return self.provider
+        if key == "ts":
+            return self.ts
+        if key == "originalItem":
+            return _decode_original(self._original)
+        fields = self._fields
+        for index in range(0, len(fields), 2):
+            if fields[index] == key:
+                return fields[index + 1]
+        return _MISSING
+
+
+def compact_event(event: CoderStreamEvent) -> list[CoderStreamEvent]:
+    """Pipeline stage converting ``event`` into a :class:`CompactEvent`."""
+
+    return [CompactEvent.from_event(event)]  # type: ignore[list-item]
+
+
+def _encode_original(value: Any) -> Any:
+    if value is None or isinstance(value, LazyOriginal):
+        return value
+    try:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    except (TypeError, ValueError):
+        # Payloads that are not plain JSON (for example SDK objects) are kept as they are, boxed
+        # so they cannot be mistaken for encoded bytes.
+        return (value,)
+
+
+def _decode_original(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return json.loads(value)
+    if isinstance(value, tuple):
+        return value[0]
+    if isinstance(value, LazyOriginal):
+        return value.resolve()
+    return value
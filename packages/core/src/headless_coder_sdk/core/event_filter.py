@@ -0,0 +1,129 @@
+"""Per-run event filtering pushed down into the adapters' parsing and normalisation."""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, Mapping, Optional, Union
+
+from .types import CoderStreamEvent, RunOpts
+
+ESSENTIAL_EVENT_TYPES = frozenset({"init", "done"})
+"""Event types adapters always build because they drive thread ids and completion tracking."""
+
+_TYPE_FIELD = re.compile(rb'"type"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_NESTING = re.compile(rb"[{}\[\]]")
+
+
+class EventFilter:
+    """Decides which stream events a run needs to build and which reach the consumer.
+
+    Built from ``RunOpts["eventFilter"]`` and installed as the last stage of the run's
+    :class:`~headless_coder_sdk.core.pipeline.EventPipeline`. Adapters additionally use
+    :meth:`screen` to skip raw lines whose ``"type"`` can only produce unwanted events without
+    JSON-parsing them, and :meth:`needs` inside normalisers before allocating an event.
+    """
+
+    def __init__(
+        self,
+        types: Optional[Iterable[str]] = None,
+        original_item: bool = True,
+        required: Iterable[str] = (),
+    ) -> None:
+        """Creates a filter.
+
+        Args:
+            types: Event types delivered to the consumer; ``None`` delivers every type.
+            original_item: Whether delivered events keep their ``originalItem`` payload.
+            required: Extra types the run needs internally (for example by pipeline stages) even
+                when the consumer does not receive them.
+        """
+        self._types = frozenset(types) if types is not None else None
+        self._original_item = original_item
+        self._needed = (
+            None if self._types is None else self._types | frozenset(required) | ESSENTIAL_EVENT_TYPES
+        )
+
+    @classmethod
+    def from_run_opts(
+        cls,
+        run_opts: Optional[RunOpts],
+        required: Iterable[str] = (),
+    ) -> Optional["EventFilter"]:
+        """Builds the filter for a run, or returns ``None`` when the run does not filter events."""
+
+        spec = run_opts.get("eventFilter") if run_opts else None
+        if not spec:
+            return None
+        types = spec.get("types")
+        original_item = spec.get("originalItem", True)
+        if types is None and original_item:
+            return None
+        return cls(types, original_item=bool(original_item), required=required)
+
+    @property
+    def original_item(self) -> bool:
+        """Whether delivered events keep ``originalItem``."""
+
+        return self._original_item
+
+    def needs(self, event_type: str) -> bool:
+        """Returns whether the run must build events of ``event_type``."""
+
+        return self._needed is None or event_type in self._needed
+
+    def needs_any(self, event_types: Iterable[str]) -> bool:
+        """Returns whether the run must build any of ``event_types``."""
+
+        if self._needed is None:
+            return True
+        return any(event_type in self._needed for event_type in event_types)
+
+    def screen(
+        self,
+        line: Union[bytes, str],
+        type_map: Mapping[str, Iterable[str]],
+        default: Iterable[str],
+    ) -> bool:
+        """Returns ``False`` when ``line`` can only produce unneeded events.
+
+        ``type_map`` maps raw provider event types to the normalised types they may produce and
+        ``default`` covers unknown raw types. Lines whose type cannot be determined cheaply are
+        always kept.
+        """
+
+        if self._needed is None:
+            return True
+        raw_type = extract_event_type(line)
+        if raw_type is None:
+            return True
+        return self.needs_any(type_map.get(raw_type, default))
+
+    def __call__(self, event: CoderStreamEvent) -> list[CoderStreamEvent]:
+        """Pipeline stage: drops unrequested events and strips ``originalItem`` when asked to."""
+
+        if self._types is not None and event.get("type") not in self._types:
+            return []
+        if not self._original_item:
+            event.pop("originalItem", None)
+        return [event]
+
+
+def extract_event_type(line: Union[bytes, str]) -> Optional[str]:
+    """Returns the top-level ``"type"`` of a JSON line without parsing it.
+
+    Only the first ``"type"`` key is inspected and only when it sits directly inside the outer
+    object; otherwise ``None`` is returned and the caller should parse the line normally.
+    """
+
+    data = line.encode("utf-8") if isinstance(line, str) else line
+    match = _TYPE_FIELD.search(data)
+    if match is None:
+        return None
+    prefix = data[: match.start()]
+    opening = prefix.find(b"{")
+    if opening == -1 or _NESTING.search(prefix, opening + 1) is not None:
+        return None
+    if b'"' in match.group(1) or b"\\" in match.group(1):
+        return None
+    return match.group(1).decode("utf-8", errors="ignore")
+
@@ -0,0 +1,166 @@
+"""Deterministic hashing helpers used to key cached and coalesced runs."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import subprocess
+from typing import Any, Optional, Sequence
+
+from .types import PromptInput
+
+LOGGER = logging.getLogger(__name__)
+HASH_ALGORITHM = "sha256"
+FILE_HASH_CHUNK = 1024 * 1024
+
+
+def canonical_json(value: Any) -> str:
+    """Serialises ``value`` into a stable JSON string (sorted keys, no whitespace)."""
+
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def normalize_prompt_for_key(input: PromptInput) -> str:
+    """Normalises prompt inputs so equivalent prompts hash identically.
+
+    Trailing whitespace on each line and leading/trailing blank lines are ignored; chat-style
+    prompts keep their role ordering.
+    """
+
+    if isinstance(input, str):
+        messages = [("user", input)]
+    else:
+        messages = [(msg["role"], msg["content"]) for msg in input]
+    normalized = []
+    for role, content in messages:
+        lines = [line.rstrip() for line in str(content).strip().splitlines()]
+        normalized.append([role, "\n".join(lines)])
+    return canonical_json(normalized)
+
+
+def hash_parts(*parts: Any) -> str:
+    """Hashes the canonical JSON form of the supplied parts into a hex digest."""
+
+    digest = hashlib.new(HASH_ALGORITHM)
+    digest.update(canonical_json(list(parts)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def compute_run_key(
+    provider: str,
+    input: PromptInput,
+    *,
+    model: Optional[str] = None,
+    output_schema: Optional[dict[str, Any]] = None,
+    sandbox_mode: Optional[str] = None,
+    workspace: Optional[str] = None,
+) -> str:
+    """Computes the content address of a run.
+
+    Args:
+        provider: Provider discriminant (``codex``, ``claude``...).
+        input: Prompt supplied to the run.
+        model: Model override, when any.
+        output_schema: Structured output schema; canonicalised before hashing.
+        sandbox_mode: Sandbox enforcement mode.
+        workspace: Workspace fingerprint from :func:`workspace_fingerprint`.
+    """
+
+    return hash_parts(
+        "run/v1",
+        provider,
+        model,
+        normalize_prompt_for_key(input),
+        output_schema,
+        sandbox_mode,
+        workspace,
+    )
+
+
+def workspace_fingerprint(path: Optional[str] = None) -> Optional[str]:
+    """Fingerprints a git workspace using the HEAD tree plus hashes of dirty files.
+
+    Returns ``None`` when ``path`` is not inside a git repository or git is unavailable, which
+    callers treat as "not cacheable".
+    """
+
+    cwd = path or os.getcwd()
+    head_tree = _git(cwd, ["rev-parse", "HEAD^{tree}"])
+    if head_tree is None:
+        return None
+    status = _git(cwd, ["status", "--porcelain=v1", "-z", "--untracked-files=all"])
+    if status is None:
+        return None
+    toplevel = _git(cwd, ["rev-parse", "--show-toplevel"])
+    root = toplevel.strip() if toplevel else cwd
+    dirty: list[list[str]] = []
+    for entry in _parse_porcelain(status):
+        code, rel_path = entry
+        dirty.append([code, rel_path, _hash_file(os.path.join(root, rel_path))])
+    dirty.sort()
+    return hash_parts("workspace/v1", head_tree.strip(), dirty)
+
+
+async def workspace_fingerprint_async(path: Optional[str] = None) -> Optional[str]:
+    """Runs :func:`workspace_fingerprint` in a worker thread to keep the event loop responsive."""
+
+    return await asyncio.to_thread(workspace_fingerprint, path)
+
+
+def _git(cwd: str, args: Sequence[str]) -> Optional[str]:
+    """Runs a git command and returns stdout, or ``None`` on failure."""
+
+    try:
+        completed = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+    except OSError:
+        return None
+    if completed.returncode != 0:
+        return None
+    return completed.stdout.decode("utf-8", errors="surrogateescape")
+
+
+def _parse_porcelain(status: str) -> list[tuple[str, str]]:
+    """Parses ``git status --porcelain -z`` output into ``(code, path)`` pairs."""
+
+    entries: list[tuple[str, str]] = []
+    records = status.split("\0")
+    index = 0
+    while index < len(records):
+        record = records[index]
+        index += 1
+        if len(record) < 4:
+            continue
+        code, rel_path = record[:2], record[3:]
+        entries.append((code, rel_path))
+        if code[0] in ("R", "C"):
+            # Renames and copies carry the source path as the following record.
+            index += 1
+    return entries
+
+
+def _hash_file(path: str) -> str:
+    """Hashes a file's contents, returning a marker for deleted or unreadable paths."""
+
+    digest = hashlib.new(HASH_ALGORITHM)
+    try:
+        with open(path, "rb") as handle:
+            while True:
+                chunk = handle.read(FILE_HASH_CHUNK)
+                if not chunk:
+                    break
+                digest.update(chunk)
+    except (IsADirectoryError, FileNotFoundError):
+        return "missing"
+    except OSError as exc:
+        LOGGER.debug("Unable to hash workspace file", extra={"path": path, "error": str(exc)})
+        return "unreadable"
+    return digest.hexdigest()
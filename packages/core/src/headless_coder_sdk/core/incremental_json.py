@@ -0,0 +1,227 @@
+"""Incremental JSON parser that surfaces completed members of a streamed JSON document."""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Optional, Union
+
+PathPart = Union[str, int]
+"""Object key or array index locating a value inside the streamed document."""
+
+DEFAULT_MAX_DEPTH = 2
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[,\]} \t\r\n]")
+_WHITESPACE = " \t\r\n"
+_CLOSER_FOR = {"{": "}", "[": "]"}
+
+
+class _Frame:
+    """Parser state for one open object or array, holding the members completed so far."""
+
+    __slots__ = ("kind", "value", "key", "expect")
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.value: Any = {} if kind == "{" else []
+        self.key: PathPart = 0
+        # Objects cycle key -> colon -> value -> comma; arrays cycle value -> comma.
+        self.expect = "key" if kind == "{" else "value"
+
+    def can_close(self) -> bool:
+        return self.expect == "comma" or (
+            not self.value and self.expect == ("key" if self.kind == "{" else "value")
+        )
+
+
+class IncrementalJsonParser:
+    """Parses a JSON document fed in arbitrary chunks and reports values as they complete.
+
+    Text before the first ``{`` or ``[`` (prose, a Markdown fence) is skipped. Each call to
+    :meth:`feed` returns ``(path, value)`` pairs for values that finished in that chunk and sit
+    at most ``max_depth`` levels deep, so with the default depth of two a document such as
+    ``{"summary": "...", "issues": [{...}, {...}]}`` reports each issue as soon as its closing
+    brace arrives, followed by ``("issues",)`` and ``("summary",)`` when those members finish.
+    Each chunk is scanned once and never retained: containers are assembled from their completed
+    members, so reported containers are shared with :attr:`root` and only the string or number
+    still being read is buffered. On a syntax error the parser discards the candidate and looks
+    for the next document start.
+    """
+
+    def __init__(self, max_depth: int = DEFAULT_MAX_DEPTH) -> None:
+        """Creates a parser reporting values up to ``max_depth`` levels below the root."""
+        self._max_depth = max_depth
+        self._stack: list[_Frame] = []
+        self._token: list[str] = []
+        self._token_kind: Optional[str] = None
+        self._escaped = False
+        self._done = False
+        self._root: Any = None
+
+    @property
+    def done(self) -> bool:
+        """Whether a complete root document has been parsed."""
+
+        return self._done
+
+    @property
+    def root(self) -> Any:
+        """Returns the parsed root document once :attr:`done` is true."""
+
+        return self._root
+
+    def feed(self, chunk: str) -> list[tuple[tuple[PathPart, ...], Any]]:
+        """Consumes ``chunk`` and returns the values completed by it."""
+
+        if self._done or not chunk:
+            return []
+        completed: list[tuple[tuple[PathPart, ...], Any]] = []
+        self._scan(chunk, completed)
+        return completed
+
+    def _scan(self, text: str, completed: list[tuple[tuple[PathPart, ...], Any]]) -> None:
+        end = len(text)
+        pos = 0
+        # Start of the pending string or scalar within ``text``; earlier pieces sit in ``_token``.
+        token_start = 0
+        if self._escaped:
+            self._escaped = False
+            pos = 1
+        while pos < end:
+            if self._token_kind == "scalar":
+                match = _SCALAR_END.search(text, pos)
+                if match is None:
+                    break
+                pos = match.start()
+                if not self._finish_token(text[token_start:pos], completed):
+                    pos = self._restart(pos)
+                continue
+            if self._token_kind is not None:
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    break
+                index = match.start()
+                if text[index] == "\\":
+                    if index + 1 >= end:
+                        self._escaped = True
+                        break
+                    pos = index + 2
+                    continue
+                pos = index + 1
+                if not self._finish_token(text[token_start:pos], completed):
+                    pos = self._restart(index)
+                continue
+            if not self._stack:
+                start = _find_root_start(text, pos)
+                if start == -1:
+                    break
+                self._stack.append(_Frame(text[start]))
+                pos = start + 1
+                continue
+            char = text[pos]
+            frame = self._stack[-1]
+            if char in _WHITESPACE:
+                pos += 1
+                continue
+            if char == '"':
+                if frame.expect not in ("key", "value"):
+                    pos = self._restart(pos)
+                    continue
+                self._token_kind = "key" if frame.expect == "key" else "string"
+                token_start = pos
+                pos += 1
+                continue
+            if char in "{[":
+                if frame.expect != "value":
+                    pos = self._restart(pos)
+                    continue
+                self._stack.append(_Frame(char))
+                pos += 1
+                continue
+            if char in "}]":
+                if char != _CLOSER_FOR[frame.kind] or not frame.can_close():
+                    pos = self._restart(pos)
+                    continue
+                self._stack.pop()
+                if not self._stack:
+                    self._root = frame.value
+                    self._done = True
+                    return
+                self._add_value(frame.value, completed)
+                pos += 1
+                continue
+            if char == ":" and frame.expect == "colon":
+                frame.expect = "value"
+                pos += 1
+                continue
+            if char == "," and frame.expect == "comma":
+                if frame.kind == "{":
+                    frame.expect = "key"
+                else:
+                    frame.expect = "value"
+                    frame.key = int(frame.key) + 1
+                pos += 1
+                continue
+            if frame.expect == "value" and char not in ",:":
+                self._token_kind = "scalar"
+                token_start = pos
+                pos += 1
+                continue
+            pos = self._restart(pos)
+        if self._token_kind is not None:
+            self._token.append(text[token_start:])
+
+    def _finish_token(self, tail: str, completed: list[tuple[tuple[PathPart, ...], Any]]) -> bool:
+        """Parses the finished string or scalar; returns ``False`` on invalid JSON."""
+
+        kind = self._token_kind
+        if self._token:
+            self._token.append(tail)
+            tail = "".join(self._token)
+            self._token = []
+        self._token_kind = None
+        try:
+            value = json.loads(tail)
+        except ValueError:
+            return False
+        if kind == "key":
+            frame = self._stack[-1]
+            frame.key = value
+            frame.expect = "colon"
+        else:
+            self._add_value(value, completed)
+        return True
+
+    def _add_value(self, value: Any, completed: list[tuple[tuple[PathPart, ...], Any]]) -> None:
+        """Stores a finished value in the innermost frame and reports it when shallow enough."""
+
+        frame = self._stack[-1]
+        if frame.kind == "{":
+            frame.value[frame.key] = value
+        else:
+            frame.value.append(value)
+        frame.expect = "comma"
+        if len(self._stack) <= self._max_depth:
+            completed.append((tuple(item.key for item in self._stack), value))
+
+    def _restart(self, pos: int) -> int:
+        """Drops the current candidate and returns the position to resume searching from."""
+
+        self._stack.clear()
+        self._token = []
+        self._token_kind = None
+        self._escaped = False
+        return pos + 1
+
+
+def _find_root_start(text: str, pos: int = 0) -> int:
+    """Returns the index of the first ``{`` or ``[`` in ``text`` at or after ``pos``, or ``-1``."""
+
+    brace = text.find("{", pos)
+    bracket = text.find("[", pos)
+    if brace == -1:
+        return bracket
+    if bracket == -1:
+        return brace
+    return min(brace, bracket)
+
@@ -0,0 +1,228 @@
+"""Extraction and repair of JSON payloads embedded in free-form assistant responses."""
+
+from __future__ import annotations
+
+import heapq
+import json
+import re
+from typing import Any, NamedTuple, Optional
+
+from .validation import get_validator
+
+MAX_CANDIDATES = 64
+"""Number of bracket groups (the longest ones) parsed per response so pathological prose stays cheap."""
+
+_FENCE_LINE = re.compile(r"^[ \t]*```[ \t]*([^\n`]*?)[ \t]*\r?$", re.MULTILINE)
+_JSON_FENCE_TAGS = frozenset({"", "json", "json5", "jsonc"})
+_OPENERS = re.compile(r"[{\[]")
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_CLOSER_FOR = {"{": "}", "[": "]"}
+_REPAIR_TOKENS = re.compile(
+    r'"(?:[^"\\]|\\.)*"'  # double quoted string
+    r"|'(?:[^'\\]|\\.)*'"  # single quoted string
+    r"|//[^\n]*"  # line comment
+    r"|/\*.*?\*/"  # block comment
+    r"|[A-Za-z_][A-Za-z0-9_]*"  # bare word
+    r"|[\]}]"  # closers (trailing comma removal)
+    r"|[^\"'/A-Za-z_\]}]+"  # everything else, in runs
+    r"|.",
+    re.DOTALL,
+)
+_WORD_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class _Candidate(NamedTuple):
+    text: str
+    fenced: bool
+
+
+class _Parsed(NamedTuple):
+    value: Any
+    fenced: bool
+    repaired: bool
+    length: int
+
+
+def extract_json_payload(text: Optional[str], schema: Any = None) -> Any:
+    """Returns the JSON payload embedded in ``text`` or ``None``.
+
+    Candidates are fenced code blocks first, then every balanced ``{...}``/``[...]`` group found
+    by a single linear scan of the text. Candidates that fail to parse go through
+    :func:`repair_json`. When ``schema`` is given the candidate with the fewest validation errors
+    wins; ties prefer fenced, unrepaired and longer candidates.
+    """
+
+    if not text:
+        return None
+    validator = get_validator(schema) if schema is not None else None
+    best: Optional[tuple[tuple[int, ...], Any]] = None
+    seen: set[str] = set()
+    for candidate in _iter_candidates(text):
+        if candidate.text in seen:
+            continue
+        seen.add(candidate.text)
+        parsed = _parse_candidate(candidate)
+        if parsed is None:
+            continue
+        errors = len(validator(parsed.value)) if validator is not None else 0
+        score = (-errors, int(parsed.fenced), int(not parsed.repaired), parsed.length)
+        if best is None or score > best[0]:
+            best = (score, parsed.value)
+        if errors == 0 and parsed.fenced and not parsed.repaired:
+            break
+    return best[1] if best is not None else None
+
+
+def repair_json(text: str) -> str:
+    """Rewrites common near-JSON mistakes into valid JSON.
+
+    Handles comments, single-quoted strings, Python literals (``True``/``False``/``None``) and
+    trailing commas before ``}`` or ``]``. Text that is already valid JSON comes back unchanged.
+    """
+
+    out: list[str] = []
+    for match in _REPAIR_TOKENS.finditer(text):
+        token = match.group(0)
+        head = token[0]
+        if head == "'":
+            out.append(json.dumps(_unescape_single_quoted(token[1:-1]), ensure_ascii=False))
+        elif head == "/" and token[:2] in ("//", "/*"):
+            continue
+        elif head in "]}":
+            _drop_trailing_comma(out)
+            out.append(token)
+        elif head.isalpha() or head == "_":
+            out.append(_WORD_LITERALS.get(token, token))
+        else:
+            out.append(token)
+    return "".join(out)
+
+
+def _iter_candidates(text: str):
+    for body in _fenced_blocks(text):
+        if body[:1] in ("{", "["):
+            yield _Candidate(body, True)
+    spans = _balanced_spans(text)
+    if len(spans) > MAX_CANDIDATES:
+        spans = heapq.nlargest(MAX_CANDIDATES, spans, key=lambda span: span[1] - span[0])
+    for start, end in spans:
+        yield _Candidate(text[start:end], False)
+
+
+def _fenced_blocks(text: str) -> list[str]:
+    """Returns the stripped bodies of fenced blocks tagged as JSON (or untagged).
+
+    Fence lines are paired in order, so the closing fence of a ``python`` block is never mistaken
+    for the opening of the next block.
+    """
+
+    blocks: list[str] = []
+    opening: Optional[re.Match[str]] = None
+    for match in _FENCE_LINE.finditer(text):
+        if opening is None:
+            opening = match
+            continue
+        if opening.group(1).lower() in _JSON_FENCE_TAGS:
+            blocks.append(text[opening.end() : match.start()].strip())
+        opening = None
+    return blocks
+
+
+def _balanced_spans(text: str) -> list[tuple[int, int]]:
+    """Returns outermost balanced bracket groups in one pass over ``text``.
+
+    Only double-quoted strings are tracked, and only inside a group, so apostrophes in prose never
+    hide a payload; single-quoted strings are left to :func:`repair_json`. When the outermost
+    group never closes (a stray ``[`` in prose, a truncated response), its closed
+    direct children are returned instead.
+    """
+
+    spans: list[tuple[int, int]] = []
+    children: list[tuple[int, int]] = []
+    stack: list[tuple[str, int]] = []
+    length = len(text)
+    pos = 0
+    while pos < length:
+        if not stack:
+            match = _OPENERS.search(text, pos)
+            if match is None:
+                break
+            stack.append((match.group(0), match.start()))
+            children = []
+            pos = match.end()
+            continue
+        match = _STRUCTURAL.search(text, pos)
+        if match is None:
+            break
+        char = match.group(0)
+        pos = match.end()
+        if char == '"':
+            pos = _skip_string(text, pos)
+            continue
+        if char in "{[":
+            stack.append((char, match.start()))
+            continue
+        opener, start = stack.pop()
+        if _CLOSER_FOR[opener] != char:
+            if children:
+                spans.extend(children)
+            stack.clear()
+            continue
+        if not stack:
+            spans.append((start, pos))
+        elif len(stack) == 1:
+            children.append((start, pos))
+    if stack:
+        spans.extend(children)
+    return spans
+
+
+def _skip_string(text: str, pos: int) -> int:
+    """Returns the index after the string closing at or after ``pos`` (end of text if unterminated)."""
+
+    length = len(text)
+    while pos < length:
+        index = text.find('"', pos)
+        if index == -1:
+            return length
+        backslashes = 0
+        cursor = index - 1
+        while cursor >= pos and text[cursor] == "\\":
+            backslashes += 1
+            cursor -= 1
+        if backslashes % 2 == 0:
+            return index + 1
+        pos = index + 1
+    return length
+
+
+def _parse_candidate(candidate: _Candidate) -> Optional[_Parsed]:
+    try:
+        return _Parsed(json.loads(candidate.text), candidate.fenced, False, len(candidate.text))
+    except ValueError:
+        pass
+    try:
+        value = json.loads(repair_json(candidate.text))
+    except ValueError:
+        return None
+    return _Parsed(value, candidate.fenced, True, len(candidate.text))
+
+
+def _unescape_single_quoted(body: str) -> str:
+    """Decodes the body of a single-quoted string using JSON escape rules."""
+
+    try:
+        return json.loads('"' + body.replace("\\'", "'").replace('"', '\\"') + '"')
+    except ValueError:
+        return body
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    index = len(out) - 1
+    while index >= 0 and not out[index].strip():
+        index -= 1
+    if index < 0:
+        return
+    stripped = out[index].rstrip()
+    if stripped.endswith(","):
+        out[index] = stripped[:-1]
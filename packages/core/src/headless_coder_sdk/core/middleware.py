@@ -0,0 +1,263 @@
+"""Cross-cutting hooks adapters invoke around every spawn, stdout read, event and finished run."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from .tracking import RunSnapshot
+from .types import CoderStreamEvent, Provider, RunOpts, RunResult
+
+LOGGER = logging.getLogger(__name__)
+_GLOBAL_MIDDLEWARE: list["RunMiddleware"] = []
+_VERSION = 0
+_LOCK = threading.RLock()
+
+
+@dataclass
+class SpawnRequest:
+    """Mutable description of the provider process an adapter is about to start.
+
+    Attributes:
+        provider: Adapter name.
+        binary: CLI executable, or ``None`` for SDK-driven adapters.
+        args: Command-line arguments; CLI adapters pass the updated list to the process.
+        env: Environment of the process.
+        cwd: Working directory, when the adapter sets one.
+        options: SDK options object for SDK-driven adapters (Claude), mutable in place.
+        run_opts: Options of the run being started.
+    """
+
+    provider: Provider
+    binary: Optional[str]
+    args: list[str]
+    env: dict[str, str]
+    cwd: Optional[str] = None
+    options: Any = None
+    run_opts: Optional[RunOpts] = None
+
+
+@dataclass(frozen=True)
+class RunReport:
+    """Outcome of a finished run handed to :meth:`RunMiddleware.after_run`.
+
+    Attributes:
+        snapshot: Final progress of the run; ``elapsed_ms`` is its duration.
+        result: The :class:`RunResult` of a blocking ``run()``; ``None`` for streams.
+        error: Exception the run ended with, if any (closing a stream early is not an error).
+    """
+
+    snapshot: RunSnapshot
+    result: Optional[RunResult] = None
+    error: Optional[BaseException] = None
+
+    @classmethod
+    def capture(
+        cls,
+        snapshot: RunSnapshot,
+        result: Optional[RunResult] = None,
+        error: Optional[BaseException] = None,
+    ) -> "RunReport":
+        """Builds a report from the error the run itself raised; ``GeneratorExit`` is not an error."""
+
+        if isinstance(error, GeneratorExit):
+            error = None
+        return cls(snapshot, result, error)
+
+
+class RunMiddleware:
+    """Base class for run middleware; override only the hooks you need.
+
+    Hooks left at their base implementation are never dispatched, so a middleware that only
+    implements :meth:`after_run` adds nothing to the per-event path.
+    """
+
+    def before_spawn(self, request: SpawnRequest) -> None:
+        """Inspects or mutates ``request`` (arguments, environment, SDK options) before spawning."""
+
+    def on_event(self, event: CoderStreamEvent) -> Optional[CoderStreamEvent]:
+        """Inspects, transforms or drops (by returning ``None``) a normalised stream event."""
+
+        return event
+
+    def on_stdout_chunk(self, chunk: bytes) -> None:
+        """Observes each raw chunk read from the CLI's stdout."""
+
+    def after_run(self, report: RunReport) -> None:
+        """Inspects a finished run; exceptions raised here are logged, never propagated."""
+
+
+def _overrides(middleware: RunMiddleware, hook: str) -> bool:
+    return getattr(type(middleware), hook) is not getattr(RunMiddleware, hook)
+
+
+class MiddlewareChain:
+    """Dispatch precompiled from a middleware list.
+
+    Each attribute is ``None`` when no middleware implements the hook, or a single callable
+    running every implementation in registration order. Adapters check an attribute once per
+    run; :attr:`event_stage` plugs into :class:`~headless_coder_sdk.core.pipeline.EventPipeline`.
+    """
+
+    __slots__ = ("before_spawn", "event_stage", "on_stdout_chunk", "after_run")
+
+    def __init__(self, middleware: Sequence[RunMiddleware]) -> None:
+        """Compiles the hooks implemented by ``middleware``."""
+        spawn_hooks = [m.before_spawn for m in middleware if _overrides(m, "before_spawn")]
+        event_hooks = [m.on_event for m in middleware if _overrides(m, "on_event")]
+        chunk_hooks = [m.on_stdout_chunk for m in middleware if _overrides(m, "on_stdout_chunk")]
+        after_hooks = [m.after_run for m in middleware if _overrides(m, "after_run")]
+        self.before_spawn: Optional[Callable[[SpawnRequest], None]] = _sequence(spawn_hooks)
+        self.event_stage: Optional[Callable[[CoderStreamEvent], list[CoderStreamEvent]]] = (
+            _event_stage(event_hooks) if event_hooks else None
+        )
+        self.on_stdout_chunk: Optional[Callable[[bytes], None]] = _sequence(chunk_hooks)
+        self.after_run: Optional[Callable[[RunReport], None]] = (
+            _guarded(after_hooks) if after_hooks else None
+        )
+
+    @classmethod
+    def compile(cls, middleware: Sequence[RunMiddleware]) -> Optional["MiddlewareChain"]:
+        """Returns the chain for ``middleware``, or ``None`` when no hook is implemented."""
+
+        chain = cls(middleware)
+        if chain.before_spawn or chain.event_stage or chain.on_stdout_chunk or chain.after_run:
+            return chain
+        return None
+
+    def prepare_spawn(self, request: SpawnRequest) -> SpawnRequest:
+        """Runs the ``before_spawn`` hooks on ``request`` and returns it."""
+
+        if self.before_spawn is not None:
+            self.before_spawn(request)
+        return request
+
+    def tap_stdout(self, reader: Any) -> Any:
+        """Wraps ``reader`` so every chunk it returns reaches ``on_stdout_chunk``."""
+
+        if self.on_stdout_chunk is None or reader is None:
+            return reader
+        return _TappedReader(reader, self.on_stdout_chunk)
+
+
+class _TappedReader:
+    """Stream reader proxy reporting each chunk read."""
+
+    def __init__(self, reader: Any, on_chunk: Callable[[bytes], None]) -> None:
+        self._reader = reader
+        self._on_chunk = on_chunk
+
+    async def read(self, n: int = -1) -> bytes:
+        chunk = await self._reader.read(n)
+        if chunk:
+            self._on_chunk(chunk)
+        return chunk
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._reader, name)
+
+
+def _sequence(hooks: list[Callable[[Any], None]]) -> Optional[Callable[[Any], None]]:
+    if not hooks:
+        return None
+    if len(hooks) == 1:
+        return hooks[0]
+
+    def _run_all(value: Any) -> None:
+        for hook in hooks:
+            hook(value)
+
+    return _run_all
+
+
+def _event_stage(
+    hooks: list[Callable[[CoderStreamEvent], Optional[CoderStreamEvent]]],
+) -> Callable[[CoderStreamEvent], list[CoderStreamEvent]]:
+    def _stage(event: CoderStreamEvent) -> list[CoderStreamEvent]:
+        current: Optional[CoderStreamEvent] = event
+        for hook in hooks:
+            current = hook(current)
+            if current is None:
+                return []
+        return [current]
+
+    return _stage
+
+
+def _guarded(hooks: list[Callable[[RunReport], None]]) -> Callable[[RunReport], None]:
+    def _run_all(report: RunReport) -> None:
+        for hook in hooks:
+            try:
+                hook(report)
+            except Exception:  # logged rather than raised so the run's own outcome is kept
+                LOGGER.exception("after_run middleware failed")
+
+    return _run_all
+
+
+def register_middleware(middleware: RunMiddleware) -> None:
+    """Adds ``middleware`` to every adapter's runs, after previously registered middleware."""
+
+    global _VERSION
+    with _LOCK:
+        _GLOBAL_MIDDLEWARE.append(middleware)
+        _VERSION += 1
+
+
+def unregister_middleware(middleware: RunMiddleware) -> None:
+    """Removes globally registered ``middleware`` when present."""
+
+    global _VERSION
+    with _LOCK:
+        if middleware in _GLOBAL_MIDDLEWARE:
+            _GLOBAL_MIDDLEWARE.remove(middleware)
+            _VERSION += 1
+
+
+def clear_middleware() -> None:
+    """Removes every globally registered middleware, primarily used in tests."""
+
+    global _VERSION
+    with _LOCK:
+        _GLOBAL_MIDDLEWARE.clear()
+        _VERSION += 1
+
+
+class MiddlewareStack:
+    """Middleware of one coder, applied after the global middleware.
+
+    :meth:`chain` recompiles only when this stack or the global list changed, so adapters can
+    call it for every run.
+    """
+
+    def __init__(self, middleware: Optional[Iterable[RunMiddleware]] = None) -> None:
+        """Creates the stack with ``middleware`` in order."""
+        self._middleware = list(middleware or [])
+        self._version = -1
+        self._chain: Optional[MiddlewareChain] = None
+
+    def use(self, middleware: RunMiddleware) -> None:
+        """Appends ``middleware`` to this coder's stack."""
+
+        self._middleware.append(middleware)
+        self._version = -1
+
+    def remove(self, middleware: RunMiddleware) -> None:
+        """Removes ``middleware`` from this coder's stack when present."""
+
+        if middleware in self._middleware:
+            self._middleware.remove(middleware)
+            self._version = -1
+
+    def chain(self) -> Optional[MiddlewareChain]:
+        """Returns the compiled chain, or ``None`` when no hook applies to this coder."""
+
+        if self._version != _VERSION:
+            with _LOCK:
+                version = _VERSION
+                middleware = [*_GLOBAL_MIDDLEWARE, *self._middleware]
+            self._chain = MiddlewareChain.compile(middleware)
+            self._version = version
+        return self._chain
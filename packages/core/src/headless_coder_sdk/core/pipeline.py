@@ -0,0 +1,248 @@
+"""Optional per-run stages applied to normalised stream events before they reach consumers."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional, Sequence
+
+from .compact import compact_event
+from .event_filter import EventFilter
+from .incremental_json import IncrementalJsonParser, PathPart
+from .json_extract import extract_json_payload
+from .spill import SpillStage
+from .types import CoderStreamEvent, Provider, RunOpts, now
+from .validation import Validator, _format_path, get_validator
+
+if TYPE_CHECKING:
+    from .middleware import MiddlewareChain
+
+Stage = Callable[[CoderStreamEvent], list[CoderStreamEvent]]
+"""A stage maps one event to zero or more events (the input itself, extras, or nothing)."""
+
+
+class EventPipeline:
+    """Chains the stages requested through :class:`RunOpts` for a single streamed run.
+
+    Adapters build the pipeline once per run with :meth:`from_run_opts`, which returns ``None``
+    when no stage is enabled so the default streaming path stays untouched. Stages declare the
+    event types they inspect through a ``consumes`` attribute so an ``eventFilter`` never starves
+    them; the filter runs after them and is exposed as :attr:`event_filter`. Surviving events
+    then pass through the ``on_event`` middleware, have oversized payloads spilled to disk
+    (``spill``) and, with ``compact`` enabled, are converted into
+    :class:`~headless_coder_sdk.core.compact.CompactEvent` objects.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        event_filter: Optional[EventFilter] = None,
+        compact: bool = False,
+        spill: Optional[SpillStage] = None,
+        middleware: Optional[Stage] = None,
+    ) -> None:
+        """Creates a pipeline running ``stages`` in order, then ``event_filter`` when given."""
+        chain = list(stages)
+        if event_filter is not None:
+            chain.append(event_filter)
+        if middleware is not None:
+            chain.append(middleware)
+        if spill is not None:
+            chain.append(spill)
+        if compact:
+            chain.append(compact_event)
+        self._stages = tuple(chain)
+        self.event_filter = event_filter
+        self.compact = compact
+
+    @classmethod
+    def from_run_opts(
+        cls,
+        provider: Provider,
+        run_opts: Optional[RunOpts],
+        middleware: Optional["MiddlewareChain"] = None,
+    ) -> Optional["EventPipeline"]:
+        """Builds the pipeline for a run, or returns ``None`` when nothing is enabled."""
+
+        event_stage = middleware.event_stage if middleware is not None else None
+        if not run_opts:
+            return cls([], middleware=event_stage) if event_stage is not None else None
+        stages: list[Stage] = []
+        schema = run_opts.get("outputSchema")
+        if schema and run_opts.get("streamStructuredOutput"):
+            validate = bool(run_opts.get("validateOutput"))
+            stages.append(StructuredDeltaStage(provider, schema, validate=validate))
+        if schema and run_opts.get("validateOutput"):
+            stages.append(OutputValidationStage(provider, schema))
+        consumed: frozenset[str] = frozenset()
+        for stage in stages:
+            consumed |= getattr(stage, "consumes", frozenset())
+        event_filter = EventFilter.from_run_opts(run_opts, required=consumed)
+        compact = bool(run_opts.get("compactEvents"))
+        threshold = run_opts.get("spillThreshold")
+        spill = SpillStage(threshold) if threshold else None
+        if not stages and event_filter is None and not compact and spill is None and event_stage is None:
+            return None
+        return cls(stages, event_filter, compact=compact, spill=spill, middleware=event_stage)
+
+    def feed(self, event: CoderStreamEvent) -> list[CoderStreamEvent]:
+        """Runs ``event`` through every stage and returns the resulting events."""
+
+        events = [event]
+        for stage in self._stages:
+            if len(events) == 1:
+                events = stage(events[0])
+                continue
+            staged: list[CoderStreamEvent] = []
+            for item in events:
+                staged.extend(stage(item))
+            events = staged
+        return events
+
+    def feed_all(self, events: Iterable[CoderStreamEvent]) -> list[CoderStreamEvent]:
+        """Runs several events through the pipeline, preserving order."""
+
+        staged: list[CoderStreamEvent] = []
+        for event in events:
+            staged.extend(self.feed(event))
+        return staged
+
+
+class StructuredDeltaStage:
+    """Parses assistant text incrementally and emits ``structured_delta`` events.
+
+    Each top-level member of the structured payload, and each item of a top-level array member,
+    is reported as soon as it is complete, so consumers can act on the first review issues while
+    the model is still writing the rest. Delta messages are parsed as they stream; a complete
+    message is parsed only when no deltas preceded it, so the same payload is never reported
+    twice. With ``validate`` enabled each value is checked against the matching part of the
+    schema and mismatches are attached as ``validationErrors`` on the event.
+    """
+
+    consumes = frozenset({"message"})
+
+    def __init__(self, provider: Provider, schema: Any, validate: bool = False) -> None:
+        """Creates the stage for ``schema``."""
+        self._provider = provider
+        self._schema = schema
+        self._validate = validate
+        self._parser = IncrementalJsonParser()
+        self._saw_delta = False
+        self._validators: dict[tuple[Optional[str], ...], Optional[Validator]] = {}
+
+    def __call__(self, event: CoderStreamEvent) -> list[CoderStreamEvent]:
+        if event.get("type") != "message" or event.get("role", "assistant") != "assistant":
+            return [event]
+        text = event.get("text") or ""
+        if event.get("delta"):
+            self._saw_delta = True
+            return [event, *self._parse(text)]
+        if self._saw_delta:
+            # The deltas already carried this message; start afresh for the next one.
+            self._reset()
+            return [event]
+        deltas = self._parse(text)
+        self._reset()
+        return [event, *deltas]
+
+    def _parse(self, text: str) -> list[CoderStreamEvent]:
+        if not text:
+            return []
+        if self._parser.done:
+            self._parser = IncrementalJsonParser()
+        return [self._delta_event(path, value) for path, value in self._parser.feed(text)]
+
+    def _reset(self) -> None:
+        self._parser = IncrementalJsonParser()
+        self._saw_delta = False
+
+    def _delta_event(self, path: tuple[PathPart, ...], value: Any) -> CoderStreamEvent:
+        event: CoderStreamEvent = {
+            "type": "structured_delta",
+            "provider": self._provider,
+            "path": list(path),
+            "value": value,
+            "ts": now(),
+        }
+        if self._validate:
+            validator = self._validator_for(path)
+            errors = validator(value) if validator is not None else []
+            if errors:
+                prefix = _format_path(path)
+                event["validationErrors"] = [prefix + error[1:] for error in errors]
+        return event
+
+    def _validator_for(self, path: tuple[PathPart, ...]) -> Optional[Validator]:
+        shape = tuple(None if isinstance(part, int) else part for part in path)
+        if shape not in self._validators:
+            subschema = _subschema(self._schema, shape)
+            self._validators[shape] = get_validator(subschema) if subschema is not None else None
+        return self._validators[shape]
+
+
+class OutputValidationStage:
+    """Validates structured output while streaming and reports mismatches as ``error`` events.
+
+    Every complete assistant message that carries a JSON payload is validated as soon as it
+    arrives, so consumers learn about an invalid payload before the turn finishes. If no payload
+    was seen by the time ``done`` arrives, the accumulated deltas are checked instead.
+    """
+
+    consumes = frozenset({"message", "done"})
+
+    def __init__(self, provider: Provider, schema: Any) -> None:
+        """Creates the stage for ``schema``, compiling (or reusing) its validator."""
+        self._provider = provider
+        self._schema = schema
+        self._validator = get_validator(schema)
+        self._delta_parts: list[str] = []
+        self._validated = False
+
+    def __call__(self, event: CoderStreamEvent) -> list[CoderStreamEvent]:
+        event_type = event.get("type")
+        if event_type == "message" and event.get("role", "assistant") == "assistant":
+            text = event.get("text") or ""
+            if event.get("delta"):
+                self._delta_parts.append(text)
+                return [event]
+            self._delta_parts.clear()
+            payload = extract_json_payload(text, self._schema)
+            if payload is None:
+                return [event]
+            return [event, *self._check(payload)]
+        if event_type == "done" and not self._validated:
+            payload = extract_json_payload("".join(self._delta_parts), self._schema)
+            if payload is None:
+                return [self._error_event(["$: no JSON payload found in the response"], None), event]
+            return [*self._check(payload), event]
+        return [event]
+
+    def _check(self, payload: Any) -> list[CoderStreamEvent]:
+        self._validated = True
+        errors = self._validator(payload)
+        if not errors:
+            return []
+        return [self._error_event(errors, payload)]
+
+    def _error_event(self, errors: list[str], payload: Any) -> CoderStreamEvent:
+        return {
+            "type": "error",
+            "provider": self._provider,
+            "code": "output.schema_mismatch",
+            "message": f"Structured output does not match outputSchema: {errors[0]}",
+            "validationErrors": errors,
+            "ts": now(),
+            "originalItem": {"payload": payload},
+        }
+
+
+def _subschema(schema: Any, shape: tuple[Optional[str], ...]) -> Any:
+    """Resolves the schema of the value at ``shape`` (``None`` standing for an array index)."""
+
+    for part in shape:
+        if not isinstance(schema, dict):
+            return None
+        if part is None:
+            schema = schema.get("items")
+        else:
+            schema = (schema.get("properties") or {}).get(part)
+    return schema if isinstance(schema, (dict, bool)) else None
+
@@ -0,0 +1,278 @@
+"""FIFO turn queue serialising concurrent runs on one thread handle."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from .cancellation import CancellationError, link_signal
+from .stream import EventStream
+from .types import RunOpts, StartOpts
+
+T = TypeVar("T")
+
+DEFAULT_MAX_PENDING = 32
+"""Queued turns accepted per thread when ``queueTurns`` does not set ``maxPending``."""
+
+
+class TurnQueueFullError(RuntimeError):
+    """Raised when a turn is submitted while the queue already holds ``maxPending`` turns."""
+
+    code = "queue_full"
+
+
+@dataclass(frozen=True)
+class TurnQueueStats:
+    """Point-in-time metrics of a :class:`TurnQueue`.
+
+    Attributes:
+        depth: Turns currently waiting (the running turn is not counted).
+        busy: Whether a turn is running.
+        max_depth: Largest depth observed so far.
+        turns: Turns that have started running.
+        total_wait_ms: Sum of the time started turns spent waiting.
+        last_wait_ms: Wait time of the most recently started turn.
+    """
+
+    depth: int
+    busy: bool
+    max_depth: int
+    turns: int
+    total_wait_ms: float
+    last_wait_ms: float
+
+
+class _Ticket:
+    """One turn's place in a :class:`TurnQueue`, from submission until it leaves the queue."""
+
+    __slots__ = ("granted", "claimed", "withdrawn", "waiter", "queued_at", "waited_ms")
+
+    def __init__(self) -> None:
+        self.granted = False
+        self.claimed = False
+        self.withdrawn = False
+        self.waiter: Optional[asyncio.Future[None]] = None
+        self.queued_at = time.perf_counter()
+        self.waited_ms = 0.0
+
+    @property
+    def abandoned(self) -> bool:
+        """Whether the turn gave up waiting (its signal fired) but has not left the queue yet."""
+
+        return self.waiter is not None and self.waiter.done()
+
+
+class TurnQueue:
+    """Runs one turn at a time and queues the rest in submission order.
+
+    A queued turn whose ``signal`` fires leaves the queue and raises :class:`CancellationError`
+    without affecting the running turn or the turns behind it. Submitting a turn while
+    ``max_pending`` turns already wait raises :class:`TurnQueueFullError`.
+    """
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING) -> None:
+        """Creates an idle queue accepting up to ``max_pending`` waiting turns."""
+        if max_pending < 0:
+            raise ValueError("max_pending must be non-negative")
+        self.max_pending = max_pending
+        self._waiters: deque[_Ticket] = deque()
+        self._busy = False
+        self._max_depth = 0
+        self._turns = 0
+        self._total_wait_ms = 0.0
+        self._last_wait_ms = 0.0
+
+    @classmethod
+    def from_start_opts(cls, opts: Optional[StartOpts]) -> Optional["TurnQueue"]:
+        """Builds the queue requested by ``StartOpts["queueTurns"]``, or ``None`` when unset."""
+
+        config = (opts or {}).get("queueTurns")
+        if not config:
+            return None
+        if config is True:
+            return cls()
+        return cls(max_pending=config.get("maxPending", DEFAULT_MAX_PENDING))
+
+    @property
+    def depth(self) -> int:
+        """Number of turns waiting for the running one to finish."""
+
+        return sum(1 for ticket in self._waiters if not ticket.abandoned)
+
+    @property
+    def busy(self) -> bool:
+        """Whether a turn currently holds the queue."""
+
+        return self._busy
+
+    def stats(self) -> TurnQueueStats:
+        """Returns the current depth and wait-time metrics."""
+
+        return TurnQueueStats(
+            depth=self.depth,
+            busy=self._busy,
+            max_depth=self._max_depth,
+            turns=self._turns,
+            total_wait_ms=self._total_wait_ms,
+            last_wait_ms=self._last_wait_ms,
+        )
+
+    async def acquire(self, opts: Optional[RunOpts] = None) -> float:
+        """Waits for the turn's slot and returns the time spent waiting in milliseconds.
+
+        Raises:
+            CancellationError: ``opts["signal"]`` fired before the turn started.
+            TurnQueueFullError: ``max_pending`` turns are already waiting.
+        """
+
+        return await self._wait(self._reserve(opts), opts)
+
+    def release(self) -> None:
+        """Hands the slot to the oldest waiting turn, or marks the queue idle."""
+
+        while self._waiters:
+            ticket = self._waiters.popleft()
+            if ticket.abandoned:
+                continue
+            self._grant(ticket)
+            return
+        self._busy = False
+
+    async def run(self, factory: Callable[[], Awaitable[T]], opts: Optional[RunOpts] = None) -> T:
+        """Awaits ``factory()`` once every turn submitted before it has finished."""
+
+        await self.acquire(opts)
+        try:
+            return await factory()
+        finally:
+            self.release()
+
+    def stream(
+        self,
+        factory: Callable[[], AsyncIterator[T]],
+        opts: Optional[RunOpts] = None,
+    ) -> EventStream[T]:
+        """Iterates ``factory()`` once its turn comes; the slot is held until the stream closes.
+
+        The turn takes its place in the queue when this method is called, so streams and runs
+        start in the order they were submitted even if a stream is iterated later. A stream that is
+        closed or garbage collected before it is iterated gives its place (or slot) back. Queue
+        errors (a full queue, an aborted ``signal``) are raised when the stream is first iterated.
+        """
+
+        try:
+            ticket = self._reserve(opts)
+        except (CancellationError, TurnQueueFullError) as error:
+            return EventStream(_raise(error))
+
+        async def _iterator() -> AsyncIterator[T]:
+            ticket.claimed = True
+            await self._wait(ticket, opts)
+            try:
+                async with EventStream(factory()) as items:
+                    async for item in items:
+                        yield item
+            finally:
+                self.release()
+
+        return _ReservedStream(_iterator(), self, ticket)
+
+    def _reserve(self, opts: Optional[RunOpts]) -> _Ticket:
+        signal = (opts or {}).get("signal")
+        if signal is not None and signal.aborted:
+            raise CancellationError(signal.reason)
+        ticket = _Ticket()
+        if not self._busy and not self._waiters:
+            self._busy = True
+            ticket.granted = True
+            return ticket
+        depth = self.depth
+        if depth >= self.max_pending:
+            raise TurnQueueFullError(f"Turn queue is full ({self.max_pending} turns waiting).")
+        self._max_depth = max(self._max_depth, depth + 1)
+        self._waiters.append(ticket)
+        return ticket
+
+    async def _wait(self, ticket: _Ticket, opts: Optional[RunOpts]) -> float:
+        signal = (opts or {}).get("signal")
+        if not ticket.granted:
+            loop = asyncio.get_running_loop()
+            waiter: asyncio.Future[None] = loop.create_future()
+            ticket.waiter = waiter
+
+            def _on_abort(reason: Optional[str]) -> None:
+                loop.call_soon_threadsafe(_cancel, reason)
+
+            def _cancel(reason: Optional[str]) -> None:
+                if not waiter.done():
+                    waiter.set_exception(CancellationError(reason or "Interrupted"))
+
+            unsubscribe = link_signal(signal, _on_abort)
+            try:
+                await waiter
+            except BaseException:
+                # Leaves the queue, passing the slot on if it was handed over just as the turn gave up.
+                self._withdraw(ticket)
+                raise
+            finally:
+                unsubscribe()
+        elif signal is not None and signal.aborted:
+            # A stream reserved its slot at submission and its signal fired before iteration.
+            self._withdraw(ticket)
+            raise CancellationError(signal.reason)
+        return self._record_start(ticket.waited_ms)
+
+    def _grant(self, ticket: _Ticket) -> None:
+        ticket.granted = True
+        ticket.waited_ms = (time.perf_counter() - ticket.queued_at) * 1000
+        if ticket.waiter is not None and not ticket.waiter.done():
+            ticket.waiter.set_result(None)
+
+    def _withdraw(self, ticket: _Ticket) -> None:
+        if ticket.withdrawn:
+            return
+        ticket.withdrawn = True
+        if ticket.granted:
+            self.release()
+            return
+        with contextlib.suppress(ValueError):
+            self._waiters.remove(ticket)
+
+    def _record_start(self, waited_ms: float) -> float:
+        self._turns += 1
+        self._total_wait_ms += waited_ms
+        self._last_wait_ms = waited_ms
+        return waited_ms
+
+
+class _ReservedStream(EventStream[T]):
+    """Stream returned by :meth:`TurnQueue.stream`, giving back its place if never iterated."""
+
+    __slots__ = ("_queue", "_ticket")
+
+    def __init__(self, iterator: AsyncIterator[T], queue: TurnQueue, ticket: _Ticket) -> None:
+        super().__init__(iterator)
+        self._queue = queue
+        self._ticket = ticket
+
+    async def aclose(self) -> None:
+        self._give_back()
+        await super().aclose()
+
+    def __del__(self) -> None:
+        self._give_back()
+
+    def _give_back(self) -> None:
+        # Once iterated, the generator's own cleanup releases the slot.
+        if not self._ticket.claimed:
+            self._ticket.claimed = True
+            self._queue._withdraw(self._ticket)
+
+
+async def _raise(error: BaseException) -> AsyncIterator[Any]:
+    raise error
+    yield  # pragma: no cover - makes this an async generator
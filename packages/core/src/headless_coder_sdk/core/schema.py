@@ -0,0 +1,177 @@
+"""Registry that canonicalises output schemas once and caches their serialised forms."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .fingerprint import canonical_json
+
+LOGGER = logging.getLogger(__name__)
+CACHE_DIR_ENV = "HEADLESS_CODER_CACHE_DIR"
+DEFAULT_MAX_SCHEMAS = 256
+
+
+@dataclass(frozen=True)
+class RegisteredSchema:
+    """Canonical view of a schema plus its cached serialisations."""
+
+    hash: str
+    canonical: str
+    snippet: str
+
+
+class SchemaRegistry:
+    """Canonicalises, hashes and caches ``outputSchema`` payloads across runs.
+
+    Lookups first try an identity fast path (the same dict object passed again) guarded by an
+    equality check, so mutated schemas are re-registered rather than served stale. Schema files are
+    content addressed under ``<cache_dir>/schemas/<hash>.json`` and shared by every run and process
+    using the same cache directory.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = DEFAULT_MAX_SCHEMAS) -> None:
+        """Creates a registry.
+
+        Args:
+            cache_dir: Directory for materialised schema files. Defaults to
+                ``$HEADLESS_CODER_CACHE_DIR`` or ``$XDG_CACHE_HOME/headless-coder-sdk``.
+            max_entries: Number of schemas kept in memory before evicting the least recently used.
+        """
+        self._cache_dir = cache_dir or default_cache_dir()
+        self._max_entries = max_entries
+        self._by_hash: OrderedDict[str, RegisteredSchema] = OrderedDict()
+        self._by_identity: dict[int, tuple[Any, Any, RegisteredSchema]] = {}
+        self._paths: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache_dir(self) -> str:
+        """Returns the directory under which schema files are written."""
+
+        return self._cache_dir
+
+    def register(self, schema: Any) -> RegisteredSchema:
+        """Returns the canonical registration for ``schema``, computing it at most once."""
+
+        with self._lock:
+            cached = self._by_identity.get(id(schema))
+            if cached is not None and cached[0] is schema and cached[1] == schema:
+                return cached[2]
+        canonical = canonical_json(schema)
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        with self._lock:
+            entry = self._by_hash.get(digest)
+            if entry is None:
+                snippet = json.dumps(schema, indent=2)
+                entry = RegisteredSchema(hash=digest, canonical=canonical, snippet=snippet)
+                self._by_hash[digest] = entry
+                while len(self._by_hash) > self._max_entries:
+                    self._by_hash.popitem(last=False)
+            else:
+                self._by_hash.move_to_end(digest)
+            if len(self._by_identity) >= self._max_entries:
+                self._by_identity.clear()
+            self._by_identity[id(schema)] = (schema, copy.deepcopy(schema), entry)
+        return entry
+
+    def schema_hash(self, schema: Any) -> str:
+        """Returns the content hash of ``schema``."""
+
+        return self.register(schema).hash
+
+    def prompt_snippet(self, schema: Any) -> str:
+        """Returns the pretty-printed schema used in structured output instructions."""
+
+        return self.register(schema).snippet
+
+    async def schema_path(self, schema: Any) -> str:
+        """Returns the path of the content-addressed schema file, writing it off the event loop."""
+
+        entry = self.register(schema)
+        path = self._paths.get(entry.hash)
+        if path is not None and os.path.exists(path):
+            return path
+        return await asyncio.to_thread(self._materialise, entry)
+
+    def schema_path_sync(self, schema: Any) -> str:
+        """Synchronous variant of :meth:`schema_path`."""
+
+        entry = self.register(schema)
+        path = self._paths.get(entry.hash)
+        if path is not None and os.path.exists(path):
+            return path
+        return self._materialise(entry)
+
+    def _materialise(self, entry: RegisteredSchema) -> str:
+        """Writes the schema file when missing and remembers its location."""
+
+        try:
+            path = _write_schema_file(os.path.join(self._cache_dir, "schemas"), entry)
+        except OSError as exc:
+            LOGGER.debug("Schema cache dir unavailable, using temp dir", extra={"error": str(exc)})
+            fallback = os.path.join(tempfile.gettempdir(), f"headless-coder-sdk-{os.getpid()}", "schemas")
+            path = _write_schema_file(fallback, entry)
+        self._paths[entry.hash] = path
+        return path
+
+
+def default_cache_dir() -> str:
+    """Returns the persistent cache directory shared by SDK components."""
+
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return override
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "headless-coder-sdk")
+
+
+_DEFAULT_REGISTRY: Optional[SchemaRegistry] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_schema_registry() -> SchemaRegistry:
+    """Returns the process-wide schema registry used by the adapters."""
+
+    global _DEFAULT_REGISTRY
+    with _DEFAULT_LOCK:
+        if _DEFAULT_REGISTRY is None:
+            _DEFAULT_REGISTRY = SchemaRegistry()
+        return _DEFAULT_REGISTRY
+
+
+def set_schema_registry(registry: Optional[SchemaRegistry]) -> None:
+    """Replaces the process-wide registry; ``None`` resets it to a fresh default."""
+
+    global _DEFAULT_REGISTRY
+    with _DEFAULT_LOCK:
+        _DEFAULT_REGISTRY = registry
+
+
+def _write_schema_file(directory: str, entry: RegisteredSchema) -> str:
+    """Atomically writes ``entry`` under ``directory`` unless an identical file already exists."""
+
+    path = os.path.join(directory, f"{entry.hash}.json")
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(entry.snippet)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+    return path
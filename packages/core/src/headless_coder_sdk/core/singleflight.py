@@ -0,0 +1,309 @@
+"""Single-flight coalescing of identical concurrent runs onto one provider execution."""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+import os
+from typing import Any, AsyncIterator, Optional
+
+from .cancellation import AbortController, CancellationError, link_signal
+from .fingerprint import compute_run_key, workspace_fingerprint_async
+from .stream import EventStream
+from .types import (
+    CoderStreamEvent,
+    EventIterator,
+    PromptInput,
+    RunOpts,
+    RunResult,
+    StartOpts,
+    ThreadHandle,
+    now,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _Flight:
+    """Shared bookkeeping for one coalesced provider execution."""
+
+    def __init__(self, group: "SingleFlight", key: tuple[str, str]) -> None:
+        self.group = group
+        self.key = key
+        self.controller = AbortController()
+        self.waiters = 0
+        self.done = False
+
+    def join(self) -> None:
+        self.waiters += 1
+
+    def leave(self, reason: Optional[str]) -> None:
+        """Drops one waiter and aborts the shared run once nobody is left waiting."""
+
+        self.waiters -= 1
+        if self.waiters <= 0 and not self.done:
+            self.group._forget(self)
+            self.controller.abort(reason or "All waiters cancelled")
+
+
+class _RunFlight(_Flight):
+    """Flight backing coalesced :meth:`ThreadHandle.run` calls."""
+
+    def __init__(self, group: "SingleFlight", key: tuple[str, str], thread: ThreadHandle) -> None:
+        super().__init__(group, key)
+        self.thread = thread
+        self.task: Optional[asyncio.Task[RunResult]] = None
+
+    def start(self, input: PromptInput, opts: RunOpts) -> None:
+        shared_opts: RunOpts = {**opts, "signal": self.controller.signal}
+        self.task = asyncio.ensure_future(self.thread.run(input, shared_opts))
+        self.task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: "asyncio.Task[RunResult]") -> None:
+        self.done = True
+        self.group._forget(self)
+        if not task.cancelled():
+            # Mark the exception as retrieved; abandoned flights have nobody left to observe it.
+            task.exception()
+
+
+class _StreamFlight(_Flight):
+    """Flight that records a provider stream and fans it out to every subscriber."""
+
+    def __init__(self, group: "SingleFlight", key: tuple[str, str], thread: ThreadHandle) -> None:
+        super().__init__(group, key)
+        self.thread = thread
+        self.events: list[CoderStreamEvent] = []
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task[None]] = None
+        self._changed: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+    def start(self, input: PromptInput, opts: RunOpts) -> None:
+        shared_opts: RunOpts = {**opts, "signal": self.controller.signal}
+        self.task = asyncio.ensure_future(self._pump(input, shared_opts))
+
+    def changed(self) -> "asyncio.Future[None]":
+        return self._changed
+
+    async def _pump(self, input: PromptInput, opts: RunOpts) -> None:
+        try:
+            async with EventStream(self.thread.run_streamed(input, opts)) as events:
+                async for event in events:
+                    self.events.append(event)
+                    self._notify()
+        except BaseException as exc:  # noqa: BLE001 - re-raised to every subscriber
+            self.error = exc
+        finally:
+            self.done = True
+            self.group._forget(self)
+            self._notify()
+
+    def _notify(self) -> None:
+        waker = self._changed
+        self._changed = asyncio.get_running_loop().create_future()
+        if not waker.done():
+            waker.set_result(None)
+
+
+class SingleFlight:
+    """Coalesces identical concurrent runs onto a single provider execution.
+
+    The first caller for a key (the leader) executes the run on its own thread handle; callers
+    arriving while it is in flight share its :class:`RunResult` or receive a broadcast of its
+    stream, including events emitted before they joined. Each waiter may cancel through its own
+    ``signal``; the shared run is only aborted once every waiter has cancelled.
+    """
+
+    def __init__(self, fingerprint_workspace: bool = True) -> None:
+        """Creates a coalescing group.
+
+        Args:
+            fingerprint_workspace: Whether keys include the git workspace fingerprint. When
+                disabled, the working directory path stands in for the workspace state.
+        """
+        self._fingerprint_workspace = fingerprint_workspace
+        self._flights: dict[tuple[str, str], _Flight] = {}
+
+    def in_flight(self) -> int:
+        """Returns the number of distinct provider executions currently shared."""
+
+        return len(self._flights)
+
+    async def key_for(
+        self,
+        thread: ThreadHandle,
+        input: PromptInput,
+        opts: Optional[RunOpts] = None,
+        start_opts: Optional[StartOpts] = None,
+    ) -> str:
+        """Computes the coalescing key for a run."""
+
+        start_opts = start_opts or {}
+        working_directory = start_opts.get("workingDirectory") or os.getcwd()
+        workspace = None
+        if self._fingerprint_workspace:
+            workspace = await workspace_fingerprint_async(working_directory)
+        if workspace is None:
+            workspace = f"path:{os.path.abspath(working_directory)}"
+        return compute_run_key(
+            thread.provider,
+            input,
+            model=start_opts.get("model"),
+            output_schema=opts.get("outputSchema") if opts else None,
+            sandbox_mode=start_opts.get("sandboxMode"),
+            workspace=workspace,
+        )
+
+    async def run(
+        self,
+        thread: ThreadHandle,
+        input: PromptInput,
+        opts: Optional[RunOpts] = None,
+        *,
+        start_opts: Optional[StartOpts] = None,
+        key: Optional[str] = None,
+    ) -> RunResult:
+        """Runs ``input`` on ``thread`` or joins an identical run already in flight.
+
+        Args:
+            thread: Handle used when this call becomes the leader.
+            input: Prompt for the run.
+            opts: Run options; ``signal`` cancels only this waiter.
+            start_opts: Start options of ``thread``, used to derive the key.
+            key: Explicit coalescing key overriding the derived one.
+
+        Raises:
+            CancellationError: When this waiter's signal fires before the shared run finishes.
+        """
+
+        opts = opts or {}
+        flight_key = ("run", key or await self.key_for(thread, input, opts, start_opts))
+        flight = self._flights.get(flight_key)
+        if not isinstance(flight, _RunFlight):
+            flight = _RunFlight(self, flight_key, thread)
+            self._flights[flight_key] = flight
+            flight.start(input, opts)
+        flight.join()
+        assert flight.task is not None
+
+        loop = asyncio.get_running_loop()
+        cancelled: asyncio.Future[Optional[str]] = loop.create_future()
+
+        def _on_abort(reason: Optional[str]) -> None:
+            loop.call_soon_threadsafe(_resolve, reason)
+
+        def _resolve(reason: Optional[str]) -> None:
+            if not cancelled.done():
+                cancelled.set_result(reason)
+
+        unsubscribe = link_signal(opts.get("signal"), _on_abort)
+        left = False
+        try:
+            await asyncio.wait({flight.task, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+            if not flight.task.done():
+                reason = cancelled.result()
+                left = True
+                flight.leave(reason)
+                raise CancellationError(reason)
+            return dataclasses.replace(flight.task.result())
+        except asyncio.CancelledError:
+            if not left:
+                left = True
+                flight.leave("Waiter task cancelled")
+            raise
+        finally:
+            unsubscribe()
+            if not left:
+                flight.waiters -= 1
+
+    def run_streamed(
+        self,
+        thread: ThreadHandle,
+        input: PromptInput,
+        opts: Optional[RunOpts] = None,
+        *,
+        start_opts: Optional[StartOpts] = None,
+        key: Optional[str] = None,
+    ) -> EventIterator:
+        """Streams ``input`` on ``thread`` or subscribes to an identical stream already in flight.
+
+        Late subscribers first receive the events emitted so far. A waiter whose ``signal`` fires
+        receives ``cancelled`` and ``error`` events and stops; the shared stream keeps running
+        for the remaining subscribers.
+        """
+
+        opts = opts or {}
+
+        async def _iterator() -> AsyncIterator[CoderStreamEvent]:
+            flight_key = ("stream", key or await self.key_for(thread, input, opts, start_opts))
+            flight = self._flights.get(flight_key)
+            if not isinstance(flight, _StreamFlight):
+                flight = _StreamFlight(self, flight_key, thread)
+                self._flights[flight_key] = flight
+                flight.start(input, opts)
+            flight.join()
+
+            loop = asyncio.get_running_loop()
+            cancelled: asyncio.Future[Optional[str]] = loop.create_future()
+
+            def _on_abort(reason: Optional[str]) -> None:
+                loop.call_soon_threadsafe(_resolve, reason)
+
+            def _resolve(reason: Optional[str]) -> None:
+                if not cancelled.done():
+                    cancelled.set_result(reason)
+
+            unsubscribe = link_signal(opts.get("signal"), _on_abort)
+            position = 0
+            left = False
+            try:
+                while True:
+                    while position < len(flight.events):
+                        event = flight.events[position]
+                        position += 1
+                        yield event
+                    if flight.done:
+                        break
+                    changed = flight.changed()
+                    await asyncio.wait({changed, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+                    if cancelled.done() and not flight.done:
+                        reason = cancelled.result() or "Interrupted"
+                        left = True
+                        flight.leave(reason)
+                        for event in _cancelled_events(thread.provider, reason):
+                            yield event
+                        return
+                if flight.error is not None:
+                    raise flight.error
+            finally:
+                unsubscribe()
+                if not left:
+                    # Consumers that stop iterating early count as cancelled waiters.
+                    if flight.done:
+                        flight.waiters -= 1
+                    else:
+                        flight.leave("Subscriber closed the stream")
+
+        return EventStream(_iterator())
+
+    def _forget(self, flight: _Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+
+def _cancelled_events(provider: Any, reason: str) -> list[CoderStreamEvent]:
+    """Builds the cancelled/error pair emitted to a waiter that left a shared stream."""
+
+    ts = now()
+    return [
+        {"type": "cancelled", "provider": provider, "ts": ts, "originalItem": {"reason": reason}},
+        {
+            "type": "error",
+            "provider": provider,
+            "code": "interrupted",
+            "message": reason,
+            "ts": ts,
+            "originalItem": {"reason": reason},
+        },
+    ]
@@ -0,0 +1,204 @@
+"""Disk-backed storage for oversized event payloads (tool output, raw provider items)."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from typing import IO, Any, Optional, Sequence
+
+from .types import CoderStreamEvent
+
+DEFAULT_SPILL_FIELDS = ("result", "originalItem")
+"""Event fields inspected by :class:`SpillStage` unless configured otherwise."""
+
+DEFAULT_PREVIEW_CHARS = 256
+
+
+class SpillFile:
+    """Append-only anonymous temporary file holding the spilled payloads of one run.
+
+    The file is created on the first write and deleted by the OS once it is closed, which happens
+    when the last :class:`SpilledPayload` referencing it is garbage collected. Reads use
+    ``os.pread`` so they never move the write position and are safe from any thread.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        """Creates the spill file lazily inside ``directory`` (the system temp dir by default)."""
+        self._directory = directory
+        self._file: Optional[IO[bytes]] = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Total bytes written so far."""
+
+        return self._size
+
+    def write(self, data: bytes) -> int:
+        """Appends ``data`` and returns its offset."""
+
+        with self._lock:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(dir=self._directory)
+            offset = self._size
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+            return offset
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Returns ``length`` bytes starting at ``offset``."""
+
+        if self._file is None:
+            raise ValueError("Nothing has been spilled to this file")
+        if hasattr(os, "pread"):
+            return os.pread(self._file.fileno(), length, offset)
+        with self._lock:
+            self._file.seek(offset)
+            try:
+                return self._file.read(length)
+            finally:
+                self._file.seek(0, os.SEEK_END)
+
+    def close(self) -> None:
+        """Closes (and thereby deletes) the file; spilled payloads become unreadable."""
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SpilledPayload:
+    """Lightweight handle standing in for a payload that was moved to a :class:`SpillFile`.
+
+    ``length`` is the size of the stored UTF-8 text in bytes and ``preview`` its first
+    characters. :meth:`read` returns the original value: a string for spilled text, the decoded
+    JSON value otherwise.
+    """
+
+    __slots__ = ("_file", "_offset", "length", "preview", "is_json")
+
+    def __init__(self, file: SpillFile, offset: int, length: int, preview: str, is_json: bool) -> None:
+        """Creates a handle; use :func:`spill_value` instead of calling this directly."""
+        self._file = file
+        self._offset = offset
+        self.length = length
+        self.preview = preview
+        self.is_json = is_json
+
+    def read_bytes(self) -> bytes:
+        """Returns the stored UTF-8 bytes (JSON text for structured payloads)."""
+
+        return self._file.read(self._offset, self.length)
+
+    def read(self) -> Any:
+        """Loads the payload back into memory."""
+
+        data = self.read_bytes().decode("utf-8")
+        return json.loads(data) if self.is_json else data
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __repr__(self) -> str:
+        return f"SpilledPayload(length={self.length}, preview={self.preview!r})"
+
+
+def spill_value(
+    value: Any,
+    file: SpillFile,
+    threshold: int,
+    preview_chars: int = DEFAULT_PREVIEW_CHARS,
+) -> Any:
+    """Returns a :class:`SpilledPayload` for ``value`` when it exceeds ``threshold`` bytes.
+
+    Strings are stored as text, dicts and lists as JSON. Smaller values, other types and values
+    that cannot be encoded as JSON are returned unchanged.
+    """
+
+    if isinstance(value, str):
+        if len(value) * 4 <= threshold:
+            # Even all four-byte characters would fit; skip encoding.
+            return value
+        data = value.encode("utf-8")
+        if len(data) <= threshold:
+            return value
+        text, is_json = value, False
+    elif isinstance(value, (dict, list)):
+        if not _exceeds(value, threshold):
+            return value
+        try:
+            text = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return value
+        data = text.encode("utf-8")
+        if len(data) <= threshold:
+            return value
+        is_json = True
+    else:
+        return value
+    offset = file.write(data)
+    return SpilledPayload(file, offset, len(data), text[:preview_chars], is_json)
+
+
+class SpillStage:
+    """Pipeline stage moving oversized ``result``/``originalItem`` payloads to disk.
+
+    The stage owns one :class:`SpillFile` per run, created only when something is spilled.
+    """
+
+    def __init__(
+        self,
+        threshold: int,
+        fields: Sequence[str] = DEFAULT_SPILL_FIELDS,
+        directory: Optional[str] = None,
+    ) -> None:
+        """Creates the stage spilling values larger than ``threshold`` bytes from ``fields``."""
+        self._threshold = threshold
+        self._fields = tuple(fields)
+        self.file = SpillFile(directory)
+
+    def __call__(self, event: CoderStreamEvent) -> list[CoderStreamEvent]:
+        for field in self._fields:
+            value = event.get(field)
+            if value is None:
+                continue
+            spilled = spill_value(value, self.file, self._threshold)
+            if spilled is not value:
+                event[field] = spilled  # type: ignore[literal-required]
+        return [event]
+
+
+def _exceeds(value: Any, limit: int) -> bool:
+    """Cheaply estimates whether the JSON form of ``value`` is larger than ``limit`` bytes.
+
+    Walks the structure summing string lengths plus a small per-item overhead and stops as soon
+    as the budget is exceeded, so small payloads cost a short walk and large ones are never
+    walked in full.
+    """
+
+    total = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            total += len(item) + 2
+        elif isinstance(item, dict):
+            total += 2
+            for key, child in item.items():
+                total += len(key) + 4 if isinstance(key, str) else 8
+                if total > limit:
+                    return True
+                stack.append(child)
+        elif isinstance(item, (list, tuple)):
+            total += 2 + len(item)
+            stack.extend(item)
+        else:
+            total += 8
+        if total > limit:
+            return True
+    return False
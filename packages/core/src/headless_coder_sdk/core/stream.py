@@ -0,0 +1,49 @@
+"""Closeable stream wrapper returned by the adapters' streaming entry points."""
+
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Awaitable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class EventStream(Generic[T]):
+    """Async iterator and async context manager around a run's event generator.
+
+    Leaving the ``async with`` block, or calling :meth:`aclose`, closes the underlying generator
+    right away, which stops the provider process and releases the thread for the next run.
+    Without it, breaking out of ``async for`` leaves the generator suspended until it is garbage
+    collected::
+
+        async with thread.run_streamed("Fix the failing test") as events:
+            async for event in events:
+                if event["type"] == "tool_use":
+                    break  # the CLI is terminated here, not at some later GC pass
+    """
+
+    __slots__ = ("_iterator", "_anext")
+
+    def __init__(self, iterator: AsyncIterator[T]) -> None:
+        """Wraps ``iterator``."""
+        self._iterator = iterator
+        self._anext = iterator.__anext__
+
+    def __aiter__(self) -> "EventStream[T]":
+        return self
+
+    def __anext__(self) -> Awaitable[T]:
+        # Hand out the wrapped awaitable directly so the wrapper adds no coroutine per event.
+        return self._anext()
+
+    async def aclose(self) -> None:
+        """Closes the underlying generator, running its cleanup immediately."""
+
+        aclose = getattr(self._iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    async def __aenter__(self) -> "EventStream[T]":
+        return self
+
+    async def __aexit__(self, exc_type: Optional[type], exc: Optional[BaseException], tb: Any) -> None:
+        await self.aclose()
@@ -0,0 +1,318 @@
+"""Adapter-wide tracking of in-flight runs for introspection, bulk interrupts and graceful shutdown."""
+
+from __future__ import annotations
+
+import asyncio
+import signal
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from .types import ThreadHandle, now
+from .watchdog import RunWatchdog
+
+DRAIN_ABORT_GRACE = 5.0
+"""Seconds :meth:`RunTracker.drain` waits for interrupted runs to wind down after escalating."""
+
+_TRACKERS: "weakref.WeakSet[RunTracker]" = weakref.WeakSet()
+
+
+class AdapterShutdownError(RuntimeError):
+    """Raised when a run is started on an adapter that is draining."""
+
+    code = "shutting_down"
+
+
+@dataclass(frozen=True)
+class RunSnapshot:
+    """Point-in-time view of an in-flight run.
+
+    Attributes:
+        provider: Adapter name.
+        thread_id: Thread or session id, once the provider reported one.
+        pid: Process id of the CLI, when known.
+        started_at: Start time in epoch milliseconds.
+        elapsed_ms: Time since the start.
+        events: Provider events (or SDK messages) received so far.
+        stdout_bytes: Bytes read from the CLI's stdout; ``0`` for SDK-driven runs.
+        stderr_bytes: Bytes written to stderr, or ``None`` when the adapter does not collect it.
+        last_event_type: Type of the most recent event.
+        last_event_at: Time of the most recent event in epoch milliseconds.
+        current_tool: Name of the tool executing right now, if any.
+        queued_turns: Turns waiting behind this run on the same thread (``queueTurns``).
+        aborted: Whether an abort has been requested.
+    """
+
+    provider: str
+    thread_id: Optional[str]
+    pid: Optional[int]
+    started_at: int
+    elapsed_ms: float
+    events: int
+    stdout_bytes: int
+    stderr_bytes: Optional[int]
+    last_event_type: Optional[str]
+    last_event_at: Optional[int]
+    current_tool: Optional[str]
+    queued_turns: int
+    aborted: bool
+
+
+class RunProgress:
+    """Per-run activity counters feeding :class:`RunSnapshot` and the run's watchdog.
+
+    Adapters report every stdout read and decoded event here instead of to the watchdog directly;
+    each report is a few attribute updates, and the snapshot is only assembled when requested.
+    """
+
+    __slots__ = (
+        "provider",
+        "watchdog",
+        "started_at",
+        "events",
+        "stdout_bytes",
+        "last_event_type",
+        "current_tool",
+        "_started",
+        "_last_event",
+        "_tools",
+    )
+
+    def __init__(self, provider: str, watchdog: Optional[RunWatchdog] = None) -> None:
+        """Starts the clock for a run of ``provider``."""
+        self.provider = provider
+        self.watchdog = watchdog
+        self.started_at = now()
+        self.events = 0
+        self.stdout_bytes = 0
+        self.last_event_type: Optional[str] = None
+        self.current_tool: Optional[str] = None
+        self._started = time.monotonic()
+        self._last_event: Optional[float] = None
+        self._tools = 0
+
+    def read(self, size: int) -> None:
+        """Records ``size`` bytes read from the provider's output."""
+
+        self.stdout_bytes += size
+        if self.watchdog is not None:
+            self.watchdog.touch()
+
+    def read_lines(self, lines: list[bytes]) -> None:
+        """Records one batch from :func:`read_line_batches`, counting the stripped newlines."""
+
+        self.read(sum(map(len, lines)) + len(lines))
+
+    def observe(self, event_type: Optional[str], tool: Optional[str] = None) -> None:
+        """Records one provider event; ``tool_use``/``tool_result`` types track the running tool."""
+
+        self.events += 1
+        self.last_event_type = event_type
+        self._last_event = time.monotonic()
+        if event_type == "tool_use":
+            self.tool_started(tool)
+        elif event_type == "tool_result":
+            self.tool_finished()
+        elif self.watchdog is not None:
+            self.watchdog.observe(event_type)
+
+    def tool_started(self, name: Optional[str] = None) -> None:
+        """Marks a tool call as running."""
+
+        self._tools += 1
+        self.current_tool = name or "tool"
+        if self.watchdog is not None:
+            self.watchdog.observe("tool_use")
+
+    def tool_finished(self) -> None:
+        """Marks the oldest running tool call as finished."""
+
+        if self._tools:
+            self._tools -= 1
+            if not self._tools:
+                self.current_tool = None
+        if self.watchdog is not None:
+            self.watchdog.observe("tool_result")
+
+    def snapshot(
+        self,
+        thread_id: Optional[str] = None,
+        pid: Optional[int] = None,
+        stderr_bytes: Optional[int] = None,
+        queued_turns: int = 0,
+        aborted: bool = False,
+    ) -> RunSnapshot:
+        """Assembles a :class:`RunSnapshot` from the counters and the adapter's bookkeeping."""
+
+        elapsed = time.monotonic() - self._started
+        last_event_at = None
+        if self._last_event is not None:
+            last_event_at = self.started_at + int((self._last_event - self._started) * 1000)
+        return RunSnapshot(
+            provider=self.provider,
+            thread_id=thread_id,
+            pid=pid,
+            started_at=self.started_at,
+            elapsed_ms=round(elapsed * 1000, 3),
+            events=self.events,
+            stdout_bytes=self.stdout_bytes,
+            stderr_bytes=stderr_bytes,
+            last_event_type=self.last_event_type,
+            last_event_at=last_event_at,
+            current_tool=self.current_tool,
+            queued_turns=queued_turns,
+            aborted=aborted,
+        )
+
+
+class RunTracker:
+    """Weak registry of the runs an adapter currently executes.
+
+    Adapters add a run record (any weak-referenceable object exposing the owning ``handle`` and a
+    ``snapshot()`` method returning a :class:`RunSnapshot`) when a run starts and discard it when
+    the run is cleaned up; records vanish on their own if a run is abandoned without cleanup.
+    Every tracker is also visible to the module-level :func:`active_runs`, :func:`run_snapshots`,
+    :func:`interrupt_all` and :func:`drain_all` helpers.
+    """
+
+    def __init__(self) -> None:
+        """Creates an empty tracker that accepts new runs."""
+        self._runs: "weakref.WeakSet[Any]" = weakref.WeakSet()
+        self._accepting = True
+        self._idle_waiters: list[asyncio.Future[None]] = []
+        _TRACKERS.add(self)
+
+    @property
+    def accepting(self) -> bool:
+        """Whether new runs may start; ``False`` once :meth:`drain` has been called."""
+
+        return self._accepting
+
+    def check_accepting(self) -> None:
+        """Raises :class:`AdapterShutdownError` when the adapter is draining."""
+
+        if not self._accepting:
+            raise AdapterShutdownError("Adapter is shutting down and does not accept new runs.")
+
+    def add(self, run: Any) -> None:
+        """Starts tracking ``run``."""
+
+        self._runs.add(run)
+
+    def discard(self, run: Any) -> None:
+        """Stops tracking ``run`` and wakes :meth:`drain` once nothing is left."""
+
+        self._runs.discard(run)
+        if not self._runs:
+            waiters, self._idle_waiters = self._idle_waiters, []
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    def active_runs(self) -> list[ThreadHandle]:
+        """Returns the handles whose runs are in flight."""
+
+        return [run.handle for run in list(self._runs)]
+
+    def snapshots(self) -> list[RunSnapshot]:
+        """Returns a snapshot of every in-flight run, oldest first."""
+
+        return sorted((run.snapshot() for run in list(self._runs)), key=lambda snap: snap.started_at)
+
+    async def interrupt_all(self, reason: Optional[str] = None) -> int:
+        """Interrupts every in-flight run and returns how many were signalled."""
+
+        handles = self.active_runs()
+        await asyncio.gather(
+            *(handle.interrupt(reason or "Interrupted") for handle in handles),
+            return_exceptions=True,
+        )
+        return len(handles)
+
+    async def drain(self, timeout: Optional[float] = None, reason: str = "Adapter shutting down") -> bool:
+        """Stops accepting runs, waits for in-flight ones and aborts whatever is left.
+
+        Args:
+            timeout: Seconds to wait for runs to finish on their own; ``None`` waits indefinitely.
+            reason: Interrupt reason used when escalating.
+
+        Returns:
+            ``True`` when every run finished within ``timeout``, ``False`` when some were aborted.
+        """
+
+        self._accepting = False
+        if await self._wait_idle(timeout):
+            return True
+        await self.interrupt_all(reason)
+        await self._wait_idle(DRAIN_ABORT_GRACE)
+        return False
+
+    async def _wait_idle(self, timeout: Optional[float]) -> bool:
+        if not self._runs:
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._idle_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            return not self._runs
+        return True
+
+
+def active_runs() -> list[ThreadHandle]:
+    """Returns the handles with in-flight runs across every adapter instance."""
+
+    return [handle for tracker in list(_TRACKERS) for handle in tracker.active_runs()]
+
+
+def run_snapshots() -> list[RunSnapshot]:
+    """Returns snapshots of the in-flight runs across every adapter instance, oldest first."""
+
+    snapshots = [snap for tracker in list(_TRACKERS) for snap in tracker.snapshots()]
+    return sorted(snapshots, key=lambda snap: snap.started_at)
+
+
+async def interrupt_all(reason: Optional[str] = None) -> int:
+    """Interrupts every in-flight run of every adapter and returns how many were signalled."""
+
+    counts = await asyncio.gather(*(tracker.interrupt_all(reason) for tracker in list(_TRACKERS)))
+    return sum(counts)
+
+
+async def drain_all(timeout: Optional[float] = None, reason: str = "Adapter shutting down") -> bool:
+    """Drains every adapter concurrently; see :meth:`RunTracker.drain`."""
+
+    results = await asyncio.gather(*(tracker.drain(timeout, reason) for tracker in list(_TRACKERS)))
+    return all(results)
+
+
+def drain_on_sigterm(
+    timeout: float,
+    on_drained: Optional[Callable[[bool], None]] = None,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> Callable[[], None]:
+    """Runs :func:`drain_all` when the process receives SIGTERM.
+
+    ``on_drained`` receives the drain result, typically to stop the server or exit. Returns a
+    callable removing the handler. Requires a loop supporting ``add_signal_handler`` (Unix).
+    """
+
+    target = loop or asyncio.get_running_loop()
+    tasks: set[asyncio.Task[None]] = set()
+
+    async def _drain() -> None:
+        drained = await drain_all(timeout)
+        if on_drained is not None:
+            on_drained(drained)
+
+    def _on_sigterm() -> None:
+        task = target.create_task(_drain())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    def _remove() -> None:
+        target.remove_signal_handler(signal.SIGTERM)
+
+    target.add_signal_handler(signal.SIGTERM, _on_sigterm)
+    return _remove
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, AsyncIterator, Callable, Optional, Protocol, Sequence, Union
+from typing import Any, AsyncIterator, Callable, NamedTuple, Optional, Protocol, Sequence, Union
 from typing_extensions import Literal, TypedDict, runtime_checkable
 
 Provider = Literal["codex", "gemini", "claude"]
@@ -45,6 +45,12 @@ class CancellationSignalProtocol(Protocol):
         """Registers a callback that fires when the signal aborts and returns an unsubscribe callable."""
 
 
+class TurnQueueOpts(TypedDict, total=False):
+    """Bounds applied when a thread queues concurrent turns."""
+
+    maxPending: int
+
+
 class StartOpts(TypedDict, total=False):
     """Options available when starting or resuming provider threads."""
 
@@ -63,13 +69,38 @@ class StartOpts(TypedDict, total=False):
     yolo: bool
     permissionMode: str
     permissionPromptToolName: str
+    queueTurns: Union[bool, TurnQueueOpts]
+
+
+class EventFilterOpts(TypedDict, total=False):
+    """Selects which stream events a run builds and delivers."""
+
+    types: Sequence[str]
+    originalItem: bool
+
+
+class CoalesceOpts(TypedDict, total=False):
+    """Bounds applied when coalescing delta and progress events."""
+
+    maxLatencyMs: float
+    maxBytes: int
 
 
 class RunOpts(TypedDict, total=False):
     """Per-run execution modifiers shared across adapters."""
 
     outputSchema: dict[str, Any]
+    validateOutput: bool
+    streamStructuredOutput: bool
     streamPartialMessages: bool
+    streamingInput: bool
+    eventFilter: EventFilterOpts
+    coalesce: Union[bool, CoalesceOpts]
+    compactEvents: bool
+    spillThreshold: int
+    timeoutMs: float
+    idleTimeoutMs: float
+    toolIdleTimeoutMs: float
     extraEnv: dict[str, str]
     signal: CancellationSignalProtocol
 
@@ -83,6 +114,7 @@ class RunResult:
     json: Any = None
     usage: Any = None
     raw: Any = None
+    validation_errors: Optional[list[str]] = None
 
     @property
     def threadId(self) -> Optional[str]:  # noqa: N802 (preserve TS casing for parity)
@@ -90,6 +122,12 @@ class RunResult:
 
         return self.thread_id
 
+    @property
+    def validationErrors(self) -> Optional[list[str]]:  # noqa: N802 (preserve TS casing for parity)
+        """CamelCase alias for :attr:`validation_errors`."""
+
+        return self.validation_errors
+
 
 class CoderStreamEvent(TypedDict, total=False):
     """Normalised streaming event emitted by adapters."""
@@ -103,6 +141,7 @@ class CoderStreamEvent(TypedDict, total=False):
         "permission",
         "file_change",
         "plan_update",
+        "structured_delta",
         "usage",
         "error",
         "cancelled",
@@ -125,12 +164,35 @@ class CoderStreamEvent(TypedDict, total=False):
     stats: Any
     code: Optional[str]
     message: Optional[str]
+    path: list[Union[str, int]]
+    value: Any
+    validationErrors: list[str]
+    abortLatencyMs: float
     originalItem: Any
 
 
 EventIterator = AsyncIterator[CoderStreamEvent]
 """Async iterator yielded by streaming runs."""
 
+EventBatchIterator = AsyncIterator[list[CoderStreamEvent]]
+"""Async iterator yielded by batched streaming runs (``run_streamed_batches``)."""
+
+
+class RawEvent(NamedTuple):
+    """Provider-native stream line yielded by ``run_raw`` without any normalisation.
+
+    ``data`` is the JSON line exactly as the CLI wrote it (minus the newline) and ``type`` its
+    top-level ``"type"`` when that can be read without parsing the line, otherwise ``None``.
+    """
+
+    provider: Provider
+    type: Optional[str]
+    data: bytes
+
+
+RawEventIterator = AsyncIterator[RawEvent]
+"""Async iterator yielded by raw passthrough runs (``run_raw``)."""
+
 
 @runtime_checkable
 class ThreadHandle(Protocol):
@@ -0,0 +1,370 @@
+"""Compiled JSON-schema validation of structured output with a per-schema validator cache."""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from .schema import get_schema_registry
+from .types import RunOpts
+
+LOGGER = logging.getLogger(__name__)
+DEFAULT_MAX_VALIDATORS = 256
+MAX_REPORTED_ERRORS = 20
+
+Validator = Callable[[Any], list[str]]
+"""Compiled validator returning human readable error strings (empty when valid)."""
+
+
+class InvalidSchemaError(ValueError):
+    """Raised when an ``outputSchema`` cannot be compiled into a validator."""
+
+    code = "invalid_schema"
+
+
+class SchemaValidatorCache:
+    """LRU cache of compiled validators keyed by the schema's content hash."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_VALIDATORS) -> None:
+        """Creates an empty cache holding at most ``max_entries`` validators."""
+        self._max_entries = max_entries
+        self._validators: OrderedDict[str, Validator] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, schema: Any) -> Validator:
+        """Returns the compiled validator for ``schema``, compiling it on first use."""
+
+        key = get_schema_registry().schema_hash(schema)
+        with self._lock:
+            validator = self._validators.get(key)
+            if validator is not None:
+                self._validators.move_to_end(key)
+                return validator
+        validator = compile_validator(schema)
+        with self._lock:
+            self._validators[key] = validator
+            while len(self._validators) > self._max_entries:
+                self._validators.popitem(last=False)
+        return validator
+
+    def clear(self) -> None:
+        """Drops every compiled validator."""
+
+        with self._lock:
+            self._validators.clear()
+
+
+_DEFAULT_CACHE = SchemaValidatorCache()
+
+
+def get_validator(schema: Any) -> Validator:
+    """Returns the cached compiled validator for ``schema`` from the process-wide cache."""
+
+    return _DEFAULT_CACHE.get(schema)
+
+
+def validate_structured_output(schema: Any, payload: Any) -> list[str]:
+    """Validates ``payload`` against ``schema`` and returns the error messages."""
+
+    return get_validator(schema)(payload)
+
+
+def check_output_schema(run_opts: Optional[RunOpts]) -> None:
+    """Compiles the run's ``outputSchema`` up front when ``validateOutput`` is set.
+
+    Adapters call this before spawning the provider so a broken schema fails the run
+    immediately instead of after the provider has done the work.
+
+    Raises:
+        InvalidSchemaError: If the schema cannot be compiled.
+    """
+
+    if _validation_requested(run_opts):
+        get_validator(run_opts["outputSchema"])  # type: ignore[index]
+
+
+def validate_run_output(run_opts: Optional[RunOpts], payload: Any) -> Optional[list[str]]:
+    """Validates structured output when the run requested it.
+
+    Returns ``None`` when validation was not requested (no ``outputSchema`` or
+    ``validateOutput`` unset), otherwise the list of errors, empty when the payload is valid.
+    A schema that fails to compile is reported as an error rather than raised, so the result
+    of a finished run is never lost.
+    """
+
+    if not _validation_requested(run_opts):
+        return None
+    if payload is None:
+        return ["$: no JSON payload found in the response"]
+    try:
+        return validate_structured_output(run_opts["outputSchema"], payload)  # type: ignore[index]
+    except InvalidSchemaError as error:
+        return [f"$: invalid output schema: {error}"]
+
+
+def compile_validator(schema: Any) -> Validator:
+    """Compiles ``schema`` into a validator.
+
+    Uses the optional ``jsonschema`` package when installed (full draft support) and otherwise a
+    built-in compiler covering the keywords structured output schemas rely on: ``type``,
+    ``properties``, ``required``, ``additionalProperties``, ``items``, ``enum``, ``const``,
+    length/size/range bounds, ``pattern`` and ``anyOf``/``oneOf``/``allOf``.
+
+    Raises:
+        InvalidSchemaError: If ``schema`` is malformed, for example an invalid ``pattern``.
+    """
+
+    jsonschema = _import_jsonschema()
+    if jsonschema is not None:
+        return _compile_with_jsonschema(jsonschema, schema)
+    try:
+        return _compile_builtin(schema)
+    except (re.error, AttributeError, KeyError, TypeError, ValueError) as error:
+        raise InvalidSchemaError(str(error)) from error
+
+
+def _validation_requested(run_opts: Optional[RunOpts]) -> bool:
+    return bool(run_opts and run_opts.get("validateOutput") and run_opts.get("outputSchema"))
+
+
+def _import_jsonschema() -> Any:
+    try:
+        import jsonschema  # type: ignore[import-not-found]
+    except ImportError:
+        return None
+    return jsonschema
+
+
+def _compile_with_jsonschema(jsonschema: Any, schema: Any) -> Validator:
+    validator_cls = jsonschema.validators.validator_for(schema)
+    try:
+        validator_cls.check_schema(schema)
+    except jsonschema.exceptions.SchemaError as error:
+        raise InvalidSchemaError(error.message) from error
+    validator = validator_cls(schema)
+
+    def _validate(payload: Any) -> list[str]:
+        errors = []
+        for error in validator.iter_errors(payload):
+            errors.append(f"{_format_path(error.absolute_path)}: {error.message}")
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                break
+        return errors
+
+    return _validate
+
+
+_Check = Callable[[Any, str, list[str]], None]
+
+_TYPE_CHECKS: dict[str, Callable[[Any], bool]] = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool)
+    or (isinstance(value, float) and value.is_integer()),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+}
+
+
+def _compile_builtin(schema: Any) -> Validator:
+    check = _compile_node(schema)
+
+    def _validate(payload: Any) -> list[str]:
+        errors: list[str] = []
+        check(payload, "$", errors)
+        return errors[:MAX_REPORTED_ERRORS]
+
+    return _validate
+
+
+def _compile_node(schema: Any) -> _Check:
+    """Compiles one schema node into a closure; unknown keywords are ignored."""
+
+    if schema is True or schema == {}:
+        return _accept
+    if schema is False:
+        return lambda value, path, errors: errors.append(f"{path}: no value is allowed here")
+    if not isinstance(schema, dict):
+        return _accept
+    checks: list[_Check] = []
+
+    declared = schema.get("type")
+    if declared is not None:
+        names = [declared] if isinstance(declared, str) else list(declared)
+        predicates = [_TYPE_CHECKS[name] for name in names if name in _TYPE_CHECKS]
+        label = " or ".join(names)
+        if predicates:
+
+            def _check_type(value: Any, path: str, errors: list[str]) -> None:
+                if not any(predicate(value) for predicate in predicates):
+                    errors.append(f"{path}: {value!r:.80} is not of type {label}")
+
+            checks.append(_check_type)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def _check_enum(value: Any, path: str, errors: list[str]) -> None:
+            if value not in allowed:
+                errors.append(f"{path}: {value!r:.80} is not one of {allowed!r}")
+
+        checks.append(_check_enum)
+
+    if "const" in schema:
+        expected = schema["const"]
+
+        def _check_const(value: Any, path: str, errors: list[str]) -> None:
+            if value != expected:
+                errors.append(f"{path}: {expected!r} was expected")
+
+        checks.append(_check_const)
+
+    checks.extend(_compile_object_keywords(schema))
+    checks.extend(_compile_array_keywords(schema))
+    checks.extend(_compile_scalar_keywords(schema))
+    checks.extend(_compile_combinators(schema))
+
+    if not checks:
+        return _accept
+    if len(checks) == 1:
+        return checks[0]
+
+    def _check_all(value: Any, path: str, errors: list[str]) -> None:
+        for check in checks:
+            check(value, path, errors)
+
+    return _check_all
+
+
+def _compile_object_keywords(schema: dict[str, Any]) -> list[_Check]:
+    checks: list[_Check] = []
+    properties = {name: _compile_node(sub) for name, sub in (schema.get("properties") or {}).items()}
+    required = list(schema.get("required") or [])
+    additional = schema.get("additionalProperties", True)
+    additional_check = None if additional is True else _compile_node(additional)
+    if not properties and not required and additional_check is None:
+        return checks
+
+    def _check_object(value: Any, path: str, errors: list[str]) -> None:
+        if not isinstance(value, dict):
+            return
+        for name in required:
+            if name not in value:
+                errors.append(f"{path}: {name!r} is a required property")
+        for name, item in value.items():
+            child = properties.get(name)
+            if child is not None:
+                child(item, f"{path}.{name}", errors)
+            elif additional is False:
+                errors.append(f"{path}: additional property {name!r} is not allowed")
+            elif additional_check is not None:
+                additional_check(item, f"{path}.{name}", errors)
+
+    checks.append(_check_object)
+    return checks
+
+
+def _compile_array_keywords(schema: dict[str, Any]) -> list[_Check]:
+    checks: list[_Check] = []
+    items = schema.get("items")
+    item_check = _compile_node(items) if isinstance(items, (dict, bool)) else None
+    min_items = schema.get("minItems")
+    max_items = schema.get("maxItems")
+    if item_check is None and min_items is None and max_items is None:
+        return checks
+
+    def _check_array(value: Any, path: str, errors: list[str]) -> None:
+        if not isinstance(value, list):
+            return
+        if min_items is not None and len(value) < min_items:
+            errors.append(f"{path}: expected at least {min_items} items")
+        if max_items is not None and len(value) > max_items:
+            errors.append(f"{path}: expected at most {max_items} items")
+        if item_check is not None:
+            for index, item in enumerate(value):
+                item_check(item, f"{path}[{index}]", errors)
+
+    checks.append(_check_array)
+    return checks
+
+
+def _compile_scalar_keywords(schema: dict[str, Any]) -> list[_Check]:
+    checks: list[_Check] = []
+    min_length = schema.get("minLength")
+    max_length = schema.get("maxLength")
+    pattern = re.compile(schema["pattern"]) if isinstance(schema.get("pattern"), str) else None
+    if min_length is not None or max_length is not None or pattern is not None:
+
+        def _check_string(value: Any, path: str, errors: list[str]) -> None:
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                errors.append(f"{path}: shorter than {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                errors.append(f"{path}: longer than {max_length} characters")
+            if pattern is not None and not pattern.search(value):
+                errors.append(f"{path}: does not match {pattern.pattern!r}")
+
+        checks.append(_check_string)
+
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+    if minimum is not None or maximum is not None:
+
+        def _check_number(value: Any, path: str, errors: list[str]) -> None:
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return
+            if minimum is not None and value < minimum:
+                errors.append(f"{path}: {value} is less than the minimum of {minimum}")
+            if maximum is not None and value > maximum:
+                errors.append(f"{path}: {value} is greater than the maximum of {maximum}")
+
+        checks.append(_check_number)
+    return checks
+
+
+def _compile_combinators(schema: dict[str, Any]) -> list[_Check]:
+    checks: list[_Check] = []
+    for sub in schema.get("allOf") or []:
+        checks.append(_compile_node(sub))
+    for keyword in ("anyOf", "oneOf"):
+        branches = [_compile_node(sub) for sub in schema.get(keyword) or []]
+        if not branches:
+            continue
+        exactly_one = keyword == "oneOf"
+
+        def _check_branches(
+            value: Any,
+            path: str,
+            errors: list[str],
+            branches: list[_Check] = branches,
+            exactly_one: bool = exactly_one,
+            keyword: str = keyword,
+        ) -> None:
+            matches = 0
+            for branch in branches:
+                branch_errors: list[str] = []
+                branch(value, path, branch_errors)
+                if not branch_errors:
+                    matches += 1
+            if matches == 0 or (exactly_one and matches > 1):
+                errors.append(f"{path}: value does not match {keyword}")
+
+        checks.append(_check_branches)
+    return checks
+
+
+def _accept(value: Any, path: str, errors: list[str]) -> None:
+    return None
+
+
+def _format_path(parts: Any) -> str:
+    path = "$"
+    for part in parts:
+        path += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return path
@@ -0,0 +1,128 @@
+"""Deadline and idle watchdog stopping runs whose provider stalls."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Optional
+
+from .cancellation import CancellationError
+from .types import RunOpts
+
+
+class RunTimeoutError(CancellationError):
+    """Raised by ``run()`` (and raw streams) when ``timeoutMs`` or an idle timeout expires."""
+
+    code = "timeout"
+
+
+class RunWatchdog:
+    """Calls ``on_expire(reason)`` once when a run exceeds its deadline or goes quiet.
+
+    The deadline is a single ``loop.call_later`` timer. Idle tracking never reschedules per
+    event: :meth:`touch` only records the loop time, and the idle timer re-arms itself for the
+    remaining budget when it fires early. While a tool is running (between ``tool_use`` and
+    ``tool_result`` events seen by :meth:`observe`) the tool budget replaces the idle budget;
+    a missing budget disables idle expiry for that phase.
+    """
+
+    def __init__(
+        self,
+        on_expire: Callable[[str], None],
+        timeout_ms: Optional[float] = None,
+        idle_timeout_ms: Optional[float] = None,
+        tool_idle_timeout_ms: Optional[float] = None,
+    ) -> None:
+        """Arms the timers on the running loop.
+
+        Args:
+            on_expire: Callback receiving a human readable reason; invoked at most once.
+            timeout_ms: Total run budget.
+            idle_timeout_ms: Longest gap between provider outputs.
+            tool_idle_timeout_ms: Longest gap while a tool executes (defaults to the idle budget).
+        """
+        self._loop = asyncio.get_running_loop()
+        self._on_expire = on_expire
+        self._idle = idle_timeout_ms / 1000 if idle_timeout_ms else None
+        self._tool_idle = tool_idle_timeout_ms / 1000 if tool_idle_timeout_ms else self._idle
+        self._tools_running = 0
+        self._last_activity = self._loop.time()
+        self.reason: Optional[str] = None
+        self._deadline_handle: Optional[asyncio.TimerHandle] = None
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
+        if timeout_ms:
+            self._deadline_handle = self._loop.call_later(
+                timeout_ms / 1000, self._expire, f"Run exceeded its {timeout_ms / 1000:g}s timeout"
+            )
+        budgets = [budget for budget in (self._idle, self._tool_idle) if budget]
+        self._idle_period = min(budgets) if budgets else None
+        if self._idle_period is not None:
+            self._idle_handle = self._loop.call_later(self._idle_period, self._check_idle)
+
+    @classmethod
+    def from_run_opts(
+        cls,
+        run_opts: Optional[RunOpts],
+        on_expire: Callable[[str], None],
+        watch_output: bool = True,
+    ) -> Optional["RunWatchdog"]:
+        """Builds a watchdog from ``timeoutMs``/``idleTimeoutMs``/``toolIdleTimeoutMs``.
+
+        Returns ``None`` when no budget is set. ``watch_output=False`` keeps only the deadline,
+        for runs whose output arrives in one piece at the end.
+        """
+
+        opts = run_opts or {}
+        timeout_ms = opts.get("timeoutMs")
+        idle_ms = opts.get("idleTimeoutMs") if watch_output else None
+        tool_idle_ms = opts.get("toolIdleTimeoutMs") if watch_output else None
+        if not (timeout_ms or idle_ms or tool_idle_ms):
+            return None
+        return cls(on_expire, timeout_ms, idle_ms, tool_idle_ms)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the watchdog has fired."""
+
+        return self.reason is not None
+
+    def touch(self) -> None:
+        """Records provider activity."""
+
+        self._last_activity = self._loop.time()
+
+    def observe(self, event_type: Optional[str]) -> None:
+        """Records activity and tracks tool executions from ``tool_use``/``tool_result`` types."""
+
+        self._last_activity = self._loop.time()
+        if event_type == "tool_use":
+            self._tools_running += 1
+        elif event_type == "tool_result" and self._tools_running:
+            self._tools_running -= 1
+
+    def cancel(self) -> None:
+        """Disarms every timer; call once the run has finished."""
+
+        for handle in (self._deadline_handle, self._idle_handle):
+            if handle is not None:
+                handle.cancel()
+        self._deadline_handle = None
+        self._idle_handle = None
+
+    def _check_idle(self) -> None:
+        assert self._idle_period is not None
+        budget = self._tool_idle if self._tools_running else self._idle
+        delay = self._idle_period
+        if budget is not None:
+            remaining = self._last_activity + budget - self._loop.time()
+            if remaining <= 0:
+                self._expire(f"Run produced no output for {budget:g}s")
+                return
+            delay = min(remaining, delay)
+        self._idle_handle = self._loop.call_later(delay, self._check_idle)
+
+    def _expire(self, reason: str) -> None:
+        if self.reason is not None:
+            return
+        self.reason = reason
+        self.cancel()
+        self._on_expire(reason)
@@ -0,0 +1,183 @@
+"""Tests covering the content-addressed result cache."""
+
+from __future__ import annotations
+
+import pathlib
+import subprocess
+import sys
+from typing import Any, Optional
+
+import pytest
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import (  # noqa: E402
+    CacheEntry,
+    CachedThreadHandle,
+    DiskCacheTier,
+    MemoryCacheTier,
+    PromptInput,
+    ResultCache,
+    RunOpts,
+    RunResult,
+    compute_run_key,
+    workspace_fingerprint,
+)
+
+
+class _CountingThread:
+    """Thread double that counts how many times the provider is actually invoked."""
+
+    def __init__(self) -> None:
+        self.provider = "codex"
+        self.id: Optional[str] = None
+        self.internal: dict[str, Any] = {}
+        self.calls = 0
+
+    async def run(self, input: PromptInput, opts: Optional[RunOpts] = None) -> RunResult:
+        self.calls += 1
+        return RunResult(thread_id="t-1", text=f"review of {input}", usage={"tokens": 3})
+
+    def run_streamed(self, input: PromptInput, opts: Optional[RunOpts] = None):
+        async def _iterator():
+            self.calls += 1
+            yield {"type": "init", "provider": "codex", "threadId": "t-1", "ts": 0}
+            yield {"type": "message", "provider": "codex", "role": "assistant", "text": "ok", "ts": 1}
+            yield {"type": "done", "provider": "codex", "ts": 2}
+
+        return _iterator()
+
+    async def interrupt(self, reason: Optional[str] = None) -> None:  # pragma: no cover
+        return None
+
+    async def close(self) -> None:  # pragma: no cover
+        return None
+
+
+@pytest.fixture()
+def git_workspace(tmp_path: pathlib.Path) -> pathlib.Path:
+    """Creates a throwaway git repository with a single commit."""
+
+    def _git(*args: str) -> None:
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    _git("init", "-q")
+    (tmp_path / "README.md").write_text("hello\n", encoding="utf-8")
+    _git("add", "README.md")
+    _git("-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "-m", "init")
+    return tmp_path
+
+
+def test_run_key_ignores_schema_key_order_and_trailing_whitespace() -> None:
+    first = compute_run_key("codex", "Review  \n", output_schema={"a": 1, "b": 2}, workspace="w")
+    second = compute_run_key("codex", "Review", output_schema={"b": 2, "a": 1}, workspace="w")
+    other = compute_run_key("codex", "Review", output_schema={"b": 2, "a": 1}, workspace="x")
+
+    assert first == second
+    assert first != other
+
+
+def test_memory_tier_evicts_least_recently_used() -> None:
+    tier = MemoryCacheTier(max_entries=2)
+    tier.put("a", CacheEntry(result=RunResult(text="a")))
+    tier.put("b", CacheEntry(result=RunResult(text="b")))
+    assert tier.get("a") is not None
+    tier.put("c", CacheEntry(result=RunResult(text="c")))
+
+    assert tier.get("b") is None
+    assert tier.get("a") is not None
+    assert tier.get("c") is not None
+
+
+def test_memory_tier_expires_entries() -> None:
+    tier = MemoryCacheTier(ttl=10)
+    tier.put("a", CacheEntry(result=RunResult(text="a"), created_at=0.0))
+
+    assert tier.get("a") is None
+    assert len(tier) == 0
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_round_trips_results_and_events(tmp_path: pathlib.Path) -> None:
+    disk = DiskCacheTier(str(tmp_path))
+    entry = CacheEntry(
+        result=RunResult(thread_id="t", text="hi", json={"ok": True}),
+        events=[{"type": "done", "provider": "codex", "ts": 1}],
+    )
+    await disk.put("ab" * 32, entry)
+
+    # A fresh cache with an empty memory tier must fall back to disk.
+    loaded = await ResultCache(disk=DiskCacheTier(str(tmp_path))).get("ab" * 32)
+    assert loaded is not None
+    assert loaded.result == entry.result
+    assert loaded.events == entry.events
+
+
+def test_workspace_fingerprint_tracks_dirty_files(git_workspace: pathlib.Path) -> None:
+    clean = workspace_fingerprint(str(git_workspace))
+    (git_workspace / "README.md").write_text("changed\n", encoding="utf-8")
+    dirty = workspace_fingerprint(str(git_workspace))
+
+    assert clean is not None and dirty is not None
+    assert clean != dirty
+    assert workspace_fingerprint(str(git_workspace)) == dirty
+
+
+def test_workspace_fingerprint_changes_when_dirty_file_is_edited_again(git_workspace: pathlib.Path) -> None:
+    (git_workspace / "README.md").write_text("first edit\n", encoding="utf-8")
+    (git_workspace / "notes.txt").write_text("untracked\n", encoding="utf-8")
+    first = workspace_fingerprint(str(git_workspace))
+    (git_workspace / "README.md").write_text("second edit\n", encoding="utf-8")
+    second = workspace_fingerprint(str(git_workspace))
+    (git_workspace / "notes.txt").write_text("untracked, edited\n", encoding="utf-8")
+    third = workspace_fingerprint(str(git_workspace))
+
+    assert first is not None and second is not None and third is not None
+    assert len({first, second, third}) == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_thread_serves_repeat_runs(git_workspace: pathlib.Path) -> None:
+    cache = ResultCache()
+    start_opts = {"workingDirectory": str(git_workspace), "sandboxMode": "read-only"}
+
+    first_thread = _CountingThread()
+    first = await CachedThreadHandle(first_thread, cache, start_opts).run("commit abc")
+    second_thread = _CountingThread()
+    handle = CachedThreadHandle(second_thread, cache, start_opts)
+    second = await handle.run("commit abc")
+
+    assert first_thread.calls == 1
+    assert second_thread.calls == 0
+    assert handle.last_hit is True
+    assert second.text == first.text
+
+
+@pytest.mark.asyncio
+async def test_cached_thread_replays_recorded_stream(git_workspace: pathlib.Path) -> None:
+    cache = ResultCache()
+    start_opts = {"workingDirectory": str(git_workspace), "sandboxMode": "read-only"}
+
+    live_handle = CachedThreadHandle(_CountingThread(), cache, start_opts)
+    live = [event async for event in live_handle.run_streamed("x")]
+    replay_thread = _CountingThread()
+    replay_handle = CachedThreadHandle(replay_thread, cache, start_opts)
+    replayed = [event async for event in replay_handle.run_streamed("x")]
+
+    assert replay_thread.calls == 0
+    assert replayed == live
+
+
+@pytest.mark.asyncio
+async def test_cached_thread_bypasses_writable_sandboxes(git_workspace: pathlib.Path) -> None:
+    cache = ResultCache()
+    start_opts = {"workingDirectory": str(git_workspace), "sandboxMode": "workspace-write"}
+    thread = _CountingThread()
+
+    await CachedThreadHandle(thread, cache, start_opts).run("x")
+    await CachedThreadHandle(thread, cache, start_opts).run("x")
+
+    assert thread.calls == 2
@@ -5,6 +5,7 @@ from __future__ import annotations
 import asyncio
 import pathlib
 import sys
+import threading
 
 import pytest
 
@@ -13,7 +14,12 @@ SRC_DIR = PACKAGE_ROOT / "src"
 if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
 
-from headless_coder_sdk.core import AbortController, CancellationError, link_signal  # noqa: E402
+from headless_coder_sdk.core import (  # noqa: E402
+    AbortController,
+    CancellationError,
+    CancellationSignal,
+    link_signal,
+)
 
 
 def test_abort_controller_notifies_listeners() -> None:
@@ -48,3 +54,80 @@ async def test_cancellation_signal_wait_and_throw() -> None:
 def test_link_signal_returns_noop_when_missing() -> None:
     unsubscribe = link_signal(None, lambda _: None)
     unsubscribe()
+
+
+def test_any_forwards_first_abort_and_detaches_from_parents() -> None:
+    first, second = AbortController(), AbortController()
+    combined = CancellationSignal.any([first.signal, None, second.signal])
+    assert len(first.signal._callbacks) == len(second.signal._callbacks) == 1
+
+    second.abort("second")
+    first.abort("first")
+
+    assert combined.reason == "second"
+    assert not first.signal._callbacks
+
+    finished = CancellationSignal.any([first.signal])
+    assert finished.aborted and finished.reason == "first"
+
+
+@pytest.mark.asyncio
+async def test_timeout_signal_fires_on_loop_timer_unless_detached() -> None:
+    parent = AbortController()
+    deadline = CancellationSignal.timeout(0.01)
+    combined = CancellationSignal.any([parent.signal, deadline])
+    kept = CancellationSignal.timeout(0.01)
+    kept.detach()
+
+    await asyncio.wait_for(combined.wait(), 1)
+    await asyncio.sleep(0.02)
+
+    assert combined.reason == "Timed out after 0.01s"
+    assert not parent.signal._callbacks
+    assert not kept.aborted
+
+
+def test_listeners_unsubscribe_individually_and_children_follow_parents() -> None:
+    root = AbortController()
+    seen: list[str] = []
+    unsubscribes = [
+        root.signal.add_listener(lambda _, index=index: seen.append(f"l{index}")) for index in range(4)
+    ]
+    unsubscribes[1]()
+    unsubscribes[1]()
+
+    child = AbortController(parent=root.signal)
+    detached = root.signal.child()
+    detached.detach()
+    child.abort("child only")
+    assert not root.signal.aborted
+
+    grandchild = child.signal.child()
+    assert grandchild.aborted and grandchild.reason == "child only"
+
+    follower = root.signal.child()
+    root.abort("root")
+    assert seen == ["l0", "l2", "l3"]
+    assert follower.reason == "root"
+    assert not detached.aborted
+
+
+@pytest.mark.asyncio
+async def test_link_signal_dispatches_foreign_thread_aborts_to_owning_loop() -> None:
+    controller = AbortController()
+    loop = asyncio.get_running_loop()
+    seen: list[tuple[str | None, bool]] = []
+
+    def _record(reason: str | None) -> None:
+        seen.append((reason, asyncio.get_running_loop() is loop))
+
+    link_signal(controller.signal, _record, loop)
+
+    worker = threading.Thread(target=controller.abort, args=("worker",))
+    worker.start()
+    worker.join()
+    assert seen == []
+
+    await asyncio.wait_for(controller.signal.wait(), 1)
+    await asyncio.sleep(0)
+    assert seen == [("worker", True)]
@@ -0,0 +1,175 @@
+"""Tests covering delta and progress event coalescing."""
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import sys
+from typing import Any
+
+import pytest
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import (  # noqa: E402
+    CompactEvent,
+    DeltaCoalescer,
+    LazyOriginal,
+    coalesce_events,
+    coalesce_run_events,
+)
+
+
+def _delta(text: str, role: str = "assistant") -> dict[str, Any]:
+    return {"type": "message", "provider": "codex", "role": role, "text": text, "delta": True, "ts": 1}
+
+
+def test_merges_consecutive_deltas_and_progress() -> None:
+    coalescer = DeltaCoalescer()
+    ready = []
+    for event in [
+        _delta("Hel"),
+        _delta("lo"),
+        {"type": "progress", "provider": "codex", "label": "item.delta:reasoning", "detail": "a"},
+        {"type": "progress", "provider": "codex", "label": "item.delta:reasoning", "detail": "b"},
+        {"type": "done", "provider": "codex"},
+    ]:
+        ready.extend(coalescer.feed(event))
+
+    assert [event["type"] for event in ready] == ["message", "progress", "done"]
+    assert ready[0]["text"] == "Hello" and ready[0]["delta"] is True
+    assert ready[1]["detail"] == "ab"
+    assert not coalescer.pending
+
+
+def test_flushes_on_role_change_and_byte_budget() -> None:
+    coalescer = DeltaCoalescer(max_bytes=4)
+
+    assert coalescer.feed(_delta("ab")) == []
+    assert [event["text"] for event in coalescer.feed(_delta("cd"))] == ["abcd"]
+    assert coalescer.feed(_delta("x", role="user")) == []
+    assert [event["text"] for event in coalescer.feed(_delta("y"))] == ["x"]
+    assert [event["text"] for event in coalescer.flush()] == ["y"]
+
+
+@pytest.mark.asyncio
+async def test_latency_bound_flushes_before_a_late_delta() -> None:
+    closed = False
+
+    async def _source():
+        nonlocal closed
+        try:
+            yield _delta("a")
+            yield _delta("b")
+            await asyncio.sleep(0.03)
+            yield _delta("c")
+            yield {"type": "done", "provider": "codex"}
+        finally:
+            closed = True
+
+    stream = coalesce_events(_source(), max_latency_ms=10)
+    assert (await stream.__anext__())["text"] == "ab"
+    assert (await stream.__anext__())["text"] == "c"
+    assert (await stream.__anext__())["type"] == "done"
+    await stream.aclose()
+    assert closed
+
+
+@pytest.mark.asyncio
+async def test_source_is_iterated_in_the_consumer_task() -> None:
+    tasks = []
+
+    async def _source():
+        for text in ("a", "b", "c"):
+            tasks.append(asyncio.current_task())
+            yield _delta(text)
+            await asyncio.sleep(0.005)
+        tasks.append(asyncio.current_task())
+
+    merged = [event async for event in coalesce_events(_source(), max_latency_ms=1)]
+
+    assert "".join(event["text"] for event in merged) == "abc"
+    assert set(tasks) == {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_latency_bound_holds_while_an_untied_source_stalls() -> None:
+    release = asyncio.Event()
+    closed = False
+
+    async def _source():
+        nonlocal closed
+        try:
+            yield _delta("a")
+            yield _delta("b")
+            await release.wait()
+            yield _delta("c")
+            await release.wait()
+        finally:
+            closed = True
+
+    stream = coalesce_events(_source(), max_latency_ms=10, task_bound=False)
+    merged = await asyncio.wait_for(stream.__anext__(), 1)
+    assert merged["text"] == "ab"
+
+    release.set()
+    assert (await asyncio.wait_for(stream.__anext__(), 1))["text"] == "c"
+    release.clear()
+    await stream.aclose()
+    assert closed
+
+
+@pytest.mark.asyncio
+async def test_task_bound_source_holds_a_merge_until_its_next_event() -> None:
+    release = asyncio.Event()
+
+    async def _source():
+        yield _delta("a")
+        await release.wait()
+        yield {"type": "done", "provider": "codex"}
+
+    stream = coalesce_events(_source(), max_latency_ms=1)
+    pending = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0.02)
+    assert not pending.done()
+
+    release.set()
+    assert (await pending)["text"] == "a"
+    assert (await stream.__anext__())["type"] == "done"
+    await stream.aclose()
+
+
+def test_merging_resolves_lazy_original_items() -> None:
+    def _with_original(event: dict[str, Any]) -> dict[str, Any]:
+        return {**event, "originalItem": LazyOriginal(lambda: {"text": event["text"]})}
+
+    coalescer = DeltaCoalescer()
+    coalescer.feed(_with_original(_delta("a")))
+    coalescer.feed(_with_original(_delta("b")))
+    assert coalescer.flush()[0]["originalItem"] == [{"text": "a"}, {"text": "b"}]
+
+    resolved = []
+
+    def _compact(text: str) -> CompactEvent:
+        original = LazyOriginal(lambda: resolved.append(text) or {"text": text})
+        return CompactEvent.from_event({**_delta(text), "originalItem": original})
+
+    coalescer.feed(_compact("a"))
+    coalescer.feed(_compact("b"))
+    merged = coalescer.flush()[0]
+    assert isinstance(merged, CompactEvent) and merged["text"] == "ab"
+    assert resolved == []
+    assert merged["originalItem"] == [{"text": "a"}, {"text": "b"}]
+
+
+@pytest.mark.asyncio
+async def test_coalescing_is_opt_in() -> None:
+    async def _source():
+        yield _delta("a")
+
+    source = _source()
+    assert coalesce_run_events(source, {}) is source
+    assert [event async for event in coalesce_run_events(_source(), {"coalesce": True})] == [_delta("a")]
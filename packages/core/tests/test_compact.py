@@ -0,0 +1,62 @@
+"""Tests covering the compact event representation."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+
+import pytest
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import CompactEvent, EventPipeline  # noqa: E402
+
+
+def _event() -> dict:
+    return {
+        "type": "message",
+        "provider": "codex",
+        "role": "assistant",
+        "text": "hi",
+        "delta": True,
+        "ts": 5,
+        "originalItem": {"item": {"text": "hi"}},
+    }
+
+
+def test_compact_event_behaves_like_a_read_only_mapping() -> None:
+    event = CompactEvent.from_event(_event())
+
+    assert event["type"] == "message" and event.type == "message"
+    assert event.get("text") == "hi"
+    assert event.get("label") is None
+    assert "role" in event and "label" not in event
+    assert event["originalItem"] == {"item": {"text": "hi"}}
+    assert event["originalItem"] is not event["originalItem"]
+    assert dict(event) == _event() == event.to_dict()
+    assert len(event) == len(_event())
+    with pytest.raises(KeyError):
+        event["callId"]
+
+
+def test_non_json_original_items_are_kept_as_objects() -> None:
+    marker = object()
+    event = CompactEvent.from_event({"type": "done", "provider": "claude", "ts": 1, "originalItem": marker})
+
+    assert event["originalItem"] is marker
+
+
+def test_pipeline_compacts_events_after_filtering() -> None:
+    pipeline = EventPipeline.from_run_opts(
+        "codex",
+        {"compactEvents": True, "eventFilter": {"originalItem": False}},
+    )
+    assert pipeline is not None
+
+    (event,) = pipeline.feed(_event())
+
+    assert isinstance(event, CompactEvent)
+    assert "originalItem" not in event
@@ -0,0 +1,52 @@
+"""Tests covering event filter pushdown helpers."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import EventFilter, EventPipeline, extract_event_type  # noqa: E402
+
+TYPE_MAP = {"item.delta": frozenset({"message", "progress"}), "turn.completed": frozenset({"usage", "done"})}
+
+
+def test_extract_event_type_reads_only_the_top_level_field() -> None:
+    assert extract_event_type(b'{"type": "item.delta", "item": {"type": "reasoning"}}\n') == "item.delta"
+    assert extract_event_type('{"id": 1,"type":"turn.completed"}') == "turn.completed"
+    assert extract_event_type(b'{"item": {"type": "reasoning"}, "type": "item.delta"}') is None
+    assert extract_event_type(b"not json") is None
+
+
+def test_screen_skips_lines_that_cannot_produce_wanted_events() -> None:
+    event_filter = EventFilter(types=["done"])
+
+    assert event_filter.screen(b'{"type": "turn.completed"}', TYPE_MAP, frozenset({"progress"}))
+    assert not event_filter.screen(b'{"type": "item.delta"}', TYPE_MAP, frozenset({"progress"}))
+    assert not event_filter.screen(b'{"type": "mystery"}', TYPE_MAP, frozenset({"progress"}))
+    assert event_filter.screen(b'{"item": {}, "type": "item.delta"}', TYPE_MAP, frozenset({"progress"}))
+
+
+def test_pipeline_keeps_types_needed_by_stages() -> None:
+    pipeline = EventPipeline.from_run_opts(
+        "codex",
+        {
+            "outputSchema": {"type": "object", "required": ["summary"]},
+            "validateOutput": True,
+            "eventFilter": {"types": ["error", "done"], "originalItem": False},
+        },
+    )
+    assert pipeline is not None and pipeline.event_filter is not None
+    assert pipeline.event_filter.needs("message")
+
+    message = {"type": "message", "provider": "codex", "text": "{}", "originalItem": {"raw": True}}
+    done = {"type": "done", "provider": "codex", "originalItem": {"raw": True}}
+    events = pipeline.feed_all([message, done])
+
+    assert [event["type"] for event in events] == ["error", "done"]
+    assert "originalItem" not in events[1]
+    assert EventPipeline.from_run_opts("codex", {"eventFilter": {}}) is None
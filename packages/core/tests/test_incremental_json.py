@@ -0,0 +1,108 @@
+"""Tests covering incremental parsing of streamed structured output."""
+
+from __future__ import annotations
+
+import json
+import pathlib
+import sys
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import EventPipeline, IncrementalJsonParser  # noqa: E402
+
+PAYLOAD = {
+    "summary": 'two "issues"',
+    "issues": [{"file": "a.py", "line": 3}, {"file": "b}.py", "tags": ["x", "y"]}],
+    "ok": False,
+}
+REVIEW_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "issues": {
+            "type": "array",
+            "items": {"type": "object", "required": ["file", "severity"]},
+        },
+    },
+}
+
+
+def _feed_chars(parser: IncrementalJsonParser, text: str) -> list:
+    completed = []
+    for char in text:
+        completed.extend(parser.feed(char))
+    return completed
+
+
+def test_reports_members_and_items_as_they_complete() -> None:
+    text = "Here is the review [draft]:\n```json\n" + json.dumps(PAYLOAD) + "\n```"
+    parser = IncrementalJsonParser()
+
+    completed = _feed_chars(parser, text)
+
+    assert completed == [
+        (("summary",), 'two "issues"'),
+        (("issues", 0), {"file": "a.py", "line": 3}),
+        (("issues", 1), {"file": "b}.py", "tags": ["x", "y"]}),
+        (("issues",), PAYLOAD["issues"]),
+        (("ok",), False),
+    ]
+    assert parser.done
+    assert parser.root == PAYLOAD
+
+
+def test_first_item_is_reported_before_the_document_ends() -> None:
+    text = json.dumps(PAYLOAD)
+    cut = text.index("}") + 1
+    parser = IncrementalJsonParser()
+
+    early = parser.feed(text[:cut])
+
+    assert early[-1] == (("issues", 0), {"file": "a.py", "line": 3})
+    assert not parser.done
+
+
+def test_pipeline_emits_structured_deltas_from_message_deltas() -> None:
+    pipeline = EventPipeline.from_run_opts(
+        "codex", {"outputSchema": REVIEW_SCHEMA, "streamStructuredOutput": True, "validateOutput": True}
+    )
+    assert pipeline is not None
+    text = json.dumps({"issues": [{"file": "a.py", "severity": "low"}, {"file": "b.py"}]})
+    events = []
+    for start in range(0, len(text), 7):
+        chunk = text[start : start + 7]
+        events.extend(pipeline.feed({"type": "message", "provider": "codex", "text": chunk, "delta": True}))
+    events.extend(pipeline.feed({"type": "message", "provider": "codex", "text": text}))
+
+    deltas = [event for event in events if event["type"] == "structured_delta"]
+    assert [delta["path"] for delta in deltas] == [["issues", 0], ["issues", 1], ["issues"]]
+    assert "validationErrors" not in deltas[0]
+    assert deltas[1]["validationErrors"] == ["$.issues[1]: 'severity' is a required property"]
+
+
+def test_pipeline_parses_complete_messages_without_deltas() -> None:
+    run_opts = {"outputSchema": REVIEW_SCHEMA, "streamStructuredOutput": True}
+    pipeline = EventPipeline.from_run_opts("gemini", run_opts)
+    assert pipeline is not None
+
+    events = pipeline.feed({"type": "message", "provider": "gemini", "text": '{"issues": []}'})
+
+    assert [event["type"] for event in events] == ["message", "structured_delta"]
+    assert events[1]["path"] == ["issues"]
+    assert EventPipeline.from_run_opts("gemini", {"outputSchema": REVIEW_SCHEMA}) is None
+
+
+def test_values_split_across_chunk_boundaries_match_a_single_feed() -> None:
+    text = json.dumps({"summary": 'a "quoted" \\ path ' * 50, "issues": [{"line": 12345}], "ok": True})
+    whole = IncrementalJsonParser()
+    expected = whole.feed(text)
+
+    for size in (1, 2, 3, 7):
+        parser = IncrementalJsonParser()
+        completed = []
+        for start in range(0, len(text), size):
+            completed.extend(parser.feed(text[start : start + size]))
+        assert completed == expected
+        assert parser.root == whole.root == json.loads(text)
@@ -0,0 +1,52 @@
+"""Tests covering structured output extraction and repair."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import extract_json_payload, repair_json  # noqa: E402
+
+SUMMARY_SCHEMA = {"type": "object", "properties": {"summary": {"type": "string"}}, "required": ["summary"]}
+
+
+def test_extracts_top_level_arrays() -> None:
+    assert extract_json_payload("Files touched: [\"a.py\", \"b.py\"]. Done.") == ["a.py", "b.py"]
+
+
+def test_prefers_fenced_blocks_over_trailing_prose() -> None:
+    text = 'Result:\n```json\n{"summary": "ok"}\n```\nLet me know if {"more": "is needed"}.'
+
+    assert extract_json_payload(text) == {"summary": "ok"}
+
+
+def test_picks_the_candidate_matching_the_schema() -> None:
+    text = 'I looked at {"file": "a.py"} first, then produced {"summary": "all good"} as requested.'
+
+    assert extract_json_payload(text, SUMMARY_SCHEMA) == {"summary": "all good"}
+
+
+def test_repairs_near_json() -> None:
+    text = "{'summary': 'it\\'s fine', 'ok': True, 'missing': None, // model note\n 'items': [1, 2,],}"
+
+    expected = {"summary": "it's fine", "ok": True, "missing": None, "items": [1, 2]}
+    assert extract_json_payload(text) == expected
+    assert repair_json('{"a": [1, 2]}') == '{"a": [1, 2]}'
+
+
+def test_survives_unbalanced_prose_brackets() -> None:
+    text = "Note [see the review: {\"summary\": \"truncated\"} and braces \"}\" in strings"
+
+    assert extract_json_payload(text) == {"summary": "truncated"}
+    assert extract_json_payload("no payload here") is None
+
+
+def test_prose_apostrophes_inside_brackets_do_not_hide_the_payload() -> None:
+    text = 'I checked [the user\'s config] and the result is {"summary": "ok"}'
+
+    assert extract_json_payload(text) == {"summary": "ok"}
@@ -0,0 +1,69 @@
+"""Tests for the run middleware chain."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+from typing import Any, Optional
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import (  # noqa: E402
+    EventPipeline,
+    MiddlewareChain,
+    MiddlewareStack,
+    RunMiddleware,
+    RunProgress,
+    RunReport,
+    clear_middleware,
+    register_middleware,
+)
+
+
+class _Tagger(RunMiddleware):
+    def __init__(self, tag: str) -> None:
+        self.tag = tag
+
+    def on_event(self, event: Any) -> Optional[Any]:
+        if event.get("type") == "progress":
+            return None
+        return {**event, "tags": [*event.get("tags", []), self.tag]}
+
+
+class _Failing(RunMiddleware):
+    def after_run(self, report: RunReport) -> None:
+        raise RuntimeError("boom")
+
+
+def test_chain_skips_hooks_nobody_implements() -> None:
+    assert MiddlewareChain.compile([RunMiddleware()]) is None
+    assert EventPipeline.from_run_opts("codex", None, MiddlewareChain.compile([RunMiddleware()])) is None
+
+    chain = MiddlewareChain.compile([_Tagger("a"), _Failing()])
+    assert chain is not None
+    assert (chain.before_spawn, chain.on_stdout_chunk) == (None, None)
+    chain.after_run(RunReport(RunProgress("codex").snapshot()))  # logged, not raised
+
+    pipeline = EventPipeline.from_run_opts("codex", None, chain)
+    assert pipeline is not None
+    assert pipeline.feed({"type": "progress"}) == []
+    assert pipeline.feed({"type": "message"}) == [{"type": "message", "tags": ["a"]}]
+
+
+def test_stack_recompiles_when_global_or_local_middleware_changes() -> None:
+    stack = MiddlewareStack([_Tagger("local")])
+    first = stack.chain()
+    assert stack.chain() is first
+
+    register_middleware(_Tagger("global"))
+    try:
+        chain = stack.chain()
+        assert chain is not first and chain is not None
+        assert chain.event_stage is not None
+        assert chain.event_stage({"type": "message"}) == [{"type": "message", "tags": ["global", "local"]}]
+    finally:
+        clear_middleware()
+    assert stack.chain() is not chain
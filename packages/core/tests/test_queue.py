@@ -0,0 +1,145 @@
+"""Tests covering the per-thread turn queue."""
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import sys
+
+import pytest
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import (  # noqa: E402
+    AbortController,
+    CancellationError,
+    TurnQueue,
+    TurnQueueFullError,
+)
+
+
+@pytest.mark.asyncio
+async def test_turns_run_one_at_a_time_in_submission_order() -> None:
+    queue = TurnQueue()
+    gate = asyncio.Event()
+    order: list[str] = []
+
+    async def _turn(name: str) -> str:
+        order.append(f"start {name}")
+        await gate.wait()
+        order.append(f"end {name}")
+        return name
+
+    tasks = [asyncio.create_task(queue.run(lambda name=name: _turn(name))) for name in "abc"]
+    await asyncio.sleep(0)
+    assert queue.busy and queue.depth == 2
+
+    gate.set()
+    assert await asyncio.gather(*tasks) == ["a", "b", "c"]
+    assert order == ["start a", "end a", "start b", "end b", "start c", "end c"]
+    stats = queue.stats()
+    assert (stats.depth, stats.busy, stats.max_depth, stats.turns) == (0, False, 2, 3)
+    assert stats.total_wait_ms >= stats.last_wait_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue_without_blocking_others() -> None:
+    queue = TurnQueue()
+    gate = asyncio.Event()
+    controller = AbortController()
+    ran: list[str] = []
+
+    async def _turn(name: str) -> None:
+        ran.append(name)
+        await gate.wait()
+
+    first = asyncio.create_task(queue.run(lambda: _turn("first")))
+    skipped = asyncio.create_task(queue.run(lambda: _turn("skipped"), {"signal": controller.signal}))
+    last = asyncio.create_task(queue.run(lambda: _turn("last")))
+    await asyncio.sleep(0)
+
+    controller.abort("user left")
+    with pytest.raises(CancellationError, match="user left"):
+        await skipped
+    assert queue.depth == 1
+
+    gate.set()
+    await asyncio.gather(first, last)
+    assert ran == ["first", "last"]
+
+
+@pytest.mark.asyncio
+async def test_streams_hold_the_slot_until_closed_and_full_queue_rejects() -> None:
+    queue = TurnQueue(max_pending=1)
+
+    async def _events(name: str):
+        for index in range(3):
+            yield f"{name}{index}"
+
+    async with queue.stream(lambda: _events("a")) as events:
+        assert await events.__anext__() == "a0"
+        waiting = asyncio.create_task(queue.run(lambda: asyncio.sleep(0)))
+        await asyncio.sleep(0)
+        with pytest.raises(TurnQueueFullError):
+            await queue.run(lambda: asyncio.sleep(0))
+    await waiting
+    assert [item async for item in queue.stream(lambda: _events("b"))] == ["b0", "b1", "b2"]
+    assert not queue.busy
+
+
+@pytest.mark.asyncio
+async def test_streams_keep_their_submission_order_when_iterated_late() -> None:
+    queue = TurnQueue()
+    gate = asyncio.Event()
+    order: list[str] = []
+
+    async def _events(name: str):
+        order.append(name)
+        yield name
+
+    async def _turn(name: str) -> None:
+        order.append(name)
+        await gate.wait()
+
+    first = asyncio.create_task(queue.run(lambda: _turn("run a")))
+    await asyncio.sleep(0)
+    stream = queue.stream(lambda: _events("stream"))
+    second = asyncio.create_task(queue.run(lambda: _turn("run b")))
+    await asyncio.sleep(0)
+    assert queue.depth == 2
+
+    gate.set()
+    await first
+    await asyncio.sleep(0)
+    assert order == ["run a"]
+    assert [item async for item in stream] == ["stream"]
+    await second
+    assert order == ["run a", "stream", "run b"]
+    assert not queue.busy
+
+
+@pytest.mark.asyncio
+async def test_unused_streams_give_their_place_back() -> None:
+    queue = TurnQueue()
+
+    closed = queue.stream(lambda: _never())
+    assert queue.busy
+    await closed.aclose()
+    assert not queue.busy
+
+    held = queue.stream(lambda: _never())
+    queued = queue.stream(lambda: _never())
+    assert queue.depth == 1
+    del queued
+    assert queue.depth == 0
+    del held
+    assert not queue.busy
+    assert await queue.run(lambda: asyncio.sleep(0, "ran")) == "ran"
+
+
+async def _never():
+    raise AssertionError("an unused stream must not start its turn")
+    yield  # pragma: no cover
@@ -0,0 +1,50 @@
+"""Tests covering the output schema registry."""
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import sys
+
+import pytest
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import SchemaRegistry  # noqa: E402
+
+
+def test_equivalent_schemas_share_one_registration(tmp_path: pathlib.Path) -> None:
+    registry = SchemaRegistry(cache_dir=str(tmp_path))
+    first = registry.register({"type": "object", "required": ["a"]})
+    second = registry.register({"required": ["a"], "type": "object"})
+
+    assert first is second
+    assert registry.prompt_snippet({"type": "object", "required": ["a"]}) == first.snippet
+
+
+def test_mutated_schema_is_registered_again(tmp_path: pathlib.Path) -> None:
+    registry = SchemaRegistry(cache_dir=str(tmp_path))
+    schema = {"type": "object"}
+    before = registry.schema_hash(schema)
+    schema["required"] = ["a"]
+
+    assert registry.schema_hash(schema) != before
+
+
+@pytest.mark.asyncio
+async def test_schema_files_are_content_addressed_and_reused(tmp_path: pathlib.Path) -> None:
+    registry = SchemaRegistry(cache_dir=str(tmp_path))
+    schema = {"type": "object", "properties": {"summary": {"type": "string"}}}
+
+    paths = await asyncio.gather(*(registry.schema_path(schema) for _ in range(5)))
+    path = pathlib.Path(paths[0])
+
+    assert set(paths) == {str(path)}
+    assert path.parent == tmp_path / "schemas"
+    assert path.stem == registry.schema_hash(schema)
+    assert path.read_text(encoding="utf-8") == registry.prompt_snippet(schema)
+    # A second registry pointed at the same directory reuses the file.
+    assert SchemaRegistry(cache_dir=str(tmp_path)).schema_path_sync(dict(schema)) == str(path)
@@ -0,0 +1,134 @@
+"""Tests covering single-flight coalescing of identical runs."""
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import sys
+from typing import Any, Optional
+
+import pytest
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import (  # noqa: E402
+    AbortController,
+    CancellationError,
+    PromptInput,
+    RunOpts,
+    RunResult,
+    SingleFlight,
+)
+
+
+class _GatedThread:
+    """Thread double whose runs block until the test releases them."""
+
+    def __init__(self) -> None:
+        self.provider = "codex"
+        self.id: Optional[str] = None
+        self.internal: dict[str, Any] = {}
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.signals: list[Any] = []
+
+    async def run(self, input: PromptInput, opts: Optional[RunOpts] = None) -> RunResult:
+        self.calls += 1
+        signal = (opts or {}).get("signal")
+        self.signals.append(signal)
+        waiter = asyncio.ensure_future(self.release.wait())
+        aborted = asyncio.ensure_future(signal.wait())
+        await asyncio.wait({waiter, aborted}, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        aborted.cancel()
+        if signal.aborted:
+            raise CancellationError(signal.reason)
+        return RunResult(thread_id="shared", text=f"answer to {input}")
+
+    def run_streamed(self, input: PromptInput, opts: Optional[RunOpts] = None):
+        async def _iterator():
+            self.calls += 1
+            yield {"type": "init", "provider": "codex", "threadId": "shared", "ts": 0}
+            await self.release.wait()
+            yield {"type": "message", "provider": "codex", "role": "assistant", "text": "hi", "ts": 1}
+            yield {"type": "done", "provider": "codex", "ts": 2}
+
+        return _iterator()
+
+    async def interrupt(self, reason: Optional[str] = None) -> None:  # pragma: no cover
+        return None
+
+    async def close(self) -> None:  # pragma: no cover
+        return None
+
+
+@pytest.mark.asyncio
+async def test_identical_runs_share_one_execution() -> None:
+    group = SingleFlight()
+    thread = _GatedThread()
+    tasks = [asyncio.create_task(group.run(thread, "review", key="k")) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert group.in_flight() == 1
+
+    thread.release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert thread.calls == 1
+    assert {result.text for result in results} == {"answer to review"}
+    assert group.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_run_survives_until_last_waiter_cancels() -> None:
+    group = SingleFlight()
+    thread = _GatedThread()
+    first, second = AbortController(), AbortController()
+    task_a = asyncio.create_task(group.run(thread, "review", {"signal": first.signal}, key="k"))
+    task_b = asyncio.create_task(group.run(thread, "review", {"signal": second.signal}, key="k"))
+    await asyncio.sleep(0)
+
+    first.abort("caller A left")
+    with pytest.raises(CancellationError):
+        await task_a
+    assert thread.signals[0].aborted is False
+
+    second.abort("caller B left")
+    with pytest.raises(CancellationError):
+        await task_b
+    await asyncio.sleep(0)
+    assert thread.signals[0].aborted is True
+
+
+@pytest.mark.asyncio
+async def test_streams_are_broadcast_to_late_subscribers() -> None:
+    group = SingleFlight()
+    thread = _GatedThread()
+
+    async def _collect() -> list[str]:
+        return [event["type"] async for event in group.run_streamed(thread, "plan", key="k")]
+
+    early = asyncio.create_task(_collect())
+    await asyncio.sleep(0.01)
+    late = asyncio.create_task(_collect())
+    await asyncio.sleep(0.01)
+    thread.release.set()
+
+    assert await early == ["init", "message", "done"]
+    assert await late == ["init", "message", "done"]
+    assert thread.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_key_for_distinguishes_schemas(tmp_path: pathlib.Path) -> None:
+    group = SingleFlight(fingerprint_workspace=False)
+    thread = _GatedThread()
+    start_opts = {"workingDirectory": str(tmp_path)}
+
+    plain = await group.key_for(thread, "x", None, start_opts)
+    structured = await group.key_for(thread, "x", {"outputSchema": {"type": "object"}}, start_opts)
+
+    assert plain != structured
+    assert plain == await group.key_for(thread, "x", {}, start_opts)
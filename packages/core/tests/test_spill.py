@@ -0,0 +1,48 @@
+"""Tests covering disk spilling of oversized event payloads."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import EventPipeline, SpilledPayload, SpillFile, spill_value  # noqa: E402
+
+
+def test_spill_value_round_trips_text_and_json(tmp_path: pathlib.Path) -> None:
+    file = SpillFile(str(tmp_path))
+    log = "é" * 600
+    payload = {"item": {"output": "x" * 2000, "exit_code": 0}}
+
+    text_handle = spill_value(log, file, threshold=1000)
+    json_handle = spill_value(payload, file, threshold=1000)
+
+    assert isinstance(text_handle, SpilledPayload) and isinstance(json_handle, SpilledPayload)
+    assert text_handle.length == 1200 and text_handle.preview == "é" * 256
+    assert text_handle.read() == log
+    assert json_handle.read() == payload
+    assert spill_value("short", file, threshold=1000) == "short"
+    assert spill_value({"a": [1, 2]}, file, threshold=1000) == {"a": [1, 2]}
+
+
+def test_pipeline_spills_results_over_threshold() -> None:
+    pipeline = EventPipeline.from_run_opts("codex", {"spillThreshold": 64})
+    assert pipeline is not None
+    output = "build output\n" * 100
+    event = {
+        "type": "tool_result",
+        "provider": "codex",
+        "result": output,
+        "ts": 1,
+        "originalItem": {"type": "item.completed", "item": {"output": output}},
+    }
+
+    (spilled,) = pipeline.feed(event)
+
+    assert isinstance(spilled["result"], SpilledPayload)
+    assert spilled["result"].read() == output
+    assert spilled["originalItem"].read()["item"]["output"] == output
@@ -0,0 +1,94 @@
+"""Tests for adapter-wide run tracking and draining."""
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import sys
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import pytest
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import (  # noqa: E402
+    AdapterShutdownError,
+    RunProgress,
+    RunTracker,
+    active_runs,
+    interrupt_all,
+)
+
+
+class _Handle:
+    """Thread handle stub that finishes its run when interrupted."""
+
+    def __init__(self, tracker: RunTracker) -> None:
+        self.tracker = tracker
+        self.reasons: list[Optional[str]] = []
+        self.run: Any = None
+
+    async def interrupt(self, reason: Optional[str] = None) -> None:
+        self.reasons.append(reason)
+        self.tracker.discard(self.run)
+
+
+@dataclass(eq=False)
+class _Run:
+    handle: _Handle
+
+
+def _start(tracker: RunTracker) -> _Handle:
+    handle = _Handle(tracker)
+    handle.run = _Run(handle)
+    tracker.add(handle.run)
+    return handle
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_runs_that_finish_in_time() -> None:
+    tracker = RunTracker()
+    handle = _start(tracker)
+    assert handle in active_runs()
+
+    asyncio.get_running_loop().call_later(0.01, tracker.discard, handle.run)
+    assert await tracker.drain(1) is True
+
+    assert handle.reasons == []
+    assert tracker.active_runs() == []
+    with pytest.raises(AdapterShutdownError):
+        tracker.check_accepting()
+
+
+@pytest.mark.asyncio
+async def test_drain_escalates_and_interrupt_all_spans_trackers() -> None:
+    first, second = RunTracker(), RunTracker()
+    handles = [_start(first), _start(second)]
+
+    assert await interrupt_all("stop") >= 2
+    assert [handle.reasons for handle in handles] == [["stop"], ["stop"]]
+
+    straggler = _start(first)
+    assert await first.drain(0.01, reason="shutdown") is False
+    assert straggler.reasons == ["shutdown"]
+    assert first.active_runs() == []
+
+
+def test_progress_tracks_tools_and_snapshots_counters() -> None:
+    progress = RunProgress("codex")
+    progress.read_lines([b"{}", b"{}"])
+    progress.observe("tool_use", "bash")
+    progress.observe("tool_use")
+    progress.observe("tool_result")
+    assert progress.current_tool == "tool"
+    progress.observe("tool_result")
+
+    snapshot = progress.snapshot(thread_id="t", pid=42, queued_turns=2)
+    assert (snapshot.events, snapshot.stdout_bytes, snapshot.current_tool) == (4, 6, None)
+    assert (snapshot.thread_id, snapshot.pid, snapshot.queued_turns) == ("t", 42, 2)
+    assert snapshot.last_event_type == "tool_result"
+    assert snapshot.started_at <= snapshot.last_event_at
@@ -0,0 +1,123 @@
+"""Tests covering structured output validation."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+
+import pytest
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import (  # noqa: E402
+    EventPipeline,
+    InvalidSchemaError,
+    SchemaValidatorCache,
+    check_output_schema,
+    validate_run_output,
+    validate_structured_output,
+)
+
+REVIEW_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "issues": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string"},
+                    "severity": {"type": "string", "enum": ["high", "medium", "low"]},
+                },
+                "required": ["file", "severity"],
+            },
+        },
+    },
+    "required": ["issues"],
+}
+
+
+def test_valid_payload_has_no_errors() -> None:
+    payload = {"issues": [{"file": "a.py", "severity": "low"}]}
+
+    assert validate_structured_output(REVIEW_SCHEMA, payload) == []
+
+
+def test_invalid_payload_reports_paths() -> None:
+    payload = {"issues": [{"file": 3, "severity": "urgent"}, {}]}
+
+    errors = validate_structured_output(REVIEW_SCHEMA, payload)
+
+    assert any(error.startswith("$.issues[0].file") for error in errors)
+    assert any(error.startswith("$.issues[0].severity") for error in errors)
+    assert any(error.startswith("$.issues[1]") and "'file'" in error for error in errors)
+
+
+def test_validators_are_compiled_once_per_schema() -> None:
+    cache = SchemaValidatorCache()
+    first = cache.get(REVIEW_SCHEMA)
+    second = cache.get({**REVIEW_SCHEMA})
+
+    assert first is second
+
+
+def test_validate_run_output_only_runs_when_requested() -> None:
+    assert validate_run_output({"outputSchema": REVIEW_SCHEMA}, {}) is None
+    assert validate_run_output({"outputSchema": REVIEW_SCHEMA, "validateOutput": True}, None) == [
+        "$: no JSON payload found in the response"
+    ]
+    assert validate_run_output({"outputSchema": REVIEW_SCHEMA, "validateOutput": True}, {"issues": []}) == []
+
+
+@pytest.mark.parametrize(
+    "schema",
+    [
+        {"type": "object", "properties": {"id": {"type": "string", "pattern": "("}}},
+        {"type": "object", "properties": [{"id": {"type": "string"}}]},
+    ],
+    ids=["invalid-pattern", "invalid-schema"],
+)
+def test_broken_schemas_fail_up_front_and_are_reported_at_the_end(schema: dict) -> None:
+    run_opts = {"outputSchema": schema, "validateOutput": True}
+
+    with pytest.raises(InvalidSchemaError):
+        check_output_schema(run_opts)
+    check_output_schema({"outputSchema": schema})
+
+    errors = validate_run_output(run_opts, {"id": "x"})
+    assert errors is not None and len(errors) == 1
+    assert errors[0].startswith("$: invalid output schema:")
+
+
+def test_pipeline_flags_invalid_message_before_done() -> None:
+    pipeline = EventPipeline.from_run_opts("codex", {"outputSchema": REVIEW_SCHEMA, "validateOutput": True})
+    assert pipeline is not None
+
+    staged = pipeline.feed(
+        {"type": "message", "provider": "codex", "role": "assistant", "text": '{"issues": "none"}', "ts": 0}
+    )
+    done = pipeline.feed({"type": "done", "provider": "codex", "ts": 1})
+
+    assert [event["type"] for event in staged] == ["message", "error"]
+    assert staged[1]["code"] == "output.schema_mismatch"
+    assert staged[1]["validationErrors"]
+    assert [event["type"] for event in done] == ["done"]
+
+
+def test_pipeline_reports_missing_payload_at_done() -> None:
+    pipeline = EventPipeline.from_run_opts("gemini", {"outputSchema": REVIEW_SCHEMA, "validateOutput": True})
+    assert pipeline is not None
+
+    pipeline.feed(
+        {"type": "message", "provider": "gemini", "role": "assistant", "text": "Sure!", "delta": True}
+    )
+    done = pipeline.feed({"type": "done", "provider": "gemini", "ts": 1})
+
+    assert [event["type"] for event in done] == ["error", "done"]
+
+
+def test_pipeline_is_disabled_without_validation() -> None:
+    assert EventPipeline.from_run_opts("codex", {"outputSchema": REVIEW_SCHEMA}) is None
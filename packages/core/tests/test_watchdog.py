@@ -0,0 +1,53 @@
+"""Tests covering the run deadline and idle watchdog."""
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import sys
+
+import pytest
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+SRC_DIR = PACKAGE_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from headless_coder_sdk.core import CancellationError, RunTimeoutError, RunWatchdog  # noqa: E402
+
+
+@pytest.mark.asyncio
+async def test_idle_timer_rearms_on_activity_and_deadline_still_applies() -> None:
+    reasons: list[str] = []
+    watchdog = RunWatchdog(reasons.append, timeout_ms=120, idle_timeout_ms=60)
+
+    for _ in range(4):
+        await asyncio.sleep(0.02)
+        watchdog.touch()
+    assert reasons == []
+
+    await asyncio.sleep(0.1)
+    assert watchdog.expired
+    assert len(reasons) == 1 and "timeout" in reasons[0]
+
+
+@pytest.mark.asyncio
+async def test_tools_get_their_own_idle_budget() -> None:
+    reasons: list[str] = []
+    watchdog = RunWatchdog(reasons.append, idle_timeout_ms=30, tool_idle_timeout_ms=200)
+
+    watchdog.observe("tool_use")
+    await asyncio.sleep(0.08)
+    assert reasons == []
+
+    watchdog.observe("tool_result")
+    await asyncio.sleep(0.08)
+    assert reasons == ["Run produced no output for 0.03s"]
+    watchdog.cancel()
+
+
+def test_timeout_error_is_a_cancellation_with_its_own_code() -> None:
+    assert RunWatchdog.from_run_opts({}, lambda reason: None) is None
+    error = RunTimeoutError("slow")
+    assert isinstance(error, CancellationError)
+    assert error.code == "timeout"
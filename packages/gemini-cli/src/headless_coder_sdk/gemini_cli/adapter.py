@@ -6,26 +6,65 @@ import asyncio
 import json
 import logging
 import os
-from dataclasses import dataclass
-from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional, Sequence
 
 from headless_coder_sdk.core import (
+    CancellationError,
     CoderStreamEvent,
+    EventBatchIterator,
+    EventFilter,
     EventIterator,
+    EventPipeline,
+    EventStream,
     HeadlessCoder,
+    MiddlewareChain,
+    MiddlewareStack,
     PromptInput,
+    RawEvent,
+    RawEventIterator,
+    RunMiddleware,
     RunOpts,
+    RunProgress,
+    RunReport,
     RunResult,
+    RunSnapshot,
+    RunTimeoutError,
+    RunTracker,
+    RunWatchdog,
+    SpawnRequest,
     StartOpts,
     ThreadHandle,
+    TurnQueue,
+    check_output_schema,
+    coalesce_run_batches,
+    coalesce_run_events,
+    extract_event_type,
+    extract_json_payload,
+    get_schema_registry,
+    iterate_batches,
     link_signal,
     now,
+    read_line_batches,
+    validate_run_output,
 )
 
 LOGGER = logging.getLogger(__name__)
 CODER_NAME = "gemini"
 SOFT_KILL_DELAY = 0.25
 HARD_KILL_DELAY = 1.5
+
+# Normalised event types each raw Gemini event type can produce; unknown types become progress.
+_GEMINI_EVENT_TYPES: dict[str, frozenset[str]] = {
+    "init": frozenset({"init"}),
+    "message": frozenset({"message"}),
+    "tool_use": frozenset({"tool_use"}),
+    "tool_result": frozenset({"tool_result"}),
+    "error": frozenset({"error"}),
+    "result": frozenset({"usage", "done"}),
+}
+_GEMINI_DEFAULT_EVENT_TYPES = frozenset({"progress"})
+
 STRUCTURED_OUTPUT_SUFFIX = (
     "Respond with JSON that matches the provided schema. Do not include explanatory text outside the JSON."
 )
@@ -36,7 +75,7 @@ ProcessRunner = Callable[
 ]
 
 
-@dataclass
+@dataclass(eq=False)
 class ActiveRun:
     """Tracks an in-flight Gemini CLI invocation to coordinate cancellation."""
 
@@ -46,6 +85,23 @@ class ActiveRun:
     abort_reason: Optional[str] = None
     soft_kill_handle: Optional[asyncio.TimerHandle] = None
     hard_kill_handle: Optional[asyncio.TimerHandle] = None
+    watchdog: Optional[RunWatchdog] = None
+    timed_out: bool = False
+    handle: Optional["GeminiThreadHandle"] = None
+    middleware: Optional[MiddlewareChain] = None
+    result: Optional[RunResult] = None
+    error: Optional[BaseException] = None
+    progress: RunProgress = field(default_factory=lambda: RunProgress(CODER_NAME))
+
+    def snapshot(self) -> RunSnapshot:
+        """Returns the live progress of this run; stderr is not collected while streaming."""
+        queue = self.handle.internal.turn_queue if self.handle is not None else None
+        return self.progress.snapshot(
+            thread_id=self.handle.id if self.handle is not None else None,
+            pid=getattr(self.process, "pid", None),
+            queued_turns=queue.depth if queue is not None else 0,
+            aborted=self.aborted,
+        )
 
 
 @dataclass
@@ -55,6 +111,7 @@ class GeminiThreadState:
     opts: StartOpts
     thread_id: Optional[str] = None
     current_run: Optional[ActiveRun] = None
+    turn_queue: Optional[TurnQueue] = None
 
 
 class GeminiThreadHandle(ThreadHandle):
@@ -74,12 +131,32 @@ class GeminiThreadHandle(ThreadHandle):
 
     async def run(self, input: PromptInput, opts: Optional[RunOpts] = None) -> RunResult:
         """Executes a blocking Gemini turn."""
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return await queue.run(lambda: self._adapter._run_internal(self, input, opts), opts)
         return await self._adapter._run_internal(self, input, opts)
 
     def run_streamed(self, input: PromptInput, opts: Optional[RunOpts] = None) -> EventIterator:
         """Streams Gemini events as they are produced."""
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return queue.stream(lambda: self._adapter._run_streamed_internal(self, input, opts), opts)
         return self._adapter._run_streamed_internal(self, input, opts)
 
+    def run_streamed_batches(self, input: PromptInput, opts: Optional[RunOpts] = None) -> EventBatchIterator:
+        """Streams Gemini events as lists, one per stdout read."""
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return queue.stream(lambda: self._adapter._run_streamed_batches_internal(self, input, opts), opts)
+        return self._adapter._run_streamed_batches_internal(self, input, opts)
+
+    def run_raw(self, input: PromptInput, opts: Optional[RunOpts] = None) -> RawEventIterator:
+        """Streams Gemini's stream-json lines untouched, tagged with their top-level ``type``."""
+        queue = self.internal.turn_queue
+        if queue is not None:
+            return queue.stream(lambda: self._adapter._run_raw_internal(self, input, opts), opts)
+        return self._adapter._run_raw_internal(self, input, opts)
+
     async def interrupt(self, reason: Optional[str] = None) -> None:
         """Propagates an interrupt request to the adapter."""
         self._adapter._abort_child(self.internal, reason or "Interrupted")
@@ -96,26 +173,32 @@ class GeminiAdapter(HeadlessCoder):
         self,
         default_opts: Optional[StartOpts] = None,
         process_runner: Optional[ProcessRunner] = None,
+        middleware: Optional[Sequence[RunMiddleware]] = None,
     ) -> None:
         """Creates a Gemini adapter.
 
         Args:
             default_opts: Defaults applied to every start/resume call unless overridden.
             process_runner: Optional injection point for spawning the CLI (used in tests).
+            middleware: Middleware applied to this adapter's runs after the global middleware.
         """
         self._default_opts = default_opts or {}
         self._process_runner = process_runner or _spawn_process
+        self._runs = RunTracker()
+        self._middleware = MiddlewareStack(middleware)
 
     async def start_thread(self, opts: Optional[StartOpts] = None) -> ThreadHandle:
         """Starts a new stateless Gemini thread handle."""
         merged = self._merge_start_opts(opts)
-        state = GeminiThreadState(opts=merged)
+        state = GeminiThreadState(opts=merged, turn_queue=TurnQueue.from_start_opts(merged))
         return GeminiThreadHandle(self, state)
 
     async def resume_thread(self, thread_id: str, opts: Optional[StartOpts] = None) -> ThreadHandle:
         """Creates a handle that conceptually resumes a logical Gemini session."""
         merged = self._merge_start_opts(opts)
-        state = GeminiThreadState(opts=merged, thread_id=thread_id)
+        state = GeminiThreadState(
+            opts=merged, thread_id=thread_id, turn_queue=TurnQueue.from_start_opts(merged)
+        )
         return GeminiThreadHandle(self, state)
 
     def get_thread_id(self, thread: ThreadHandle) -> Optional[str]:
@@ -126,6 +209,26 @@ class GeminiAdapter(HeadlessCoder):
         """Invokes the handle level cleanup hook."""
         await thread.close()
 
+    def use(self, middleware: RunMiddleware) -> None:
+        """Adds ``middleware`` to this adapter's runs, after the globally registered middleware."""
+        self._middleware.use(middleware)
+
+    def active_runs(self) -> list[ThreadHandle]:
+        """Returns the handles of this adapter whose runs are in flight."""
+        return self._runs.active_runs()
+
+    def run_snapshots(self) -> list[RunSnapshot]:
+        """Returns what each in-flight run of this adapter is doing right now, oldest first."""
+        return self._runs.snapshots()
+
+    async def interrupt_all(self, reason: Optional[str] = None) -> int:
+        """Interrupts every in-flight run and returns how many were signalled."""
+        return await self._runs.interrupt_all(reason)
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Stops accepting runs, waits up to ``timeout`` seconds, then aborts the stragglers."""
+        return await self._runs.drain(timeout)
+
     async def _run_internal(
         self,
         thread: GeminiThreadHandle,
@@ -136,23 +239,33 @@ class GeminiAdapter(HeadlessCoder):
         state = thread.internal
         self._assert_idle(state)
         prompt = self._apply_output_schema_prompt(input, run_opts)
-        process, active = await self._spawn_process(state, prompt, "json", run_opts)
-        stdout, stderr = await process.communicate()
+        check_output_schema(run_opts)
+        process, active = await self._spawn_process(thread, prompt, "json", run_opts)
         try:
+            stdout, stderr = await process.communicate()
+            active.progress.read(len(stdout))
+            if active.timed_out:
+                raise RunTimeoutError(active.abort_reason)
             if active.aborted:
                 raise _create_abort_error(active.abort_reason)
             if process.returncode not in (0, None):
                 raise RuntimeError(_format_process_error("gemini", process.returncode, stderr))
             payload = _parse_gemini_json(stdout.decode("utf-8"))
             structured = _maybe_extract_structured(payload, run_opts)
-            return RunResult(
+            active.result = RunResult(
                 thread_id=payload.get("session_id") or state.thread_id,
                 text=_extract_response_text(payload),
                 json=structured,
                 usage=payload.get("stats"),
                 raw=payload,
+                validation_errors=validate_run_output(run_opts, structured),
             )
+            return active.result
+        except BaseException as exc:
+            active.error = exc
+            raise
         finally:
+            await _terminate_process(process)
             self._cleanup_run(state, active)
 
     def _run_streamed_internal(
@@ -162,37 +275,133 @@ class GeminiAdapter(HeadlessCoder):
         run_opts: Optional[RunOpts],
     ) -> EventIterator:
         """Runs Gemini in streaming mode, yielding normalised events."""
+        batches = self._stream_batches(thread, input, run_opts)
+        return EventStream(coalesce_run_events(iterate_batches(batches), run_opts, task_bound=False))
+
+    def _run_streamed_batches_internal(
+        self,
+        thread: GeminiThreadHandle,
+        input: PromptInput,
+        run_opts: Optional[RunOpts],
+    ) -> EventBatchIterator:
+        """Runs Gemini in streaming mode, yielding one list of events per stdout read."""
+        batches = self._stream_batches(thread, input, run_opts)
+        return EventStream(coalesce_run_batches(batches, run_opts))
+
+    def _stream_batches(
+        self,
+        thread: GeminiThreadHandle,
+        input: PromptInput,
+        run_opts: Optional[RunOpts],
+    ) -> EventBatchIterator:
+        """Spawns Gemini in stream-json mode and yields the events decoded from each read."""
         state = thread.internal
         self._assert_idle(state)
         prompt = self._apply_output_schema_prompt(input, run_opts)
 
-        async def _iterator() -> AsyncIterator[CoderStreamEvent]:
-            process, active = await self._spawn_process(state, prompt, "stream-json", run_opts)
+        async def _iterator() -> EventBatchIterator:
+            check_output_schema(run_opts)
+            process, active = await self._spawn_process(thread, prompt, "stream-json", run_opts)
+            progress = active.progress
             try:
+                pipeline = EventPipeline.from_run_opts(CODER_NAME, run_opts, active.middleware)
+                event_filter = pipeline.event_filter if pipeline is not None else None
                 assert process.stdout is not None
-                async for line in _read_lines(process):
-                    if not line.strip():
-                        continue
-                    try:
-                        event = json.loads(line)
-                    except json.JSONDecodeError:
-                        LOGGER.debug("Skipping malformed Gemini line", extra={"line": line})
-                        continue
-                    for mapped in _normalize_gemini_event(event):
-                        yield mapped
+                async for lines in read_line_batches(process.stdout):
+                    progress.read_lines(lines)
+                    batch: list[CoderStreamEvent] = []
+                    for line in lines:
+                        if not line.strip():
+                            continue
+                        if event_filter is not None and not event_filter.screen(
+                            line, _GEMINI_EVENT_TYPES, _GEMINI_DEFAULT_EVENT_TYPES
+                        ):
+                            # Screened-out lines still drive the watchdog's tool tracking.
+                            progress.observe(extract_event_type(line))
+                            continue
+                        try:
+                            event = json.loads(line)
+                        except json.JSONDecodeError:
+                            LOGGER.debug("Skipping malformed Gemini line", extra={"line": line})
+                            continue
+                        event_type = event.get("type")
+                        tool = event.get("tool_name") if event_type == "tool_use" else None
+                        progress.observe(event_type, tool)
+                        for mapped in _normalize_gemini_event(event, event_filter):
+                            if pipeline is None:
+                                batch.append(mapped)
+                            else:
+                                batch.extend(pipeline.feed(mapped))
+                    if batch:
+                        yield batch
                 await process.wait()
                 if active.aborted:
                     reason = active.abort_reason or "Interrupted"
-                    yield _create_cancelled_event(reason)
-                    yield _create_interrupted_error_event(reason)
+                    code = "timeout" if active.timed_out else "interrupted"
+                    tail = [_create_cancelled_event(reason), _create_interrupted_error_event(reason, code)]
+                    yield tail if pipeline is None else pipeline.feed_all(tail)
                     return
                 if process.returncode not in (0, None):
                     raise RuntimeError(_format_process_error("gemini", process.returncode, None))
+            except BaseException as exc:
+                active.error = exc
+                raise
             finally:
+                await _terminate_process(process)
                 self._cleanup_run(state, active)
 
         return _iterator()
 
+    def _run_raw_internal(
+        self,
+        thread: GeminiThreadHandle,
+        input: PromptInput,
+        run_opts: Optional[RunOpts],
+    ) -> RawEventIterator:
+        """Spawns Gemini in stream-json mode and yields its lines without decoding them.
+
+        Only ``init`` lines are parsed, to capture the session id. Options acting on normalised
+        events do not apply. Once stdout is drained a non-zero exit raises ``RuntimeError``, an
+        aborted run ``CancellationError`` and a run stopped by its watchdog ``RunTimeoutError``.
+        """
+        state = thread.internal
+        self._assert_idle(state)
+        prompt = self._apply_output_schema_prompt(input, run_opts)
+
+        async def _iterator() -> RawEventIterator:
+            process, active = await self._spawn_process(thread, prompt, "stream-json", run_opts)
+            progress = active.progress
+            try:
+                assert process.stdout is not None
+                async for lines in read_line_batches(process.stdout):
+                    progress.read_lines(lines)
+                    for line in lines:
+                        if not line or line.isspace():
+                            continue
+                        event_type = extract_event_type(line)
+                        progress.observe(event_type)
+                        if event_type == "init":
+                            session_id = _raw_session_id(line)
+                            if session_id:
+                                state.thread_id = session_id
+                                thread.id = session_id
+                        yield RawEvent(CODER_NAME, event_type, line)
+                await process.wait()
+                if active.timed_out:
+                    raise RunTimeoutError(active.abort_reason)
+                if active.aborted:
+                    raise CancellationError(active.abort_reason or "Interrupted")
+                if process.returncode not in (0, None):
+                    raise RuntimeError(_format_process_error("gemini", process.returncode, None))
+            except BaseException as exc:
+                active.error = exc
+                raise
+            finally:
+                await _terminate_process(process)
+                self._cleanup_run(state, active)
+
+        return EventStream(_iterator())
+
     def _merge_start_opts(self, overrides: Optional[StartOpts]) -> StartOpts:
         """Merges adapter defaults with per-call overrides."""
         merged: StartOpts = {**self._default_opts}
@@ -202,20 +411,38 @@ class GeminiAdapter(HeadlessCoder):
 
     async def _spawn_process(
         self,
-        state: GeminiThreadState,
+        thread: GeminiThreadHandle,
         prompt: str,
         mode: str,
         run_opts: Optional[RunOpts],
     ) -> tuple[asyncio.subprocess.Process, ActiveRun]:
         """Spawns the Gemini CLI process, wiring cancellation before returning."""
+        self._runs.check_accepting()
+        state = thread.internal
         binary = _gemini_path(state.opts.get("geminiBinaryPath"))
         args = _build_gemini_args(state.opts, prompt, mode)
         env = os.environ.copy()
         if run_opts and run_opts.get("extraEnv"):
             env.update(run_opts["extraEnv"])
-        process = await self._process_runner(binary, args, env, state.opts.get("workingDirectory"))
+        cwd = state.opts.get("workingDirectory")
+        middleware = self._middleware.chain()
+        if middleware is not None:
+            request = SpawnRequest(CODER_NAME, binary, args, env, cwd=cwd, run_opts=run_opts)
+            request = middleware.prepare_spawn(request)
+            binary, args, env, cwd = request.binary or binary, request.args, request.env, request.cwd
+        process = await self._process_runner(binary, args, env, cwd)
+        if middleware is not None:
+            process.stdout = middleware.tap_stdout(process.stdout)
         signal = run_opts.get("signal") if run_opts else None
         active = self._register_run(state, process, signal)
+        active.handle = thread
+        active.middleware = middleware
+        # Blocking runs read JSON output in one piece at exit, so only the deadline applies.
+        active.watchdog = RunWatchdog.from_run_opts(
+            run_opts, lambda reason: self._expire_run(state, active, reason), watch_output=mode != "json"
+        )
+        active.progress.watchdog = active.watchdog
+        self._runs.add(active)
         return process, active
 
     def _register_run(
@@ -225,7 +452,9 @@ class GeminiAdapter(HeadlessCoder):
         signal: Optional[Any],
     ) -> ActiveRun:
         """Registers bookkeeping for the supplied process and links cancellation."""
-        unsubscribe = link_signal(signal, lambda reason: self._abort_child(state, reason))
+        # Bind the listener to the running loop so aborts fired from worker threads are not dropped.
+        loop = asyncio.get_running_loop()
+        unsubscribe = link_signal(signal, lambda reason: self._abort_child(state, reason), loop)
         active = ActiveRun(process=process, unsubscribe=unsubscribe)
         state.current_run = active
         return active
@@ -234,8 +463,20 @@ class GeminiAdapter(HeadlessCoder):
         """Cleans up references, timers, and signal subscriptions."""
         active.unsubscribe()
         self._cancel_kill_timers(active)
+        if active.watchdog is not None:
+            active.watchdog.cancel()
         if state.current_run is active:
             state.current_run = None
+        self._runs.discard(active)
+        if active.middleware is not None and active.middleware.after_run is not None:
+            active.middleware.after_run(RunReport.capture(active.snapshot(), active.result, active.error))
+
+    def _expire_run(self, state: GeminiThreadState, active: ActiveRun, reason: str) -> None:
+        """Stops ``active`` through the regular kill path once its watchdog fires."""
+        if state.current_run is not active or active.aborted:
+            return
+        active.timed_out = True
+        self._abort_child(state, reason)
 
     def _abort_child(self, state: GeminiThreadState, reason: Optional[str]) -> None:
         """Attempts to cooperatively stop the currently running CLI process."""
@@ -265,14 +506,17 @@ class GeminiAdapter(HeadlessCoder):
     def _assert_idle(self, state: GeminiThreadState) -> None:
         """Ensures only one Gemini run happens at a time for the handle."""
         if state.current_run is not None:
-            raise RuntimeError("Gemini adapter only supports one in-flight run per thread.")
+            raise RuntimeError(
+                "Gemini adapter only supports one in-flight run per thread; "
+                "start it with queueTurns to queue runs."
+            )
 
     def _apply_output_schema_prompt(self, input: PromptInput, run_opts: Optional[RunOpts]) -> str:
         """Appends structured output instructions whenever the caller supplies a schema."""
         schema = run_opts.get("outputSchema") if run_opts else None
         if not schema:
             return _normalize_prompt(input)
-        schema_snippet = json.dumps(schema, indent=2)
+        schema_snippet = get_schema_registry().prompt_snippet(schema)
         instruction = f"{STRUCTURED_OUTPUT_SUFFIX}\nSchema:\n{schema_snippet}"
         if isinstance(input, str):
             return f"{input}\n\n{instruction}"
@@ -339,6 +583,16 @@ def _parse_gemini_json(output: str) -> dict[str, Any]:
         return {"response": output.strip()}
 
 
+def _raw_session_id(line: bytes) -> Optional[str]:
+    """Returns the ``session_id`` carried by a raw ``init`` line."""
+    try:
+        event = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    session_id = event.get("session_id") if isinstance(event, dict) else None
+    return session_id if isinstance(session_id, str) else None
+
+
 def _maybe_extract_structured(payload: dict[str, Any], run_opts: Optional[RunOpts]) -> Any:
     """Extracts structured data from the payload when a schema was requested."""
     if not run_opts or not run_opts.get("outputSchema"):
@@ -346,7 +600,7 @@ def _maybe_extract_structured(payload: dict[str, Any], run_opts: Optional[RunOpt
     structured = payload.get("json")
     if structured is not None:
         return structured
-    return _extract_json_payload(_extract_response_text(payload))
+    return extract_json_payload(_extract_response_text(payload), run_opts["outputSchema"])
 
 
 def _extract_response_text(payload: dict[str, Any]) -> str:
@@ -358,24 +612,16 @@ def _extract_response_text(payload: dict[str, Any]) -> str:
     return ""
 
 
-def _extract_json_payload(text: Optional[str]) -> Any:
-    """Attempts to parse a JSON object embedded inside a text response."""
-    if not text:
-        return None
-    candidate = text.strip()
-    start = candidate.find("{")
-    end = candidate.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        return None
-    try:
-        return json.loads(candidate[start : end + 1])
-    except json.JSONDecodeError:
-        return None
-
-
-def _normalize_gemini_event(event: dict[str, Any]) -> list[CoderStreamEvent]:
-    """Maps Gemini CLI streaming events into the shared wire format."""
+def _normalize_gemini_event(
+    event: dict[str, Any],
+    event_filter: Optional[EventFilter] = None,
+) -> list[CoderStreamEvent]:
+    """Maps Gemini CLI streaming events into the shared wire format, honouring the event filter."""
     ev_type = event.get("type")
+    if event_filter is not None and not event_filter.needs_any(
+        _GEMINI_EVENT_TYPES.get(str(ev_type), _GEMINI_DEFAULT_EVENT_TYPES)
+    ):
+        return []
     ts = now()
     if ev_type == "init":
         return [
@@ -470,12 +716,12 @@ def _create_cancelled_event(reason: str) -> CoderStreamEvent:
     }
 
 
-def _create_interrupted_error_event(reason: str) -> CoderStreamEvent:
-    """Builds the canonical interruption error event for Gemini."""
+def _create_interrupted_error_event(reason: str, code: str = "interrupted") -> CoderStreamEvent:
+    """Builds the canonical interruption error event for Gemini (``code`` is ``timeout`` on expiry)."""
     return {
         "type": "error",
         "provider": CODER_NAME,
-        "code": "interrupted",
+        "code": code,
         "message": reason,
         "ts": now(),
         "originalItem": {"reason": reason},
@@ -499,17 +745,6 @@ def _format_process_error(name: str, code: Optional[int], stderr: Optional[bytes
     return base
 
 
-async def _read_lines(process: asyncio.subprocess.Process) -> AsyncIterator[str]:
-    """Streams stdout lines from the spawned process."""
-    reader = process.stdout
-    assert reader is not None
-    while True:
-        line = await reader.readline()
-        if not line:
-            break
-        yield line.decode("utf-8", errors="ignore")
-
-
 def _safe_terminate(process: asyncio.subprocess.Process) -> None:
     """Attempts to terminate the process, ignoring races when it already exited."""
     try:
@@ -526,6 +761,21 @@ def _safe_kill(process: asyncio.subprocess.Process) -> None:
         return
 
 
+async def _terminate_process(process: asyncio.subprocess.Process) -> None:
+    """Terminates a still-running CLI process when its run ends early, escalating to SIGKILL."""
+    if process.returncode is not None:
+        return
+    _safe_terminate(process)
+    try:
+        await asyncio.wait_for(process.wait(), SOFT_KILL_DELAY)
+    except asyncio.TimeoutError:
+        _safe_kill(process)
+        try:
+            await process.wait()
+        except Exception:
+            return
+
+
 def _try_get_running_loop() -> Optional[asyncio.AbstractEventLoop]:
     """Returns the current running loop when present."""
     try:
@@ -17,7 +17,12 @@ for path in (CORE_SRC, ADAPTER_SRC):
     if str(path) not in sys.path:
         sys.path.insert(0, str(path))
 
-from headless_coder_sdk.core import AbortController, RunResult  # noqa: E402
+from headless_coder_sdk.core import (  # noqa: E402
+    AbortController,
+    CancellationError,
+    RunResult,
+    RunTimeoutError,
+)
 from headless_coder_sdk.gemini_cli import GeminiAdapter  # noqa: E402
 
 
@@ -64,6 +69,11 @@ class _FakeStdout:
             return b""
         return self._lines.pop(0)
 
+    async def read(self, _: int = -1) -> bytes:
+        """Returns the next newline-terminated line, mimicking one chunk per read."""
+        line = await self.readline()
+        return line if not line or line.endswith(b"\n") else line + b"\n"
+
 
 class _StreamingProcess(_FakeProcess):
     """Fake process that exposes stdout for stream iteration."""
@@ -78,6 +88,26 @@ class _StreamingProcess(_FakeProcess):
         raise AssertionError("communicate() should not be invoked for streaming")
 
 
+class _SilentProcess(_FakeProcess):
+    """Fake process whose stdout stays open without output until it is terminated."""
+
+    def __init__(self) -> None:
+        """Initialises the silent fake process."""
+        super().__init__()
+        self._stopped = asyncio.Event()
+        self.stdout = self
+
+    async def read(self, _: int = -1) -> bytes:
+        """Blocks until the process is stopped, then reports end of output."""
+        await self._stopped.wait()
+        return b""
+
+    def terminate(self) -> None:
+        """Stops the process and closes its stdout."""
+        super().terminate()
+        self._stopped.set()
+
+
 @pytest.mark.asyncio
 async def test_run_returns_structured_result() -> None:
     """Ensures non-streaming runs parse Gemini output correctly."""
@@ -171,3 +201,86 @@ async def test_stream_handles_cancellation() -> None:
     events = await _consume()
     assert "cancelled" in events
     assert "error" in events
+
+
+@pytest.mark.asyncio
+async def test_stream_batches_yield_lists() -> None:
+    """Ensures batched streaming yields the same events grouped per read."""
+    lines = [
+        json.dumps({"type": "init", "session_id": "abc", "model": "g"}),
+        json.dumps({"type": "result", "stats": {"tokens": 5}}),
+    ]
+    process = _StreamingProcess(lines)
+
+    async def _runner(*_: Any, **__: Any):
+        """Returns the streaming fake process."""
+        return process
+
+    adapter = GeminiAdapter(process_runner=_runner)
+    thread = await adapter.start_thread()
+
+    batches = [batch async for batch in thread.run_streamed_batches("ping")]
+    assert [[event["type"] for event in batch] for batch in batches] == [["init"], ["usage", "done"]]
+
+
+@pytest.mark.asyncio
+async def test_run_raw_forwards_lines_and_captures_session() -> None:
+    """Ensures raw mode yields the CLI bytes untouched and still records the session id."""
+    lines = [
+        json.dumps({"type": "init", "session_id": "raw-session", "model": "g"}),
+        json.dumps({"type": "message", "content": "hello"}),
+    ]
+    process = _StreamingProcess(lines)
+
+    async def _runner(*_: Any, **__: Any):
+        """Returns the streaming fake process."""
+        return process
+
+    adapter = GeminiAdapter(process_runner=_runner)
+    thread = await adapter.start_thread()
+
+    raw = [event async for event in thread.run_raw("ping")]
+    assert [(event.type, event.data) for event in raw] == [
+        ("init", lines[0].encode("utf-8")),
+        ("message", lines[1].encode("utf-8")),
+    ]
+    assert thread.id == "raw-session"
+
+
+@pytest.mark.asyncio
+async def test_run_raw_raises_cancellation_error_when_aborted() -> None:
+    """Ensures an aborted raw run raises CancellationError once stdout is drained."""
+    lines = [
+        json.dumps({"type": "init", "session_id": "raw-session", "model": "g"}),
+        json.dumps({"type": "message", "content": "hello"}),
+    ]
+    process = _StreamingProcess(lines)
+
+    async def _runner(*_: Any, **__: Any):
+        """Returns the streaming fake process that will be aborted."""
+        return process
+
+    adapter = GeminiAdapter(process_runner=_runner)
+    controller = AbortController()
+    thread = await adapter.start_thread()
+
+    with pytest.raises(CancellationError):
+        async for _ in thread.run_raw("ping", {"signal": controller.signal}):
+            controller.abort("stop")
+
+
+@pytest.mark.asyncio
+async def test_run_raw_raises_run_timeout_error_when_idle() -> None:
+    """Ensures a raw run stopped by its idle watchdog raises RunTimeoutError."""
+    process = _SilentProcess()
+
+    async def _runner(*_: Any, **__: Any):
+        """Returns the silent fake process."""
+        return process
+
+    adapter = GeminiAdapter(process_runner=_runner)
+    thread = await adapter.start_thread()
+
+    with pytest.raises(RunTimeoutError):
+        async for _ in thread.run_raw("ping", {"idleTimeoutMs": 20}):
+            pass